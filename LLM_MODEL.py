@@ -1,37 +1,320 @@
+import json
+import time
+import random
+import threading
+import httpx
+import openai
 from langchain_openai import ChatOpenAI
 from langchain_ollama import ChatOllama
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
 
 
-class LocalApi:
-    def __init__(self, model_name: str, base_url: str):
-        self.llm = ChatOllama(model=model_name, temperature=0.0, base_url=base_url)
+PROMPT_TEMPLATE = "{instruction_prompt}\n\n### INPUT :\n{input_data}\n\n### OUTPUT FORMAT :\n{output_format_prompt}\n\n### OUTPUT :"
+
+# --- 호출 제한 시간 / 재시도 / 서킷 브레이커 기본값 ---
+LLM_TIMEOUT_SEC = 60  # 호출 1회 제한 시간
+LLM_MAX_RETRIES = 2  # 재시도 가능한 오류(시간 초과, 연결 실패, 429, 5xx)일 때 추가 시도 횟수
+RETRY_BASE_SEC = 1  # 재시도 대기: 1초, 2초, 4초 ... (+ 지터)
+RETRY_MAX_SEC = 20
+BREAKER_FAILURE_THRESHOLD = 5  # 연속 실패가 이 횟수에 도달하면 차단(open)
+BREAKER_RESET_SEC = 30  # 차단 후 이 시간이 지나면 1건만 시험 호출(half-open)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """백엔드가 차단(open) 상태여서 호출하지 않고 바로 실패함."""
+
+
+class CircuitBreaker:
+    """
+    백엔드 장애 시 빠르게 실패시키기 위한 서킷 브레이커.
+    closed(정상) -> 연속 실패 누적 시 open(즉시 실패) -> 대기 후 half-open(시험 호출 1건) -> 성공 시 closed
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_sec=BREAKER_RESET_SEC):
+        self.failure_threshold = failure_threshold
+        self.reset_sec = reset_sec
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_sec:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        """호출해도 되면 True. half-open 상태에서는 시험 호출 1건만 허용합니다."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_sec or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                # 시험 호출이 실패했거나 연속 실패가 누적되면 다시 차단
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+def is_retryable_error(e):
+    """일시적인 백엔드 오류(시간 초과, 연결 실패, 429, 5xx)인지 여부."""
+    if isinstance(e, (TimeoutError, ConnectionError, httpx.TimeoutException, httpx.NetworkError,
+                      openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    status_code = getattr(e, "status_code", None)
+    if status_code is None and isinstance(e, httpx.HTTPStatusError):
+        status_code = e.response.status_code
+    return status_code in RETRYABLE_STATUS_CODES
+
+
+class _BaseApi:
+    """필드별 체인을 한 번만 만들어 재사용하는 공통 클라이언트."""
+
+    def __init__(self, model_name, llm, cache=None, max_retries=LLM_MAX_RETRIES, breaker=None, metrics=None):
+        self.model_name = model_name
+        self.cache = cache
+        self.metrics = metrics
+        self.llm = llm
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self._chains = {}
+        self._chains_lock = threading.Lock()
+
+    def invoke(self, chain, model_input):
+        """
+        서킷 브레이커와 재시도(지수 백오프 + 지터)를 적용하여 체인을 호출합니다.
+        파싱 오류 등 재시도해도 소용없는 오류는 바로 전달하며, 백엔드 실패로 보지 않습니다.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"'{self.model_name}' 백엔드 차단 중 (연속 실패)")
+            try:
+                response = chain.invoke(model_input)
+            except Exception as e:
+                if not is_retryable_error(e):
+                    self.breaker.record_success()  # 응답은 받았으므로 백엔드는 정상
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(RETRY_BASE_SEC * (2 ** attempt), RETRY_MAX_SEC) * random.uniform(0.5, 1.5)
+                print(f"[⚠️ RETRY] '{self.model_name}' {attempt + 1}/{self.max_retries} after {delay:.1f}s: {e}")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return response
+
+    def get_chain(self, field_name):
+        with self._chains_lock:
+            if field_name not in self._chains:
+                self._chains[field_name] = _build_field_chain(self.llm, field_name)
+            return self._chains[field_name]
+
+    def get_batch_chain(self, field_names):
+        key = tuple(field_names)
+        with self._chains_lock:
+            if key not in self._chains:
+                self._chains[key] = _build_batch_chain(self.llm, field_names)
+            return self._chains[key]
+
+    def prepare(self, field_names):
+        """필드 목록에 대한 체인을 미리 생성합니다 (프롬프트 로드 시 1회)."""
+        with self._chains_lock:
+            self._chains.clear()
+        for field_name in field_names:
+            self.get_chain(field_name)
+        self.get_batch_chain(field_names)
 
     def send_request(self, field_name, instruction_prompt, input_data):
-        return _send_with_parser(self.llm, field_name, instruction_prompt, input_data)
+        return _send_with_parser(self.llm, field_name, instruction_prompt, input_data,
+                                 model_name=self.model_name, cache=self.cache,
+                                 chain_and_parser=self.get_chain(field_name), invoke=self.invoke,
+                                 metrics=self.metrics)
+
+    def send_batch_request(self, field_prompts, input_data):
+        return _send_batch_with_parser(self.llm, field_prompts, input_data,
+                                       model_name=self.model_name, cache=self.cache,
+                                       chain_and_parser=self.get_batch_chain(list(field_prompts.keys())),
+                                       invoke=self.invoke, metrics=self.metrics)
+
+
+class LocalApi(_BaseApi):
+    def __init__(self, model_name: str, base_url: str, cache=None,
+                 timeout=LLM_TIMEOUT_SEC, max_retries=LLM_MAX_RETRIES, metrics=None):
+        llm = ChatOllama(model=model_name, temperature=0.0, base_url=base_url,
+                         client_kwargs={"timeout": timeout})
+        super().__init__(model_name, llm, cache, max_retries=max_retries, metrics=metrics)
+
+
+class GPTApi(_BaseApi):
+    def __init__(self, model_name: str, api_key: str, cache=None,
+                 timeout=LLM_TIMEOUT_SEC, max_retries=LLM_MAX_RETRIES, metrics=None):
+        # 재시도는 _BaseApi.invoke 에서 처리하므로 SDK 자체 재시도는 끔
+        llm = ChatOpenAI(model_name=model_name, openai_api_key=api_key, temperature=0.0,
+                         timeout=timeout, max_retries=0)
+        super().__init__(model_name, llm, cache, max_retries=max_retries, metrics=metrics)
+
 
+class FailoverApi:
+    """
+    기본 백엔드(예: LocalApi)가 차단 중이거나 백엔드 오류로 실패하면 예비 백엔드(예: GPTApi)로 다시 요청합니다.
+    파싱 실패처럼 응답을 받은 경우에는 넘기지 않습니다.
+    """
 
-class GPTApi:
-    def __init__(self, model_name: str, api_key: str):
-        self.llm = ChatOpenAI(model_name=model_name, openai_api_key=api_key, temperature=0.0)
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.model_name = primary.model_name
+
+    def prepare(self, field_names):
+        self.primary.prepare(field_names)
+        self.fallback.prepare(field_names)
+
+    def _call(self, method_name, *args):
+        if self.primary.breaker.state == "open":
+            return getattr(self.fallback, method_name)(*args)
+        result = getattr(self.primary, method_name)(*args)
+        if result.get("backend_error"):
+            print(f"[🔀 FAILOVER] '{self.primary.model_name}' -> '{self.fallback.model_name}'")
+            return getattr(self.fallback, method_name)(*args)
+        return result
 
     def send_request(self, field_name, instruction_prompt, input_data):
-        return _send_with_parser(self.llm, field_name, instruction_prompt, input_data)
+        return self._call("send_request", field_name, instruction_prompt, input_data)
 
+    def send_batch_request(self, field_prompts, input_data):
+        return self._call("send_batch_request", field_prompts, input_data)
 
-def _send_with_parser(llm, field_name, instruction_prompt, input_data):
-    try:
-        response_schema = ResponseSchema(name=field_name, description="Extracted value")
-        output_parser = StructuredOutputParser.from_response_schemas([response_schema])
 
-        prompt = ChatPromptTemplate.from_messages([
-            HumanMessagePromptTemplate.from_template(
-                "{instruction_prompt}\n\n### INPUT :\n{input_data}\n\n### OUTPUT FORMAT :\n{output_format_prompt}\n\n### OUTPUT :"
-            )
-        ])
+def _build_field_chain(llm, field_name):
+    response_schema = ResponseSchema(name=field_name, description="Extracted value")
+    output_parser = StructuredOutputParser.from_response_schemas([response_schema])
+
+    prompt = ChatPromptTemplate.from_messages([
+        HumanMessagePromptTemplate.from_template(PROMPT_TEMPLATE)
+    ])
+
+    # 파서를 체인에서 분리하여 응답 메시지의 토큰 사용량(usage_metadata)을 기록할 수 있게 함
+    return prompt | llm, output_parser
+
+
+def _build_batch_chain(llm, field_names):
+    response_schemas = [
+        ResponseSchema(name=field_name, description="Extracted value")
+        for field_name in field_names
+    ]
+    output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+
+    prompt = ChatPromptTemplate.from_messages([
+        HumanMessagePromptTemplate.from_template(PROMPT_TEMPLATE)
+    ])
 
-        chain = prompt | llm | output_parser
+    # 파서를 체인에서 분리하여 응답 메시지의 토큰 사용량(usage_metadata)을 기록할 수 있게 함
+    return prompt | llm, output_parser
+
+
+def _is_backend_error(e):
+    return isinstance(e, CircuitOpenError) or is_retryable_error(e)
+
+
+def _record_metrics(metrics, model_name, field_name, started, message=None, cache_hit=False,
+                    outcome="ok", error=None):
+    if metrics is None:
+        return
+    usage = getattr(message, "usage_metadata", None) or {}
+    metrics.record(
+        model_name,
+        field_name,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        prompt_tokens=usage.get("input_tokens"),
+        completion_tokens=usage.get("output_tokens"),
+        cache_hit=cache_hit,
+        outcome=outcome,
+        error=error,
+    )
+
+
+def _split_tokens(total, count):
+    """배치 호출 토큰 수를 필드 수로 나눕니다. (나머지는 앞 필드부터 1씩, 합계 유지)"""
+    if total is None:
+        return [None] * count
+    share, remainder = divmod(int(total), count)
+    return [share + (1 if i < remainder else 0) for i in range(count)]
+
+
+def _record_batch_metrics(metrics, model_name, field_names, started, message=None, parsed=None,
+                          cache_hit=False, outcome="ok", error=None):
+    """
+    배치 호출 1건을 필드마다 1행으로 기록합니다. 지연 시간은 배치 전체 시간, 토큰은 필드 수로 나눈 값입니다.
+    정상 응답에서 값이 빠진 필드는 parse_error 로 기록합니다.
+    """
+    if metrics is None:
+        return
+    latency_ms = (time.perf_counter() - started) * 1000
+    usage = getattr(message, "usage_metadata", None) or {}
+    field_names = list(field_names)
+    prompt_tokens = _split_tokens(usage.get("input_tokens"), len(field_names))
+    completion_tokens = _split_tokens(usage.get("output_tokens"), len(field_names))
+    for i, field_name in enumerate(field_names):
+        field_outcome = outcome
+        if outcome == "ok" and parsed is not None and field_name not in parsed:
+            field_outcome = "parse_error"
+        metrics.record(
+            model_name,
+            field_name,
+            latency_ms=latency_ms,
+            prompt_tokens=prompt_tokens[i],
+            completion_tokens=completion_tokens[i],
+            cache_hit=cache_hit,
+            outcome=field_outcome,
+            error=error,
+            batch_size=len(field_names),
+        )
+
+
+def _error_outcome(e, message):
+    if _is_backend_error(e):
+        return "backend_error"
+    # 응답은 받았으나 파싱에 실패한 경우
+    return "parse_error" if message is not None else "error"
+
+
+def _send_with_parser(llm, field_name, instruction_prompt, input_data, model_name=None, cache=None,
+                      chain_and_parser=None, invoke=None, metrics=None):
+    started = time.perf_counter()
+    # 캐시 조회 (동일 모델/필드/지시문/입력이면 LLM 호출 생략)
+    if cache is not None:
+        cached = cache.get(model_name, field_name, instruction_prompt, input_data)
+        if cached is not None:
+            _record_metrics(metrics, model_name, field_name, started, cache_hit=True)
+            return cached
+
+    message = None
+    try:
+        if chain_and_parser is None:
+            chain_and_parser = _build_field_chain(llm, field_name)
+        chain, output_parser = chain_and_parser
 
         MODEL_INPUT = {
             "instruction_prompt": instruction_prompt,
@@ -39,7 +322,8 @@ def _send_with_parser(llm, field_name, instruction_prompt, input_data):
             "output_format_prompt": f"{field_name}: string"
         }
 
-        raw_response = chain.invoke(MODEL_INPUT)
+        message = invoke(chain, MODEL_INPUT) if invoke else chain.invoke(MODEL_INPUT)
+        raw_response = output_parser.invoke(message)
 
         # MODEL_RESPONSE 출력
         # print(f"[📥 RAW RESPONSE] - Field: {field_name}")
@@ -47,14 +331,86 @@ def _send_with_parser(llm, field_name, instruction_prompt, input_data):
         # print(str(raw_response))
         # print("=" * 80 + "\n")
 
-        return {
+        result = {
             "parsed": raw_response.get(field_name, "ERROR"),
             "raw": str(raw_response)
         }
+        if cache is not None and result["parsed"] != "ERROR":
+            cache.put(model_name, field_name, instruction_prompt, input_data, result)
+        if result["parsed"] == "ERROR":
+            outcome = "parse_error"
+        elif result["parsed"] == "NO_TEXT":
+            outcome = "no_text"
+        else:
+            outcome = "ok"
+        _record_metrics(metrics, model_name, field_name, started, message, outcome=outcome)
+        return result
 
     except Exception as e:
         print(f"[❌ ERROR] in LLM call for field '{field_name}': {e}")
+        _record_metrics(metrics, model_name, field_name, started, message,
+                        outcome=_error_outcome(e, message), error=str(e))
         return {
             "parsed": "ERROR",
-            "raw": str(e)
-        }
\ No newline at end of file
+            "raw": str(e),
+            "backend_error": _is_backend_error(e),
+        }
+
+
+def _send_batch_with_parser(llm, field_prompts, input_data, model_name=None, cache=None,
+                            chain_and_parser=None, invoke=None, metrics=None):
+    """
+    여러 필드를 한 번의 LLM 호출로 추출합니다.
+    field_prompts: {field_name: instruction_prompt}
+    반환값의 parsed 는 {field_name: value} 이며, 응답에서 누락된 필드는 포함되지 않습니다.
+    """
+    # 배치 응답은 필드 목록 전체를 하나의 캐시 키로 저장
+    cache_field = "BATCH:" + ",".join(field_prompts.keys())
+    cache_prompt = json.dumps(field_prompts, ensure_ascii=False, sort_keys=True)
+    started = time.perf_counter()
+    if cache is not None:
+        cached = cache.get(model_name, cache_field, cache_prompt, input_data)
+        if cached is not None:
+            _record_batch_metrics(metrics, model_name, field_prompts, started, cache_hit=True)
+            return cached
+
+    message = None
+    try:
+        if chain_and_parser is None:
+            chain_and_parser = _build_batch_chain(llm, list(field_prompts.keys()))
+        chain, output_parser = chain_and_parser
+
+        # 필드별 지시문을 하나의 프롬프트로 결합
+        instruction_prompt = "\n\n".join(
+            f"### FIELD : {field_name}\n{instruction}"
+            for field_name, instruction in field_prompts.items()
+        )
+
+        MODEL_INPUT = {
+            "instruction_prompt": instruction_prompt,
+            "input_data": input_data,
+            "output_format_prompt": output_parser.get_format_instructions(),
+        }
+
+        message = invoke(chain, MODEL_INPUT) if invoke else chain.invoke(MODEL_INPUT)
+        raw_response = output_parser.invoke(message)
+
+        result = {
+            "parsed": {k: v for k, v in raw_response.items() if k in field_prompts},
+            "raw": str(raw_response)
+        }
+        if cache is not None and result["parsed"]:
+            cache.put(model_name, cache_field, cache_prompt, input_data, result)
+        _record_batch_metrics(metrics, model_name, field_prompts, started, message, parsed=result["parsed"],
+                              outcome="ok" if result["parsed"] else "parse_error")
+        return result
+
+    except Exception as e:
+        print(f"[❌ ERROR] in batch LLM call for {len(field_prompts)} fields: {e}")
+        _record_batch_metrics(metrics, model_name, field_prompts, started, message,
+                              outcome=_error_outcome(e, message), error=str(e))
+        return {
+            "parsed": {},
+            "raw": str(e),
+            "backend_error": _is_backend_error(e),
+        }
@@ -0,0 +1,181 @@
+"""
+폴더 단위 일괄 처리 실행기 (util/get_info.py, util/get_ocr.py 에서 사용).
+
+- 동시 처리 수(workers)를 제한하여 레이아웃 서비스가 감당할 수 있는 만큼만 요청합니다.
+- 처리 결과를 manifest(jsonl)에 기록하여, 중단 후 다시 실행하면 완료된 파일은 건너뜁니다.
+- 파일별 제한 시간(deadline)을 넘긴 작업은 timeout 으로 기록하고 다음 파일로 넘어갑니다.
+  포기한 작업의 스레드는 멈출 수 없으므로, 서비스 요청은 FileBudget.service_call() 로 감싸서
+  동시 요청 수를 workers 이하로 유지하고 요청마다 남은 시간만 타임아웃으로 줍니다.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from tqdm import tqdm
+
+MANIFEST_NAME = ".batch_manifest.jsonl"
+DEFAULT_WORKERS = 4
+DEFAULT_DEADLINE_SEC = 900  # 파일 1건 처리 제한 시간 (초)
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+
+
+def load_manifest(manifest_path):
+    """이미 완료된 파일명 집합을 반환합니다. (실패/시간 초과 건은 다시 처리)"""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 비정상 종료로 잘린 마지막 줄
+            if entry.get("status") == STATUS_DONE:
+                done.add(entry["file"])
+            else:
+                done.discard(entry["file"])
+    return done
+
+
+def append_manifest(manifest_path, entry):
+    with open(manifest_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    secs = seconds % 60
+    return f"{hours}시간 {minutes}분 {secs}초"
+
+
+class BatchTimeout(Exception):
+    """파일 1건의 제한 시간이 지나 서비스 요청을 보내지 않음."""
+
+
+class FileBudget:
+    """파일 1건의 남은 처리 시간과 실행기 전체의 서비스 동시 요청 제한."""
+
+    def __init__(self, deadline_sec, service_slots):
+        self.deadline = time.time() + deadline_sec
+        self.service_slots = service_slots
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.time())
+
+    @contextmanager
+    def service_call(self, max_timeout=None):
+        """
+        서비스 요청 1건을 보낼 차례를 기다리고, 요청 타임아웃으로 쓸 남은 시간(초)을 넘겨줍니다.
+        (max_timeout 이 있으면 그보다 길게 주지 않음) 제한 시간 안에 차례가 오지 않으면 BatchTimeout
+        (run_batch 가 timeout 으로 기록).
+        """
+        if not self.service_slots.acquire(timeout=self.remaining()):
+            raise BatchTimeout("제한 시간 안에 서비스 요청 차례가 오지 않았습니다.")
+        try:
+            timeout = self.remaining()
+            if timeout <= 0:
+                raise BatchTimeout("제한 시간이 지나 서비스 요청을 보내지 않았습니다.")
+            yield min(timeout, max_timeout) if max_timeout else timeout
+        finally:
+            self.service_slots.release()
+
+
+def run_batch(files, process_fn, manifest_path, workers=DEFAULT_WORKERS, deadline_sec=DEFAULT_DEADLINE_SEC,
+              desc="PDF 처리 중"):
+    """
+    files 의 각 파일에 process_fn(file, budget) 을 동시에 실행합니다.
+    process_fn 은 성공 시 빈 문자열/None, 실패 시 오류 메시지를 반환하거나 예외를 발생시킵니다.
+    서비스 요청은 budget.service_call() 안에서 보냅니다. (FileBudget)
+    처리 요약(dict)을 반환합니다.
+    """
+    done = load_manifest(manifest_path)
+    targets = [f for f in files if f not in done]
+    print(f"전체 {len(files)}건 중 {len(files) - len(targets)}건은 이미 완료되어 건너뜁니다. "
+          f"{len(targets)}건 처리를 시작합니다. (workers={workers}, 파일당 제한 {deadline_sec}초)")
+
+    summary = {"total": len(files), "skipped": len(files) - len(targets), "done": 0, "failed": 0,
+               "timeout": 0, "elapsed": 0.0, "errors": []}
+    if not targets:
+        return summary
+
+    start_time = time.time()
+    # 시간 초과로 포기한 작업이 스레드를 점유해도 새 작업이 밀리지 않도록 여유 스레드를 둠
+    executor = ThreadPoolExecutor(max_workers=workers * 2)
+    # 포기한 작업의 요청까지 포함해 서비스로 가는 동시 요청은 workers 건 이하
+    service_slots = threading.BoundedSemaphore(workers)
+    try:
+        queue = list(targets)
+        running = {}  # future -> file
+        started_at = {}  # file -> 실제 처리 시작 시각 (executor 대기 시간 제외)
+
+        def timed_process(file):
+            started_at[file] = time.time()
+            return process_fn(file, FileBudget(deadline_sec, service_slots))
+
+        def submit_next():
+            while queue and len(running) < workers:
+                file = queue.pop(0)
+                running[executor.submit(timed_process, file)] = file
+
+        def record(file, status, error=""):
+            elapsed = time.time() - started_at.get(file, time.time())
+            summary[status] += 1
+            if error:
+                summary["errors"].append((file, error))
+                tqdm.write(f"  오류: '{file}' {error}")
+            append_manifest(manifest_path, {"file": file, "status": status,
+                                            "elapsed": round(elapsed, 2), "error": error})
+            progress.update(1)
+
+        with tqdm(total=len(targets), desc=desc, unit="파일") as progress:
+            submit_next()
+            while running:
+                finished, _ = wait(list(running), timeout=1, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    file = running.pop(future)
+                    try:
+                        error = future.result()
+                    except BatchTimeout as e:
+                        record(file, STATUS_TIMEOUT, str(e))
+                        continue
+                    except Exception as e:
+                        error = f"예상치 못한 오류 발생: {e}"
+                    record(file, STATUS_FAILED if error else STATUS_DONE, error or "")
+
+                now = time.time()
+                for future, file in list(running.items()):
+                    started = started_at.get(file)
+                    if started is not None and now - started > deadline_sec:
+                        # 스레드는 강제로 멈출 수 없으므로 결과를 버리고 다음 파일로 진행
+                        running.pop(future)
+                        record(file, STATUS_TIMEOUT, f"제한 시간 {deadline_sec}초 초과")
+                submit_next()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    summary["elapsed"] = time.time() - start_time
+    return summary
+
+
+def print_summary(summary):
+    processed = summary["done"] + summary["failed"] + summary["timeout"]
+    elapsed = summary["elapsed"]
+    print("\n--- 일괄 처리 완료 ---")
+    print(f"전체 {summary['total']}건: 성공 {summary['done']}건, 실패 {summary['failed']}건, "
+          f"시간 초과 {summary['timeout']}건, 건너뜀 {summary['skipped']}건")
+    print(f"총 소요 시간: {elapsed:.2f} 초 ({format_seconds(elapsed)})")
+    if processed and elapsed > 0:
+        print(f"파일 당 평균 처리 시간: {elapsed / processed:.2f} 초, 처리 속도: {processed / elapsed * 3600:.1f} 파일/시간")
+    if summary["errors"]:
+        print("실패 목록:")
+        for file, error in summary["errors"]:
+            print(f"  - {file}: {error}")
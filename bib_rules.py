@@ -0,0 +1,113 @@
+import re
+
+# --- 규칙 기반 서지정보 추출 ---
+# 레이아웃 블록에서 패턴으로 확실하게 찾을 수 있는 필드만 채웁니다.
+# 후보 값이 서로 다르게 여러 개 나오면(애매하면) 해당 필드는 비워 두고 LLM에 맡깁니다.
+
+RULE_FIELDS = ["DOI", "PUBLICATION_YEAR", "VOLUME", "ISSUE", "PAGE", "JOURNAL_NAME"]
+
+DOI_PATTERN = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)", re.IGNORECASE)
+
+# Vancouver 형식 인용 줄: "J Korean Med Sci. 2021;36(12):e85" / "Cancer Res 2019; 79(3): 123-130"
+CITATION_PATTERN = re.compile(
+    r"(?:(?P<journal>[A-Z][A-Za-z&\-. ]{2,80}?)\.?\s+)?"
+    r"(?P<year>(?:19|20)\d{2})\s*(?:[A-Z][a-z]{2}(?:\s*\d{1,2})?)?\s*;\s*"
+    r"(?P<volume>\d{1,4})\s*"
+    r"(?:\((?P<issue>[\w\-–]{1,10})\))?\s*:\s*"
+    r"(?P<page>e?\d{1,6}(?:\s*[-–]\s*e?\d{1,6})?)"
+)
+
+# "Vol. 12, No. 3, pp. 123-130" 형식
+# 본문의 "no 2 lesions", "grant No. 1234", "Volume 3 of the survey" 를 잡지 않도록
+# 대소문자를 구분하고, 권(Vol.) 뒤에 이어지는 서지 표기일 때만 인정합니다. 호(No.)는 권과 함께 나올 때만 사용
+VOLUME_PATTERN = re.compile(r"\bVol(?:\.|ume)\s*(\d{1,4})(?=\s*(?:[,;(]|$)|\s+(?:No\.|Issue\b|pp?\.))")
+ISSUE_PATTERN = re.compile(r"\bVol(?:\.|ume)\s*\d{1,4}\s*,?\s*(?:No\.|Issue)\s*(\d{1,4})\b")
+PAGE_PATTERN = re.compile(r"\bpp?\.\s*(\d{1,6}\s*[-–]\s*\d{1,6})\b")
+
+# 머리말/꼬리말/각주: 논문 자신의 서지정보가 위치하는 블록 타입
+# (본문 Text 블록에는 다른 논문 인용 "(Lancet 2019;393:1000-1012)" 이 섞여 있어 제외)
+HEADER_TYPES = {"Page header", "Page footer", "Footnote"}
+
+TRAILING_PUNCT = ".,;:)]}"
+
+
+def _unique(values):
+    """후보 값이 하나로 모이면 그 값을, 아니면 None 을 반환합니다."""
+    distinct = set(v for v in values if v)
+    if len(distinct) == 1:
+        return distinct.pop()
+    return None
+
+
+def _normalize_dash(text):
+    return re.sub(r"\s*[-–]\s*", "-", text)
+
+
+def _iter_blocks(json_data, max_page_number):
+    for block in json_data:
+        page = block.get("page_number")
+        text = block.get("text", "")
+        if not isinstance(page, int) or not isinstance(text, str):
+            continue
+        if max_page_number is not None and page > max_page_number:
+            continue
+        yield block.get("type", "Unknown"), text
+
+
+def extract_rule_fields(json_data, max_page_number=2):
+    """
+    레이아웃 JSON 블록에서 DOI, PUBLICATION_YEAR, VOLUME, ISSUE, PAGE, JOURNAL_NAME 을
+    패턴으로 추출합니다. 확신할 수 있는 필드만 {field: value} 로 반환합니다.
+    """
+    dois, citations = [], []
+    volumes, issues, pages = [], [], []
+
+    for block_type, text in _iter_blocks(json_data, max_page_number):
+        if block_type not in HEADER_TYPES:
+            continue
+        for match in DOI_PATTERN.finditer(text):
+            dois.append(match.group(1).rstrip(TRAILING_PUNCT))
+        for match in CITATION_PATTERN.finditer(text):
+            citations.append(match.groupdict())
+        volumes += VOLUME_PATTERN.findall(text)
+        issues += ISSUE_PATTERN.findall(text)
+        pages += [_normalize_dash(p) for p in PAGE_PATTERN.findall(text)]
+
+    result = {}
+
+    # DOI 는 대소문자를 구분하지 않으므로 소문자로 비교하고 원문 표기를 반환
+    doi = _unique(d.lower() for d in dois)
+    if doi:
+        result["DOI"] = next(d for d in dois if d.lower() == doi)
+
+    if citations:
+        # 인용 줄이 하나로 일치할 때만 사용
+        fields = {
+            "PUBLICATION_YEAR": _unique(c["year"] for c in citations),
+            "VOLUME": _unique(c["volume"] for c in citations),
+            "ISSUE": _unique(c["issue"] for c in citations),
+            "PAGE": _unique(_normalize_dash(c["page"]) for c in citations if c["page"]),
+            "JOURNAL_NAME": _unique(
+                c["journal"].strip() for c in citations if c["journal"]
+            ),
+        }
+        result.update({k: v for k, v in fields.items() if v})
+    else:
+        fields = {
+            "VOLUME": _unique(volumes),
+            "ISSUE": _unique(issues),
+            "PAGE": _unique(pages),
+        }
+        result.update({k: v for k, v in fields.items() if v})
+
+    return result
+
+
+def normalize_for_compare(field, value):
+    """규칙 값과 LLM 값 비교용 정규화."""
+    text = str(value or "").strip().lower()
+    if field == "DOI":
+        text = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", "", text)
+    if field == "PAGE":
+        text = _normalize_dash(text)
+    return text.rstrip(TRAILING_PUNCT)
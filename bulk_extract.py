@@ -0,0 +1,255 @@
+"""
+레이아웃 JSON 폴더를 일괄로 서지정보 추출하여 paper.db 에 적재하는 명령행 도구.
+
+사용 예:
+    python bulk_extract.py uploaded --workers 8
+    python bulk_extract.py uploaded --workers 8 --overwrite
+
+- get_paper_df + parsing_json 파이프라인을 프로세스 풀에서 실행합니다.
+- 추출 결과는 화면의 save_output_file 과 동일하게 resolved/ 폴더에 저장됩니다.
+- 처리 결과는 체크포인트 파일에 기록되어, 중단 후 다시 실행하면 이어서 처리합니다.
+  (--overwrite 는 이전 체크포인트를 보관용 이름으로 옮기고 처음부터 다시 처리)
+- c_info / a_info 는 일정 건수마다 하나의 트랜잭션으로 일괄 반영합니다.
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from db import get_connection
+from schema import migrate
+from layout_store import LAYOUT_EXT, is_layout_file, layout_stem
+from upsert import AUDIT_COLUMNS, get_table_columns, upsert_rows
+
+# --- 기본 설정 ---
+DB_FILE = "paper.db"
+RESOLVE_FOLDER = "resolved"
+DEFAULT_WORKERS = 4
+DEFAULT_COMMIT_SIZE = 200  # 트랜잭션 1회당 논문 수
+CHECKPOINT_NAME = ".bulk_extract_checkpoint.jsonl"
+FILE_NAME_COLUMNS = ("ORI_FILE_NAME", "PDF_FILE_NAME", "JSON_FILE_NAME", "LLM_JSON_FILE_NAME")
+A_ROW_COLUMNS = ("AUTHOR", "AFFILIATION", "ROLE") + FILE_NAME_COLUMNS
+
+
+# [STEP 1] 체크포인트
+def load_checkpoint(checkpoint_path):
+    """이미 완료된 JSON 파일명 집합을 반환합니다. (실패 건은 다시 처리)"""
+    done = set()
+    if not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 비정상 종료로 잘린 마지막 줄
+            if entry.get("status") == "done":
+                done.add(entry["json"])
+    return done
+
+
+def append_checkpoint(checkpoint_path, entries):
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+# [STEP 2] 자식 프로세스: JSON 1건 추출
+def extract_one(json_path, resolve_folder):
+    """
+    JSON 1건을 추출하여 (c_info 행 dict, a_info 행 list)를 반환합니다.
+    실패 시 error 에 사유를 담습니다.
+    """
+    from get_paper_info import get_paper_df, save_output_file
+
+    json_name = os.path.basename(json_path)
+    pdf_name = f"{layout_stem(json_name)}.pdf"
+    try:
+        json_data, a_info, c_info, fail_count, model_name = get_paper_df(json_path)
+        if c_info is None:
+            return {"json": json_name, "error": f"서지정보 추출 실패. 실패 수: {fail_count}"}
+
+        output_path, _ = save_output_file(json_data, json_name, model_name, resolve_folder)
+        llm_json_name = os.path.basename(output_path) if output_path else ""
+
+        file_names = {
+            "ORI_FILE_NAME": pdf_name,
+            "PDF_FILE_NAME": pdf_name,
+            "JSON_FILE_NAME": json_name,
+            "LLM_JSON_FILE_NAME": llm_json_name,
+        }
+        c_row = dict(zip(c_info["Key"], c_info["Value"]))
+        c_row.update(file_names)
+
+        a_rows = []
+        for row in a_info.to_dict(orient="records"):
+            a_rows.append({
+                "AUTHOR": row.get("AUTHOR"),
+                "AFFILIATION": row.get("AFFILIATION"),
+                "ROLE": row.get("ROLE"),
+                **file_names,
+            })
+        return {"json": json_name, "c_row": c_row, "a_rows": a_rows}
+    except Exception as e:
+        return {"json": json_name, "error": f"예상치 못한 오류 발생: {e}"}
+
+
+# [STEP 3] DB 일괄 반영
+def bulk_upsert_papers(conn, results, user_id="AD00000"):
+    """
+    추출 결과 목록을 하나의 트랜잭션으로 c_info / a_info 에 업서트합니다. (upsert.py)
+    기존 논문이면 REG_DT/REG_ID 와 원본 파일명(ORI_FILE_NAME)은 유지하고 MOD_DT/MOD_ID 를 갱신하며,
+    a_info 는 논문 단위로 이번 추출 결과의 저자 목록으로 교체합니다.
+    """
+    if not results:
+        return
+    pdf_names = [r["c_row"]["PDF_FILE_NAME"] for r in results]
+    placeholders = ",".join("?" * len(pdf_names))
+    ori_names = dict(
+        conn.execute(
+            f"SELECT PDF_FILE_NAME, ORI_FILE_NAME FROM c_info WHERE PDF_FILE_NAME IN ({placeholders})",
+            pdf_names,
+        ).fetchall()
+    )
+
+    # c_info 는 추출 결과로 전체 컬럼을 교체, a_info 는 추출 컬럼만 반영 (저자 지정 직원번호/이름 유지)
+    c_columns = [col for col in get_table_columns(conn, "c_info") if col not in AUDIT_COLUMNS]
+    c_values, a_values = [], []
+    for r in results:
+        c_row = r["c_row"]
+        ori_name = ori_names.get(c_row["PDF_FILE_NAME"]) or c_row["ORI_FILE_NAME"]
+        c_values.append(tuple(c_row.get(col) for col in c_columns))
+        for a_row in r["a_rows"]:
+            a_row = dict(a_row, ORI_FILE_NAME=ori_name)
+            a_values.append(tuple(a_row.get(col) for col in A_ROW_COLUMNS))
+
+    try:
+        upsert_rows(conn, "c_info", c_columns, c_values, user_id=user_id, keep_columns=("ORI_FILE_NAME",))
+        # 저자 행이 하나도 없는 논문의 예전 저자 행도 지우도록 이번에 처리한 논문을 모두 정리 대상으로 지정
+        upsert_rows(
+            conn, "a_info", A_ROW_COLUMNS, a_values, user_id=user_id,
+            prune_by=("PDF_FILE_NAME",), prune_groups=pdf_names,
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def get_existing_pdf_names(conn):
+    return {row[0] for row in conn.execute("SELECT PDF_FILE_NAME FROM c_info").fetchall()}
+
+
+# [STEP 4] 실행
+def run(json_dir, db_file=DB_FILE, resolve_folder=RESOLVE_FOLDER, workers=DEFAULT_WORKERS,
+        commit_size=DEFAULT_COMMIT_SIZE, checkpoint_path=None, overwrite=False, user_id="AD00000"):
+    if not os.path.isdir(json_dir):
+        print(f"오류: '{json_dir}' 폴더가 존재하지 않습니다.")
+        return
+    if not os.path.exists(db_file):
+        print(f"오류: '{db_file}' 파일이 없습니다. 앱을 한 번 실행하여 DB를 초기화하세요.")
+        return
+    migrate(db_file)  # 업서트에 필요한 고유 키 (앱을 새 버전으로 실행하기 전이어도 적용)
+    os.makedirs(resolve_folder, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(json_dir, CHECKPOINT_NAME)
+
+    if overwrite:
+        # 이전 실행의 완료 기록은 무시하고 새 체크포인트로 시작 (이전 기록은 .<시각> 을 붙여 보관)
+        done = set()
+        if os.path.exists(checkpoint_path):
+            rotated = f"{checkpoint_path}.{time.strftime('%Y%m%d%H%M%S')}"
+            os.replace(checkpoint_path, rotated)
+            print(f"--overwrite: 이전 체크포인트를 '{rotated}' 로 옮기고 모든 파일을 다시 처리합니다.")
+    else:
+        done = load_checkpoint(checkpoint_path)
+
+    conn = get_connection(db_file)
+    existing_pdfs = set() if overwrite else get_existing_pdf_names(conn)
+
+    # 같은 논문의 .json 과 .layout.zip 이 함께 있으면 압축 형식만 처리
+    layout_files = {}
+    for f in sorted(os.listdir(json_dir)):
+        if is_layout_file(f) and (layout_stem(f) not in layout_files or f.endswith(LAYOUT_EXT)):
+            layout_files[layout_stem(f)] = f
+    json_files = sorted(layout_files.values())
+    targets = [
+        f for f in json_files
+        if f not in done and f"{layout_stem(f)}.pdf" not in existing_pdfs
+    ]
+    print(f"전체 {len(json_files)}건 중 {len(json_files) - len(targets)}건은 완료/등록되어 건너뜁니다. "
+          f"{len(targets)}건 처리를 시작합니다. (workers={workers})")
+    if not targets:
+        conn.close()
+        return
+
+    start_time = time.time()
+    processed, failed = 0, 0
+    pending_results, pending_entries = [], []
+
+    def flush():
+        bulk_upsert_papers(conn, pending_results, user_id=user_id)
+        # DB 반영이 끝난 뒤에 체크포인트 기록 (재실행 시 누락 방지)
+        append_checkpoint(checkpoint_path, pending_entries)
+        pending_results.clear()
+        pending_entries.clear()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(extract_one, os.path.join(json_dir, f), resolve_folder)
+                for f in targets
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                processed += 1
+                if result.get("error"):
+                    failed += 1
+                    print(f"  오류: '{result['json']}' {result['error']}")
+                    pending_entries.append({"json": result["json"], "status": "failed", "error": result["error"]})
+                else:
+                    pending_results.append(result)
+                    pending_entries.append({"json": result["json"], "status": "done"})
+
+                if len(pending_entries) >= commit_size:
+                    flush()
+                    elapsed = time.time() - start_time
+                    print(f"[{processed}/{len(targets)}] {processed / elapsed * 60:.1f} 논문/분, 실패 {failed}건")
+            if pending_entries:
+                flush()
+    finally:
+        conn.close()
+
+    elapsed = time.time() - start_time
+    print("\n--- 일괄 추출 완료 ---")
+    print(f"처리 {processed}건 (성공 {processed - failed}건, 실패 {failed}건)")
+    print(f"총 소요 시간: {elapsed:.2f} 초, 처리 속도: {processed / elapsed * 60:.1f} 논문/분")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="레이아웃 JSON 폴더 일괄 서지정보 추출")
+    parser.add_argument("json_dir", help="레이아웃 파일(<sha256>.layout.zip 또는 <sha256>.json)이 있는 폴더")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite DB 파일 (기본: paper.db)")
+    parser.add_argument("--output", default=RESOLVE_FOLDER, help="추출 결과 JSON 저장 폴더 (기본: resolved)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="프로세스 수")
+    parser.add_argument("--commit-size", type=int, default=DEFAULT_COMMIT_SIZE, help="트랜잭션 1회당 논문 수")
+    parser.add_argument("--checkpoint", default=None, help="체크포인트 파일 경로")
+    parser.add_argument("--overwrite", action="store_true", help="이미 DB에 있는 논문도 다시 추출")
+    parser.add_argument("--user-id", default="AD00000", help="REG_ID/MOD_ID 로 기록할 ID")
+    args = parser.parse_args()
+
+    run(
+        args.json_dir,
+        db_file=args.db,
+        resolve_folder=args.output,
+        workers=args.workers,
+        commit_size=args.commit_size,
+        checkpoint_path=args.checkpoint,
+        overwrite=args.overwrite,
+        user_id=args.user_id,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# --- paper.db 연결 공급 ---
+# 스레드마다 연결 1개를 열어 두고 재사용합니다. (Streamlit 은 세션/재실행마다 스레드가 다름)
+# 사용하는 쪽은 기존처럼 conn = get_connection(DB_FILE) ... conn.close() 로 쓰면 되고,
+# close() 는 연결을 닫지 않고 스레드 풀로 돌려놓습니다. (커밋하지 않은 변경은 sqlite3 와 같이 취소)
+# 같은 스레드에서 이미 사용 중인 연결이 있으면(중첩 호출) 별도 연결을 열고 close() 때 실제로 닫습니다.
+DB_FILE = "paper.db"
+BUSY_TIMEOUT_MS = 30000  # 다른 연결이 쓰는 중이면 최대 30초 대기 ("database is locked" 방지)
+CACHE_SIZE_KB = 20000  # 연결당 페이지 캐시 약 20MB
+MMAP_SIZE = 256 * 1024 * 1024
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # 읽기와 쓰기가 서로 막지 않음 (DB 파일에 기록되는 설정)
+    "PRAGMA synchronous=NORMAL",  # WAL 에서는 NORMAL 로도 손상되지 않음 (전원 차단 시 마지막 커밋만 유실 가능)
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    f"PRAGMA cache_size=-{CACHE_SIZE_KB}",
+    f"PRAGMA mmap_size={MMAP_SIZE}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PooledConnection(sqlite3.Connection):
+    """close() 를 호출하면 스레드 풀로 돌아가는 연결."""
+
+    pooled = False
+    in_use = False
+
+    def close(self):
+        if not self.pooled:
+            super().close()
+            return
+        if self.in_transaction:
+            self.rollback()
+        self.row_factory = None
+        self.in_use = False
+
+    def close_connection(self):
+        """연결을 실제로 닫습니다."""
+        self.pooled = False
+        super().close()
+
+
+_local = threading.local()
+
+
+def _open(path):
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, factory=PooledConnection)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection(db_file=None, row_factory=None):
+    """
+    현재 스레드의 db_file 연결을 반환합니다. 사용 후 close() 로 돌려놓습니다.
+    row_factory 는 이번 사용에만 적용됩니다. (예: sqlite3.Row)
+    """
+    path = os.path.abspath(db_file or DB_FILE)
+    pool = getattr(_local, "pool", None)
+    if pool is None or getattr(_local, "pid", None) != os.getpid():
+        # fork 된 자식 프로세스는 부모의 연결을 쓰지 않음
+        pool = _local.pool = {}
+        _local.pid = os.getpid()
+
+    conn = pool.get(path)
+    if conn is not None and conn.in_use:
+        conn = _open(path)  # 중첩 사용: 별도 연결
+    elif conn is None:
+        conn = pool[path] = _open(path)
+        conn.pooled = True
+    conn.in_use = conn.pooled
+    conn.row_factory = row_factory
+    return conn
+
+
+@contextmanager
+def transaction(db_file=None, immediate=False, row_factory=None):
+    """
+    with transaction(DB_FILE) as conn: ... 블록을 하나의 트랜잭션으로 실행합니다.
+    정상 종료 시 커밋, 예외 발생 시 롤백합니다. immediate=True 이면 시작할 때 쓰기 잠금을 먼저 잡습니다.
+    """
+    conn = get_connection(db_file, row_factory)
+    try:
+        conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        yield conn
+        conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def close_all():
+    """현재 스레드의 풀 연결을 모두 닫습니다. (DB 파일 교체/삭제 전 등)"""
+    pool = getattr(_local, "pool", None) or {}
+    for conn in pool.values():
+        conn.close_connection()
+    pool.clear()
@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+import pandas as pd
+from db import get_connection
+
+# --- 추출 텔레메트리 (필드별 LLM 호출 지연 시간 / 토큰 / 결과) ---
+METRICS_DB_PATH = "paper.db"
+
+# 이 건수만큼 쌓이면 DB에 기록 (논문 1건 처리 후에는 flush 로 바로 기록)
+FLUSH_SIZE = 50
+
+# 모델별 토큰 단가 (USD / 1M tokens: 입력, 출력). 목록에 없는 모델(로컬 모델 등)은 0으로 계산
+MODEL_PRICES = {
+    "gpt-4o-2024-08-06": (2.50, 10.00),
+    "gpt-4o-2024-11-20": (2.50, 10.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+}
+
+# outcome 값
+OUTCOME_OK = "ok"
+OUTCOME_NO_TEXT = "no_text"
+OUTCOME_PARSE_ERROR = "parse_error"
+OUTCOME_BACKEND_ERROR = "backend_error"
+OUTCOME_ERROR = "error"
+
+
+def init_metrics_table(db_path=METRICS_DB_PATH):
+    conn = get_connection(db_path)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS "extraction_metrics" (
+                "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+                "created_at" REAL,
+                "model_name" TEXT,
+                "field_name" TEXT,
+                "latency_ms" REAL,
+                "prompt_tokens" INTEGER,
+                "completion_tokens" INTEGER,
+                "cache_hit" INTEGER,
+                "outcome" TEXT,
+                "error" TEXT
+            )
+        """
+        )
+        # 배치 호출은 필드마다 1행씩 기록하고, 함께 요청한 필드 수를 남김 (토큰은 필드 수로 나눈 값)
+        columns = [col[1] for col in conn.execute("PRAGMA table_info(extraction_metrics)").fetchall()]
+        if "batch_size" not in columns:
+            conn.execute('ALTER TABLE extraction_metrics ADD COLUMN "batch_size" INTEGER DEFAULT 1')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS "idx_extraction_metrics_created_at" ON "extraction_metrics" ("created_at")'
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class ExtractionMetrics:
+    """
+    LLM 호출 1건마다 모델, 필드, 지연 시간, 토큰 수, 캐시 적중 여부, 결과를 기록합니다.
+    여러 스레드에서 동시에 호출되므로 메모리에 모았다가 한 번에 기록합니다.
+    """
+
+    def __init__(self, db_path=METRICS_DB_PATH):
+        self.db_path = db_path
+        self._rows = []
+        self._lock = threading.Lock()
+        init_metrics_table(db_path)
+
+    def record(self, model_name, field_name, latency_ms, prompt_tokens=None, completion_tokens=None,
+               cache_hit=False, outcome=OUTCOME_OK, error=None, batch_size=1):
+        row = (time.time(), model_name, field_name, latency_ms, prompt_tokens, completion_tokens,
+               int(bool(cache_hit)), outcome, error, batch_size)
+        with self._lock:
+            self._rows.append(row)
+            should_flush = len(self._rows) >= FLUSH_SIZE
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return
+        conn = get_connection(self.db_path)
+        try:
+            conn.executemany(
+                """
+                INSERT INTO extraction_metrics
+                    (created_at, model_name, field_name, latency_ms, prompt_tokens, completion_tokens,
+                     cache_hit, outcome, error, batch_size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                rows,
+            )
+            conn.commit()
+        except Exception as e:
+            # 통계 기록 실패가 추출을 막지 않도록 로그만 남김
+            print(f"[⚠️ METRICS] write failed for {len(rows)} rows: {e}")
+        finally:
+            conn.close()
+
+
+def estimate_cost(model_name, prompt_tokens, completion_tokens):
+    input_price, output_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return ((prompt_tokens or 0) * input_price + (completion_tokens or 0) * output_price) / 1_000_000
+
+
+def load_metrics(db_path=METRICS_DB_PATH, days=None):
+    """기록된 호출 목록을 DataFrame 으로 반환합니다. days 를 주면 최근 N일만 조회합니다."""
+    init_metrics_table(db_path)
+    query = "SELECT * FROM extraction_metrics"
+    params = ()
+    if days:
+        query += " WHERE created_at >= ?"
+        params = (time.time() - days * 86400,)
+    conn = get_connection(db_path)
+    try:
+        return pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+def summarize_metrics(df, group_by=("model_name", "field_name")):
+    """
+    호출 목록을 group_by 단위로 집계합니다.
+    지연 시간(p50/p95)은 실제 LLM 호출(캐시 미적중)만으로 계산합니다.
+    calls 는 필드 단위 행 수, requests 는 배치 호출을 1건으로 환산한 LLM 요청 수입니다.
+    """
+    group_by = list(group_by)
+    if df.empty:
+        return pd.DataFrame(columns=group_by + [
+            "calls", "requests", "cache_hit_rate", "error_rate", "p50_ms", "p95_ms",
+            "prompt_tokens", "completion_tokens", "cost_usd",
+        ])
+
+    df = df.copy()
+    df["request_share"] = 1 / df["batch_size"].fillna(1).clip(lower=1) if "batch_size" in df else 1.0
+    df["prompt_tokens"] = df["prompt_tokens"].fillna(0)
+    df["completion_tokens"] = df["completion_tokens"].fillna(0)
+    df["cost_usd"] = [
+        estimate_cost(m, p, c) for m, p, c in zip(df["model_name"], df["prompt_tokens"], df["completion_tokens"])
+    ]
+    df["is_error"] = df["outcome"].isin([OUTCOME_PARSE_ERROR, OUTCOME_BACKEND_ERROR, OUTCOME_ERROR])
+
+    grouped = df.groupby(group_by)
+    summary = grouped.agg(
+        calls=("id", "count"),
+        requests=("request_share", "sum"),
+        cache_hit_rate=("cache_hit", "mean"),
+        error_rate=("is_error", "mean"),
+        prompt_tokens=("prompt_tokens", "sum"),
+        completion_tokens=("completion_tokens", "sum"),
+        cost_usd=("cost_usd", "sum"),
+    )
+    live = df[df["cache_hit"] == 0].groupby(group_by)["latency_ms"]
+    summary["p50_ms"] = live.quantile(0.5)
+    summary["p95_ms"] = live.quantile(0.95)
+
+    summary = summary.reset_index()
+    return summary[group_by + [
+        "calls", "requests", "cache_hit_rate", "error_rate", "p50_ms", "p95_ms",
+        "prompt_tokens", "completion_tokens", "cost_usd",
+    ]].sort_values(group_by)
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_extraction_metrics():
+    """프로세스 공용 기록기를 반환합니다. 비활성화 시 None."""
+    global _default_metrics
+    if os.getenv("EXTRACTION_METRICS_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = ExtractionMetrics(db_path=os.getenv("EXTRACTION_METRICS_PATH", METRICS_DB_PATH))
+        return _default_metrics
@@ -1,10 +1,18 @@
 import os
 import json
+import datetime
 import yaml
 import pandas as pd
 from dotenv import load_dotenv
-from LLM_MODEL import LocalApi, GPTApi
-import requests  # requests 라이브러리 임포트
+from LLM_MODEL import LocalApi, GPTApi, FailoverApi
+from llm_cache import get_llm_cache
+from extraction_metrics import get_extraction_metrics
+from bib_rules import extract_rule_fields, normalize_for_compare
+from layout_client import analyze_pdf, LayoutServiceError
+from layout_store import load_layout, layout_stem
+import threading
+import random
+from concurrent.futures import ThreadPoolExecutor
 
 
 # --- PDF 분석 서비스 호출 함수 ---
@@ -18,32 +26,14 @@ def get_pdf_json(pdf_path, service_url, request_timeout):
         request_timeout (int): 요청 타임아웃 (초).
 
     Returns:
-        dict or None: 서비스에서 반환된 JSON 데이터 (성공 시), 또는 None (실패 시).
+        (dict or None, str): 서비스에서 반환된 JSON 데이터와 오류 메시지 (성공 시 빈 문자열).
     """
-    error = ""
     try:
-        with open(pdf_path, "rb") as f:
-            files = {"file": (os.path.basename(pdf_path), f, "application/pdf")}
-            # st.info(f"PDF 분석 서비스 ({service_url})로 파일을 전송 중입니다. 잠시 기다려 주세요...")
-            response = requests.post(service_url, files=files, timeout=request_timeout)
-
-        response.raise_for_status()  # HTTP 오류가 발생하면 예외를 발생시킵니다.
-        return response.json(), error
-    except requests.exceptions.Timeout:
-        error = f"요청 시간 초과: PDF 분석 서비스가 {request_timeout}초 내에 응답하지 않았습니다."
-        return None, error
-    except requests.exceptions.ConnectionError:
-        error = "연결 오류: PDF 분석 서비스에 연결할 수 없습니다. 서비스 URL을 확인하거나 네트워크 상태를 확인해주세요."
-        return None, error
-    except requests.exceptions.RequestException as e:
-        error = f"PDF 분석 요청 중 오류 발생: {e}"
-        return None, error
-    except json.JSONDecodeError:
-        error = "서비스에서 유효한 JSON 응답을 받지 못했습니다."
-        return None, error
+        return analyze_pdf(pdf_path, service_url, request_timeout), ""
+    except LayoutServiceError as e:
+        return None, str(e)
     except Exception as e:
-        error = f"예상치 못한 오류 발생: {e}"
-        return None, error
+        return None, f"예상치 못한 오류 발생: {e}"
 
 
 DEBUG = False
@@ -67,6 +57,13 @@ TARGET_PAGES = None
 
 MAX_PAGE_NUMBER = 2  # 없으면, 1~2 페이지 자동 선택
 
+# 모든 필드를 한 번의 LLM 호출로 추출 (누락/파싱 실패 필드만 개별 호출로 재시도)
+BATCH_MODE = True
+
+# DOI/연도/권/호/페이지/저널명은 규칙(패턴)으로 먼저 추출하고 나머지만 LLM에 요청
+RULE_FAST_PATH = True
+RULE_AUDIT_PATH = "rule_audit.jsonl"  # 규칙 값과 LLM 값 비교 기록
+
 # [STEP 1] API KEY loading
 load_dotenv(override=True)  # modify
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -74,6 +71,19 @@ if not OPENAI_API_KEY:
     raise ValueError("❌🔑❌ 'OPENAI_API_KEY'가 .env 파일에 없습니다.")
 # if DEBUG: print("✅ API KEY LOADED :", bool(OPENAI_API_KEY))
 
+# 개별 필드 호출 동시 실행 수 (1이면 순차 실행)
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# 규칙으로 채운 필드도 LLM에 요청하여 일치 여부를 기록할 비율 (0~1)
+RULE_AUDIT_RATE = float(os.getenv("RULE_AUDIT_RATE", "0.1"))
+
+# LLM 호출 1회 제한 시간(초)과 재시도 가능한 오류 시 추가 시도 횟수
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+# 로컬 모델 장애 시 넘겨받을 예비 모델 (예: gpt-4o-2024-08-06). 비어 있으면 사용 안 함
+LLM_FAILOVER_MODEL = os.getenv("LLM_FAILOVER_MODEL")
+
 
 # [STEP 2] ACTIVE_PROMPT loading
 def load_prompts(yaml_path):
@@ -139,10 +149,145 @@ def extract_text_from_json_blocks(
     return combined_text, all_types
 
 
+# [STEP 3-1] 필드별 입력 텍스트 구성
+# 프롬프트 YAML 필드에 선언할 수 있는 블록 필터 키
+#   block_types: 허용할 블록 type 목록 (예: ["Page header", "Page footer"])
+#   pages: 사용할 페이지 번호 목록 (예: [1])
+#   max_page_number: 사용할 최대 페이지 번호 (pages 가 없을 때)
+#   max_chars: 입력 텍스트 최대 글자 수
+FIELD_FILTER_KEYS = ("block_types", "pages", "max_page_number", "max_chars")
+
+
+def build_field_inputs(json_data, prompts, default_text):
+    """
+    레이아웃 JSON을 한 번만 훑어서 필드별 블록 필터에 맞는 최소 입력 텍스트를 만듭니다.
+    필터가 없는 필드나, 필터 결과가 비어 있는 필드는 default_text 를 사용합니다.
+    """
+    blocks = [
+        (block.get("page_number"), block.get("type", "Unknown"), block.get("text", ""))
+        for block in json_data
+        if isinstance(block.get("page_number"), int) and isinstance(block.get("text", ""), str)
+    ]
+
+    field_inputs = {}
+    for field, field_info in prompts.items():
+        if not any(key in field_info for key in FIELD_FILTER_KEYS):
+            field_inputs[field] = default_text
+            continue
+
+        block_types = field_info.get("block_types")
+        pages = field_info.get("pages")
+        max_page_number = field_info.get("max_page_number", MAX_PAGE_NUMBER)
+        max_chars = field_info.get("max_chars")
+
+        texts = []
+        total_chars = 0
+        for page, block_type, text in blocks:
+            if pages is not None:
+                if page not in pages:
+                    continue
+            elif max_page_number is not None and page > max_page_number:
+                continue
+            if block_types is not None and block_type not in block_types:
+                continue
+
+            if max_chars is not None and total_chars + len(text) > max_chars:
+                texts.append(text[: max(max_chars - total_chars, 0)])
+                break
+            texts.append(text)
+            total_chars += len(text) + 1
+
+        field_text = "\n".join(texts)
+        field_inputs[field] = field_text if field_text.strip() else default_text
+
+    return field_inputs
+
+
+# [STEP 3-2] 필드별 LLM 호출 동시 실행
+def _run_concurrently(tasks, max_workers, on_error):
+    """
+    (key, func) 목록을 스레드 풀에서 실행하여 입력 순서대로 {key: 결과} 를 반환합니다.
+    예외가 발생한 작업은 on_error(key, e) 결과로 대체되며 다른 작업은 계속 진행됩니다.
+    """
+
+    def _call(key, func):
+        try:
+            return func()
+        except Exception as e:
+            return on_error(key, e)
+
+    if max_workers is None or max_workers <= 1 or len(tasks) <= 1:
+        return {key: _call(key, func) for key, func in tasks}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        futures = [(key, executor.submit(_call, key, func)) for key, func in tasks]
+        return {key: future.result() for key, future in futures}
+
+
+def send_requests_concurrently(llm, field_requests, max_workers=MAX_CONCURRENCY):
+    """
+    (field, instruction, input_data) 목록을 스레드 풀에서 동시에 요청합니다.
+    결과는 입력 순서대로 {field: response} 로 반환되며,
+    한 필드의 실패가 다른 필드를 취소하지 않습니다.
+    """
+
+    def _on_error(field, e):
+        print(f"[❌ ERROR] in concurrent LLM call for field '{field}': {e}")
+        return {"parsed": "ERROR", "raw": str(e)}
+
+    tasks = [
+        (field, lambda f=field, i=inst, d=data: llm.send_request(f, i, d))
+        for field, inst, data in field_requests
+    ]
+    return _run_concurrently(tasks, max_workers, _on_error)
+
+
+def send_batch_requests_concurrently(llm, batch_requests, max_workers=MAX_CONCURRENCY):
+    """
+    ({field: instruction}, input_data) 목록을 동시에 배치 요청하고,
+    필드별 결과를 하나의 {field: parsed} 로 합쳐 반환합니다.
+    """
+
+    def _on_error(idx, e):
+        print(f"[❌ ERROR] in concurrent batch LLM call #{idx}: {e}")
+        return {"parsed": {}, "raw": str(e)}
+
+    tasks = [
+        (idx, lambda fp=field_prompts, d=data: llm.send_batch_request(fp, d))
+        for idx, (field_prompts, data) in enumerate(batch_requests)
+    ]
+    merged = {}
+    for res in _run_concurrently(tasks, max_workers, _on_error).values():
+        merged.update(res["parsed"])
+    return merged
+
+
+def required_pages(prompts):
+    """
+    추출에 필요한 페이지 번호 집합을 반환합니다. 페이지 제한이 없는 설정이 하나라도 있으면 None(전체).
+    (TARGET_PAGES/MAX_PAGE_NUMBER, 규칙 추출, 필드별 pages/max_page_number 필터의 합집합)
+    """
+    limits = [TARGET_PAGES if TARGET_PAGES is not None else MAX_PAGE_NUMBER, MAX_PAGE_NUMBER]
+    for field_info in prompts.values():
+        if not any(key in field_info for key in FIELD_FILTER_KEYS):
+            continue
+        if field_info.get("pages") is not None:
+            limits.append(field_info["pages"])
+        else:
+            limits.append(field_info.get("max_page_number", MAX_PAGE_NUMBER))
+
+    pages = set()
+    for limit in limits:
+        if limit is None:
+            return None
+        pages.update(limit if isinstance(limit, (list, tuple, set)) else range(1, int(limit) + 1))
+    return pages
+
+
 # [STEP 4] PROMPT의 각 field 읽고, description에 따라 작업 수행 정의
 def process_file(file_path, prompts, llm):
-    with open(file_path, "r", encoding="utf-8") as f:
-        json_data = json.load(f)
+    # 압축 레이아웃 파일이면 필요한 페이지만 읽음
+    json_data = load_layout(file_path, pages=required_pages(prompts))
 
     combined_text, all_types = extract_text_from_json_blocks(
         json_data,
@@ -159,11 +304,45 @@ def process_file(file_path, prompts, llm):
             result[f"RAW_{field}"] = "NO_TEXT"
         return result
 
-    for field, field_info in prompts.items():
-        instruction = field_info.get("description", "")
-        # if DEBUG: print(f"[INFO] Extracting '{field}'...")
-
-        res = llm.send_request(field, instruction, combined_text)
+    # 필드별 블록 필터 적용 (필터 없는 필드는 combined_text)
+    field_inputs = build_field_inputs(json_data, prompts, combined_text)
+
+    # [RULE] 패턴으로 확실하게 찾은 필드는 LLM 요청에서 제외 (일부는 감사용으로 LLM도 요청)
+    rule_values = {}
+    if RULE_FAST_PATH:
+        rule_values = {
+            field: value
+            for field, value in extract_rule_fields(json_data, max_page_number=MAX_PAGE_NUMBER).items()
+            if field in prompts
+        }
+    audit_rules = bool(rule_values) and random.random() < RULE_AUDIT_RATE
+    llm_fields = [
+        field for field in prompts.keys()
+        if field not in rule_values or audit_rules
+    ]
+    pending_fields = list(llm_fields)
+
+    # [BATCH] 입력 텍스트가 같은 필드끼리 묶어서 한 번에 요청
+    if BATCH_MODE and llm_fields:
+        groups = {}
+        for field in llm_fields:
+            groups.setdefault(field_inputs[field], {})[field] = prompts[field].get("description", "")
+        batch_requests = [(field_prompts, text) for text, field_prompts in groups.items()]
+
+        batch_parsed = send_batch_requests_concurrently(llm, batch_requests, MAX_CONCURRENCY)
+        for field, parsed in batch_parsed.items():
+            if parsed is None or parsed == "ERROR":
+                continue  # 파싱 실패 필드는 개별 호출로 재시도
+            result[field] = parsed
+        pending_fields = [field for field in llm_fields if field not in result]
+        if DEBUG and pending_fields:
+            print(f"[INFO] Batch fallback fields: {pending_fields}")
+
+    field_requests = [
+        (field, prompts[field].get("description", ""), field_inputs[field])
+        for field in pending_fields
+    ]
+    for field, res in send_requests_concurrently(llm, field_requests, MAX_CONCURRENCY).items():
         parsed = res["parsed"]
         # raw = res["raw"]
         # status = "success" if parsed != "ERROR" else "error"
@@ -171,7 +350,37 @@ def process_file(file_path, prompts, llm):
         result[field] = parsed
         # result[f"RAW_{field}"] = raw
 
-    return result
+    if audit_rules:
+        record_rule_audit(file_path, rule_values, result)
+        # 감사 대상이면 LLM 값을 우선 (LLM 값이 없거나 실패한 필드만 규칙 값 사용)
+        rule_values = {
+            field: value for field, value in rule_values.items()
+            if result.get(field) in (None, "", "ERROR")
+        }
+    result.update(rule_values)
+
+    # 프롬프트 YAML 순서대로 정렬
+    return {field: result[field] for field in prompts.keys()}
+
+
+def record_rule_audit(file_path, rule_values, llm_values):
+    """규칙 추출 값과 LLM 추출 값의 일치 여부를 RULE_AUDIT_PATH 에 기록합니다."""
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    try:
+        with open(RULE_AUDIT_PATH, "a", encoding="utf-8") as f:
+            for field, rule_value in rule_values.items():
+                llm_value = llm_values.get(field)
+                entry = {
+                    "time": timestamp,
+                    "file": os.path.basename(file_path),
+                    "field": field,
+                    "rule": rule_value,
+                    "llm": llm_value,
+                    "agree": normalize_for_compare(field, rule_value) == normalize_for_compare(field, llm_value),
+                }
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"[⚠️ RULE AUDIT] write failed for {file_path}: {e}")
 
 
 # def parsing_json(json_data):
@@ -306,32 +515,142 @@ def parsing_json(json_data):
     return A_DATA, cdf
 
 
+# [STEP 6-1] 파일 이름 저장
+def generate_output_filename(filename, suffix, model_name):
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    safe_model_name = model_name.replace(":", "_").replace(".", "_")
+    base = layout_stem(filename).replace(" ", "_")[:200]
+    return f"{timestamp}_{safe_model_name}_{base}_{suffix}"
+
+
+def find_output_file(filename, model_name, OUTPUT_FOLDER, since=None):
+    """generate_output_filename 으로 저장된 filename 의 가장 최근 추출 결과 경로. (since 이후 저장분만, 없으면 None)"""
+    safe_model_name = model_name.replace(":", "_").replace(".", "_")
+    base = layout_stem(filename).replace(" ", "_")[:200]
+    if not os.path.isdir(OUTPUT_FOLDER):
+        return None
+    suffix = f"_{safe_model_name}_{base}_output.json"
+    for name in sorted(os.listdir(OUTPUT_FOLDER), reverse=True):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(OUTPUT_FOLDER, name)
+        if since is None or os.path.getmtime(path) >= since:
+            return path
+        break
+    return None
+
+
+# [STEP 6-2] JSON 파일 저장
+def save_output_file(result, filename, model_name, OUTPUT_FOLDER):
+    try:
+        output_filename = generate_output_filename(filename, "output.json", model_name)
+        output_path = os.path.join(OUTPUT_FOLDER, output_filename)
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        return output_path, None
+
+    except Exception as e:
+        print(f"[❌❌] JSON_FAILED : {filename}\nError : {e}")
+        return None, filename
+
+
 def count_no_text(json_data):
     cnt_total = len(json_data)
     no_cnt = sum(1 for v in json_data.values() if v == "NO_TEXT")
     return cnt_total, no_cnt
 
 
-def get_paper_df(filename):
-    prompts = load_prompts(PROMPT_PATH)
+def _create_gpt_api(model_name):
+    return GPTApi(model_name=model_name, api_key=OPENAI_API_KEY, cache=get_llm_cache(),
+                  timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES, metrics=get_extraction_metrics())
 
-    # ✅ 모델 선택
-    if "gpt" in MODEL_NAME:
-        print("gpt")
-        llm = GPTApi(model_name=MODEL_NAME, api_key=OPENAI_API_KEY)
-    else:
-        print("local")
-        llm = LocalApi(model_name=MODEL_NAME, base_url=LLAMA_URL)
 
-    # if DEBUG: print(f"\n[📄] Processing {filename} ...")
+class PaperExtractor:
+    """
+    프롬프트 YAML과 LLM 클라이언트를 한 번만 준비해 두고 재사용하는 추출기.
+    YAML 파일의 수정 시각(mtime)이 바뀐 경우에만 프롬프트를 다시 읽고 체인을 재생성합니다.
+    여러 Streamlit 세션에서 공유할 수 있도록 스레드 안전하게 동작합니다.
+    """
 
-    json_data = process_file(filename, prompts, llm)
-    # print("=====json_data:\n", json_data)
+    def __init__(self, prompt_path=PROMPT_PATH, model_name=MODEL_NAME):
+        self.prompt_path = prompt_path
+        self.model_name = model_name
+        self._clients = {}  # {model_name: LocalApi | GPTApi | FailoverApi}
+        self._prompts = None
+        self._prompts_mtime = None
+        self._lock = threading.Lock()
+
+    def get_llm(self, model_name=None):
+        model_name = model_name or self.model_name
+        with self._lock:
+            if model_name not in self._clients:
+                # ✅ 모델 선택
+                if "gpt" in model_name:
+                    self._clients[model_name] = _create_gpt_api(model_name)
+                else:
+                    client = LocalApi(model_name=model_name, base_url=LLAMA_URL, cache=get_llm_cache(),
+                                      timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES,
+                                      metrics=get_extraction_metrics())
+                    if LLM_FAILOVER_MODEL:
+                        client = FailoverApi(client, _create_gpt_api(LLM_FAILOVER_MODEL))
+                    self._clients[model_name] = client
+                if self._prompts is not None:
+                    self._clients[model_name].prepare(list(self._prompts.keys()))
+            return self._clients[model_name]
+
+    def get_prompts(self):
+        mtime = os.path.getmtime(self.prompt_path)
+        with self._lock:
+            if self._prompts is None or mtime != self._prompts_mtime:
+                self._prompts = load_prompts(self.prompt_path)
+                self._prompts_mtime = mtime
+                # 프롬프트가 바뀌면 필드별 체인을 다시 준비
+                for client in self._clients.values():
+                    client.prepare(list(self._prompts.keys()))
+            return self._prompts
+
+    def extract(self, filename):
+        llm = self.get_llm()
+        prompts = self.get_prompts()
+
+        # if DEBUG: print(f"\n[📄] Processing {filename} ...")
+
+        try:
+            json_data = process_file(filename, prompts, llm)
+        finally:
+            metrics = get_extraction_metrics()
+            if metrics is not None:
+                metrics.flush()
+        # print("=====json_data:\n", json_data)
+        return paper_df_from_json(json_data, self.model_name)
+
+
+def paper_df_from_json(json_data, model_name):
+    """추출 결과(json_data)를 get_paper_df 와 같은 (json_data, a_info, c_info, NO_TEXT 수, 모델명)으로 만듭니다."""
     cnt_total, no_cnt = count_no_text(json_data)
     print(f"전체 항목 수: {cnt_total}, 'NO_TEXT'인 항목 수: {no_cnt}")
     if no_cnt > 5:
-        return None, None, no_cnt
+        return json_data, None, None, no_cnt, model_name
     a_result, c_result = parsing_json(json_data)
     # print(c_result)
     # print(a_result)
-    return json_data, a_result, c_result, no_cnt, MODEL_NAME
+    return json_data, a_result, c_result, no_cnt, model_name
+
+
+_default_extractor = None
+_default_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    """프로세스 공용 PaperExtractor 인스턴스를 반환합니다."""
+    global _default_extractor
+    with _default_extractor_lock:
+        if _default_extractor is None:
+            _default_extractor = PaperExtractor()
+        return _default_extractor
+
+
+def get_paper_df(filename, extractor=None):
+    if extractor is None:
+        extractor = get_extractor()
+    return extractor.extract(filename)
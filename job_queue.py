@@ -0,0 +1,388 @@
+import json
+import time
+import random
+import sqlite3
+from contextlib import contextmanager
+from db import get_connection
+from layout_store import layout_stem
+
+# --- 백그라운드 작업 큐 (PDF 레이아웃 분석 / 서지정보 추출) ---
+# Streamlit 화면은 작업을 등록(enqueue)하고 상태만 조회하며,
+# 실제 처리는 worker.py 프로세스가 담당합니다.
+JOB_DB_FILE = "paper.db"
+
+# 작업 종류
+KIND_LAYOUT = "layout"    # payload: {"pdf_path"} -> result: {"json_path"}
+KIND_EXTRACT = "extract"  # payload: {"json_path"} -> result: 추출 결과
+KIND_ANALYZE = "analyze"  # payload: {"pdf_path"} -> layout + extract
+KIND_VISUALIZE = "visualize"  # payload: {"pdf_path"} -> result: {"vis_path"} (관리자 요청 시에만)
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+DEFAULT_MAX_ATTEMPTS = 3
+BACKOFF_BASE_SEC = 10  # 재시도 대기: 10초, 20초, 40초 ... (+ 지터)
+BACKOFF_MAX_SEC = 600
+LEASE_SEC = 1800  # 실행 중 작업의 점유 시간. 넘으면 워커 비정상 종료로 보고 다시 대기열로
+LEASE_RENEW_SEC = 300  # 실행 중인 워커가 점유 시간을 연장하는 간격 (worker.worker_loop)
+MAX_DEFERRALS = 20  # 서비스 혼잡으로 미룬 횟수 한도 (넘으면 일반 실패로 처리)
+
+# 같은 PDF(파일명 = SHA-256)의 같은 단계 작업이 대기/실행 중이면 새로 등록하지 않고 그 작업에 합류
+# (공동 저자가 같은 논문을 비슷한 시각에 올리는 경우 레이아웃/LLM 호출 중복 방지)
+STAGE_LOCK_WAIT_SEC = 600  # 다른 워커가 같은 PDF를 처리 중일 때 기다리는 최대 시간
+STAGE_LOCK_POLL_SEC = 1
+
+
+class StageLockTimeout(Exception):
+    """다른 워커의 같은 단계 처리가 대기 시간 안에 끝나지 않음."""
+
+
+def _connect(db_file=None):
+    return get_connection(db_file or JOB_DB_FILE, row_factory=sqlite3.Row)
+
+
+def init_job_table(db_file=None):
+    conn = _connect(db_file)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS "jobs" (
+                "id" INTEGER PRIMARY KEY AUTOINCREMENT,
+                "kind" TEXT,
+                "payload" TEXT,
+                "status" TEXT,
+                "attempts" INTEGER DEFAULT 0,
+                "max_attempts" INTEGER,
+                "run_after" REAL,
+                "locked_by" TEXT,
+                "locked_until" REAL,
+                "result" TEXT,
+                "error" TEXT,
+                "created_at" REAL,
+                "updated_at" REAL
+            )
+        """
+        )
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS "idx_jobs_status_run_after" ON "jobs" ("status", "run_after")'
+        )
+        columns = [col[1] for col in conn.execute("PRAGMA table_info(jobs)").fetchall()]
+        if "deferrals" not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN "deferrals" INTEGER DEFAULT 0')
+        if "dedup_key" not in columns:
+            conn.execute('ALTER TABLE jobs ADD COLUMN "dedup_key" TEXT')
+        # 대기/실행 중인 작업은 dedup_key 당 1건
+        conn.execute(
+            f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS "idx_jobs_dedup_active" ON "jobs" ("dedup_key")
+            WHERE dedup_key IS NOT NULL AND status IN ('{STATUS_QUEUED}', '{STATUS_RUNNING}')
+        """
+        )
+        # 여러 워커가 같은 PDF의 같은 단계를 동시에 처리하지 않도록 하는 잠금 (worker.run_layout)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS "stage_locks" (
+                "key" TEXT PRIMARY KEY,
+                "holder" TEXT,
+                "locked_until" REAL
+            )
+        """
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _row_to_job(row):
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def make_dedup_key(kind, payload):
+    """작업 종류와 PDF 해시(파일명)로 중복 판단 키를 만듭니다. 판단할 수 없으면 None."""
+    path = payload.get("pdf_path") or payload.get("json_path")
+    if not path:
+        return None
+    key = f"{kind}:{layout_stem(path)}"
+    return f"{key}:force" if payload.get("force") else key
+
+
+def enqueue_job(kind, payload, max_attempts=DEFAULT_MAX_ATTEMPTS, dedup=True, db_file=None):
+    """
+    작업을 등록하고 job id 를 반환합니다.
+    dedup=True 이면 같은 PDF/단계의 작업이 대기/실행 중일 때 새로 등록하지 않고 그 작업의 id 를 반환합니다.
+    """
+    now = time.time()
+    dedup_key = make_dedup_key(kind, payload) if dedup else None
+    conn = _connect(db_file)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if dedup_key:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE dedup_key = ? AND status IN (?, ?)",
+                (dedup_key, STATUS_QUEUED, STATUS_RUNNING),
+            ).fetchone()
+            if row is not None:
+                conn.rollback()
+                return row["id"]
+        cur = conn.execute(
+            """
+            INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_after, created_at, updated_at, dedup_key)
+            VALUES (?, ?, ?, 0, ?, ?, ?, ?, ?)
+        """,
+            (kind, json.dumps(payload, ensure_ascii=False), STATUS_QUEUED, max_attempts, now, now, now, dedup_key),
+        )
+        conn.commit()
+        return cur.lastrowid
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_job(job_id, db_file=None):
+    conn = _connect(db_file)
+    try:
+        return _row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+    finally:
+        conn.close()
+
+
+def claim_job(worker_id, kinds=None, lease_sec=LEASE_SEC, db_file=None):
+    """
+    실행 가능한 작업 1건을 점유하여 반환합니다. 없으면 None.
+    점유 시간이 지난 running 작업(워커 비정상 종료)도 다시 가져옵니다.
+    """
+    now = time.time()
+    conn = _connect(db_file)
+    try:
+        # 다른 워커와 동시에 같은 작업을 가져가지 않도록 쓰기 잠금을 먼저 획득
+        conn.execute("BEGIN IMMEDIATE")
+        # 재시도 횟수를 모두 쓴 채 점유 시간이 지난 작업은 실패 처리
+        conn.execute(
+            """
+            UPDATE jobs SET status = ?, error = '작업 시간 초과 (워커 응답 없음)',
+                locked_by = NULL, locked_until = NULL, updated_at = ?
+            WHERE status = ? AND locked_until < ? AND attempts >= max_attempts
+        """,
+            (STATUS_FAILED, now, STATUS_RUNNING, now),
+        )
+        query = """
+            SELECT * FROM jobs
+            WHERE ((status = ? AND run_after <= ?) OR (status = ? AND locked_until < ?))
+        """
+        params = [STATUS_QUEUED, now, STATUS_RUNNING, now]
+        if kinds:
+            query += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params += list(kinds)
+        query += " ORDER BY run_after, id LIMIT 1"
+
+        row = conn.execute(query, params).fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+
+        conn.execute(
+            """
+            UPDATE jobs SET status = ?, attempts = attempts + 1, locked_by = ?, locked_until = ?, updated_at = ?
+            WHERE id = ?
+        """,
+            (STATUS_RUNNING, worker_id, now + lease_sec, now, row["id"]),
+        )
+        conn.commit()
+        return get_job(row["id"], db_file)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def complete_job(job_id, result, worker_id, db_file=None):
+    """
+    작업 완료를 기록합니다. 점유 시간이 지나 다른 워커가 다시 가져간 작업이면 기록하지 않고 False 를 반환합니다.
+    """
+    conn = _connect(db_file)
+    try:
+        cur = conn.execute(
+            """
+            UPDATE jobs SET status = ?, result = ?, error = NULL, locked_by = NULL, locked_until = NULL, updated_at = ?
+            WHERE id = ? AND status = ? AND locked_by = ?
+        """,
+            (STATUS_DONE, json.dumps(result, ensure_ascii=False), time.time(), job_id, STATUS_RUNNING, worker_id),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def job_holder(job_id):
+    """작업이 단계 잠금(stage_lock)과 레이아웃 슬롯을 잡을 때 쓰는 holder 이름."""
+    return f"job:{job_id}"
+
+
+def renew_lease(job_id, worker_id, lease_sec=LEASE_SEC, db_file=None):
+    """
+    실행 중인 작업과 그 작업이 가진 단계 잠금의 점유 시간을 지금부터 lease_sec 로 연장합니다.
+    worker_id 가 점유 중인 작업이 아니면(점유 시간 초과 후 다른 워커가 가져감) 연장하지 않고 False 를 반환합니다.
+    """
+    locked_until = time.time() + lease_sec
+    conn = _connect(db_file)
+    try:
+        cur = conn.execute(
+            "UPDATE jobs SET locked_until = ? WHERE id = ? AND status = ? AND locked_by = ?",
+            (locked_until, job_id, STATUS_RUNNING, worker_id),
+        )
+        if cur.rowcount == 1:
+            conn.execute(
+                "UPDATE stage_locks SET locked_until = ? WHERE holder = ?", (locked_until, job_holder(job_id))
+            )
+        conn.commit()
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def fail_job(job_id, error, worker_id, db_file=None):
+    """
+    작업 실패를 기록합니다. 재시도 횟수가 남아 있으면 지수 백오프 후 다시 대기열에 넣고,
+    모두 소진하면 failed 로 종료합니다. 최종 상태를 반환합니다.
+    worker_id 가 점유 중인 작업이 아니면(점유 시간 초과 후 다른 워커가 가져감) 기록하지 않고 None 을 반환합니다.
+    """
+    now = time.time()
+    conn = _connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND locked_by = ?",
+            (job_id, STATUS_RUNNING, worker_id),
+        ).fetchone()
+        if row is None:
+            return None
+        if row["attempts"] < row["max_attempts"]:
+            delay = min(BACKOFF_BASE_SEC * (2 ** (row["attempts"] - 1)), BACKOFF_MAX_SEC)
+            delay *= random.uniform(0.8, 1.2)
+            status, run_after = STATUS_QUEUED, now + delay
+        else:
+            status, run_after = STATUS_FAILED, None
+        cur = conn.execute(
+            """
+            UPDATE jobs SET status = ?, run_after = COALESCE(?, run_after), error = ?,
+                locked_by = NULL, locked_until = NULL, updated_at = ?
+            WHERE id = ? AND status = ? AND locked_by = ?
+        """,
+            (status, run_after, str(error), now, job_id, STATUS_RUNNING, worker_id),
+        )
+        conn.commit()
+        return status if cur.rowcount == 1 else None
+    finally:
+        conn.close()
+
+
+def defer_job(job_id, delay_sec, reason, worker_id, db_file=None):
+    """
+    서비스 혼잡(대기 시간 초과, 요청 거절)으로 처리하지 못한 작업을 재시도 횟수 차감 없이 다시 대기열에 넣습니다.
+    미룬 횟수가 MAX_DEFERRALS 에 도달하면 fail_job 과 같이 처리합니다. 최종 상태를 반환합니다.
+    worker_id 가 점유 중인 작업이 아니면 기록하지 않고 None 을 반환합니다.
+    """
+    now = time.time()
+    conn = _connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT deferrals FROM jobs WHERE id = ? AND status = ? AND locked_by = ?",
+            (job_id, STATUS_RUNNING, worker_id),
+        ).fetchone()
+        if row is None:
+            return None
+        exhausted = (row["deferrals"] or 0) >= MAX_DEFERRALS
+        if not exhausted:
+            cur = conn.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), deferrals = IFNULL(deferrals, 0) + 1,
+                    run_after = ?, error = ?, locked_by = NULL, locked_until = NULL, updated_at = ?
+                WHERE id = ? AND status = ? AND locked_by = ?
+            """,
+            (STATUS_QUEUED, now + delay_sec * random.uniform(0.8, 1.2), str(reason), now,
+             job_id, STATUS_RUNNING, worker_id),
+            )
+            conn.commit()
+            return STATUS_QUEUED if cur.rowcount == 1 else None
+    finally:
+        conn.close()
+    return fail_job(job_id, reason, worker_id, db_file)
+
+
+def get_queue_position(job_id, db_file=None):
+    """대기 중인 작업 앞에 있는 대기 작업 수. 대기 중이 아니면 None."""
+    conn = _connect(db_file)
+    try:
+        row = conn.execute("SELECT status, run_after FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] != STATUS_QUEUED:
+            return None
+        # claim_job 과 같은 순서 (run_after, id)
+        return conn.execute(
+            """
+            SELECT COUNT(*) FROM jobs
+            WHERE status = ? AND (run_after < ? OR (run_after = ? AND id < ?))
+        """,
+            (STATUS_QUEUED, row["run_after"], row["run_after"], job_id),
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _try_stage_lock(key, holder, lease_sec, db_file=None):
+    now = time.time()
+    conn = _connect(db_file)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        # 점유 시간이 지난 잠금(워커 비정상 종료)은 가져옴
+        conn.execute("DELETE FROM stage_locks WHERE key = ? AND locked_until < ?", (key, now))
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO stage_locks (key, holder, locked_until) VALUES (?, ?, ?)",
+            (key, holder, now + lease_sec),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _release_stage_lock(key, holder, db_file=None):
+    conn = _connect(db_file)
+    try:
+        conn.execute("DELETE FROM stage_locks WHERE key = ? AND holder = ?", (key, holder))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@contextmanager
+def stage_lock(key, holder, wait_timeout=STAGE_LOCK_WAIT_SEC, lease_sec=LEASE_SEC, db_file=None):
+    """
+    워커 프로세스 간 key(예: "layout:<PDF 해시>") 단위 잠금.
+    다른 워커가 잠금을 가지고 있으면 풀릴 때까지 기다립니다. 기다렸으면 True 를 넘겨주므로
+    호출하는 쪽에서 그 사이 저장된 결과(캐시)를 먼저 확인합니다.
+    wait_timeout 안에 잠금을 얻지 못하면 StageLockTimeout.
+    """
+    deadline = time.time() + wait_timeout
+    waited = False
+    while not _try_stage_lock(key, holder, lease_sec, db_file):
+        if time.time() >= deadline:
+            raise StageLockTimeout(f"같은 PDF를 처리 중인 다른 작업이 {wait_timeout}초 안에 끝나지 않았습니다: {key}")
+        waited = True
+        time.sleep(STAGE_LOCK_POLL_SEC)
+    try:
+        yield waited
+    finally:
+        _release_stage_lock(key, holder, db_file)
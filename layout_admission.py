@@ -0,0 +1,251 @@
+import os
+import math
+import time
+import threading
+from contextlib import contextmanager
+from db import get_connection, close_all
+
+# --- 레이아웃 서비스 동시 요청 제한 (프로세스 간 공유, 선착순 대기열) ---
+# 모든 워커 프로세스가 paper.db 의 layout_slots 테이블로 요청 순서와 동시 실행 수를 조정합니다.
+# 대기 순번과 예상 대기 시간은 화면(wait_for_job)에서 조회합니다.
+ADMISSION_DB_FILE = "paper.db"
+DEFAULT_MAX_CONCURRENCY = 2  # 레이아웃 서비스에 동시에 보낼 요청 수 (.env 의 LAYOUT_MAX_CONCURRENCY)
+WAIT_TIMEOUT_SEC = 300  # 이 시간 안에 차례가 오지 않으면 AdmissionTimeout (작업은 큐로 돌아감)
+SLOT_LEASE_SEC = 120  # 요청 중인 슬롯의 heartbeat 가 이 시간 동안 갱신되지 않으면(프로세스가 죽은 경우) 슬롯 회수
+ACTIVE_HEARTBEAT_SEC = 30  # 요청 중에는 이 간격으로 heartbeat 갱신 (요청이 길어져도 회수되지 않도록)
+WAITER_HEARTBEAT_SEC = 30  # 대기자가 이 시간 동안 갱신하지 않으면 대기열에서 제거
+POLL_INTERVAL = 0.5
+DEFAULT_DURATION_SEC = 30  # 처리 이력이 없을 때 예상 대기 시간 계산용 1건 처리 시간
+DURATION_SAMPLE_SIZE = 20  # 최근 N건 평균 처리 시간으로 예상 대기 시간 계산
+
+STATUS_WAITING = "waiting"
+STATUS_ACTIVE = "active"
+STATUS_DONE = "done"
+
+
+class AdmissionTimeout(Exception):
+    """대기 시간 안에 레이아웃 서비스 요청 차례가 오지 않음."""
+
+
+def get_max_concurrency():
+    return int(os.getenv("LAYOUT_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+
+
+def _connect(db_file=None):
+    return get_connection(db_file or ADMISSION_DB_FILE)
+
+
+def init_admission_table(db_file=None):
+    conn = _connect(db_file)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS "layout_slots" (
+                "ticket" INTEGER PRIMARY KEY AUTOINCREMENT,
+                "holder" TEXT,
+                "status" TEXT,
+                "enqueued_at" REAL,
+                "heartbeat" REAL,
+                "started_at" REAL,
+                "finished_at" REAL
+            )
+        """
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS "idx_layout_slots_status" ON "layout_slots" ("status", "ticket")')
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _cleanup(conn, now):
+    # 죽은 대기자/요청자 정리, 오래된 처리 이력 삭제
+    conn.execute(
+        "DELETE FROM layout_slots WHERE status = ? AND heartbeat < ?",
+        (STATUS_WAITING, now - WAITER_HEARTBEAT_SEC),
+    )
+    conn.execute(
+        "DELETE FROM layout_slots WHERE status = ? AND COALESCE(heartbeat, started_at) < ?",
+        (STATUS_ACTIVE, now - SLOT_LEASE_SEC),
+    )
+    conn.execute(
+        "DELETE FROM layout_slots WHERE status = ? AND finished_at < ?",
+        (STATUS_DONE, now - 86400),
+    )
+
+
+def _queue_state(conn, ticket, now):
+    # (처리 중 슬롯 수, 앞선 대기자 수). heartbeat 가 끊긴 행(_cleanup 대상)은 세지 않음
+    active = conn.execute(
+        "SELECT COUNT(*) FROM layout_slots WHERE status = ? AND COALESCE(heartbeat, started_at) >= ?",
+        (STATUS_ACTIVE, now - SLOT_LEASE_SEC),
+    ).fetchone()[0]
+    ahead = conn.execute(
+        "SELECT COUNT(*) FROM layout_slots WHERE status = ? AND ticket < ? AND heartbeat >= ?",
+        (STATUS_WAITING, ticket, now - WAITER_HEARTBEAT_SEC),
+    ).fetchone()[0]
+    return active, ahead
+
+
+def _touch_waiter(conn, ticket, holder, enqueued_at, now):
+    # 대기자 heartbeat 갱신. 응답이 늦어 다른 프로세스가 행을 지웠으면 같은 ticket(순번)으로 다시 등록
+    cur = conn.execute(
+        "UPDATE layout_slots SET heartbeat = ? WHERE ticket = ? AND status = ?", (now, ticket, STATUS_WAITING)
+    )
+    if cur.rowcount == 0:
+        conn.execute(
+            "INSERT OR IGNORE INTO layout_slots (ticket, holder, status, enqueued_at, heartbeat) VALUES (?, ?, ?, ?, ?)",
+            (ticket, holder, STATUS_WAITING, enqueued_at, now),
+        )
+    conn.commit()
+
+
+def acquire_slot(holder, max_concurrency=None, wait_timeout=WAIT_TIMEOUT_SEC, db_file=None):
+    """
+    선착순으로 레이아웃 서비스 요청 슬롯을 얻고 ticket 을 반환합니다.
+    wait_timeout 안에 차례가 오지 않으면 대기열에서 빠지고 AdmissionTimeout 을 발생시킵니다.
+    대기 중에는 읽기 쿼리로만 차례를 확인하고, 쓰기 잠금(BEGIN IMMEDIATE)은 차례가 왔을 때만 잡습니다.
+    (대기자 heartbeat 는 WAITER_HEARTBEAT_SEC 의 1/3 간격으로만 기록)
+    """
+    max_concurrency = max_concurrency or get_max_concurrency()
+    enqueued_at = time.time()
+    conn = _connect(db_file)
+    try:
+        cur = conn.execute(
+            "INSERT INTO layout_slots (holder, status, enqueued_at, heartbeat) VALUES (?, ?, ?, ?)",
+            (holder, STATUS_WAITING, enqueued_at, enqueued_at),
+        )
+        conn.commit()
+        ticket = cur.lastrowid
+        deadline = enqueued_at + wait_timeout
+        last_heartbeat = enqueued_at
+
+        while True:
+            now = time.time()
+            active, ahead = _queue_state(conn, ticket, now)
+            if active < max_concurrency and ahead == 0:
+                # 차례가 온 것으로 보이면 쓰기 잠금 안에서 정리 후 다시 확인하고 슬롯을 가져감
+                conn.execute("BEGIN IMMEDIATE")
+                _cleanup(conn, now)
+                active, ahead = _queue_state(conn, ticket, now)
+                if active < max_concurrency and ahead == 0:
+                    cur = conn.execute(
+                        "UPDATE layout_slots SET status = ?, started_at = ?, heartbeat = ? WHERE ticket = ?",
+                        (STATUS_ACTIVE, now, now, ticket),
+                    )
+                    if cur.rowcount == 1:
+                        conn.commit()
+                        return ticket
+                    last_heartbeat = 0  # 대기 행이 지워졌음 -> 아래에서 바로 다시 등록
+                conn.commit()
+            if now >= deadline:
+                conn.execute("DELETE FROM layout_slots WHERE ticket = ?", (ticket,))
+                conn.commit()
+                raise AdmissionTimeout(
+                    f"레이아웃 분석 대기 시간 {wait_timeout}초 초과 (대기 순번 {ahead + 1}, 처리 중 {active}건)"
+                )
+            if now - last_heartbeat >= WAITER_HEARTBEAT_SEC / 3:
+                _touch_waiter(conn, ticket, holder, enqueued_at, now)
+                last_heartbeat = now
+            time.sleep(POLL_INTERVAL)
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def release_slot(ticket, db_file=None):
+    conn = _connect(db_file)
+    try:
+        conn.execute(
+            "UPDATE layout_slots SET status = ?, finished_at = ? WHERE ticket = ?",
+            (STATUS_DONE, time.time(), ticket),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _keep_alive(ticket, stop, db_file=None):
+    # 요청이 끝날 때까지 슬롯의 heartbeat 를 갱신 (별도 스레드, 스레드 전용 연결 사용)
+    try:
+        while not stop.wait(ACTIVE_HEARTBEAT_SEC):
+            conn = _connect(db_file)
+            try:
+                cur = conn.execute(
+                    "UPDATE layout_slots SET heartbeat = ? WHERE ticket = ? AND status = ?",
+                    (time.time(), ticket, STATUS_ACTIVE),
+                )
+                conn.commit()
+            except Exception as e:
+                print(f"[⚠️ LAYOUT SLOT] heartbeat 갱신 실패 (ticket {ticket}): {e}")
+                continue
+            finally:
+                conn.close()
+            if cur.rowcount == 0:
+                print(f"[⚠️ LAYOUT SLOT] 슬롯이 이미 회수됨 (ticket {ticket})")
+                return
+    finally:
+        close_all()
+
+
+@contextmanager
+def layout_slot(holder, max_concurrency=None, wait_timeout=WAIT_TIMEOUT_SEC, db_file=None):
+    ticket = acquire_slot(holder, max_concurrency, wait_timeout, db_file)
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_keep_alive, args=(ticket, stop, db_file), daemon=True)
+    heartbeat.start()
+    try:
+        yield ticket
+    finally:
+        stop.set()
+        heartbeat.join()
+        release_slot(ticket, db_file)
+
+
+def average_duration(db_file=None):
+    """최근 처리 건의 평균 요청 시간(초)."""
+    conn = _connect(db_file)
+    try:
+        row = conn.execute(
+            """
+            SELECT AVG(finished_at - started_at) FROM (
+                SELECT started_at, finished_at FROM layout_slots
+                WHERE status = ? AND started_at IS NOT NULL
+                ORDER BY ticket DESC LIMIT ?
+            )
+        """,
+            (STATUS_DONE, DURATION_SAMPLE_SIZE),
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row and row[0] else DEFAULT_DURATION_SEC
+
+
+def estimate_wait_sec(position, max_concurrency=None, db_file=None):
+    """앞에 position 건이 기다리고 있을 때 예상 대기 시간(초)."""
+    max_concurrency = max_concurrency or get_max_concurrency()
+    return math.ceil((position + 1) / max_concurrency) * average_duration(db_file)
+
+
+def get_wait_status(holder, db_file=None):
+    """
+    holder 의 대기 상태를 반환합니다.
+    {"status": waiting/active, "position": 앞 대기 건수, "active": 처리 중 건수, "eta_sec": 예상 대기 시간}
+    대기열에 없으면 None.
+    """
+    conn = _connect(db_file)
+    try:
+        row = conn.execute(
+            "SELECT ticket, status FROM layout_slots WHERE holder = ? AND status IN (?, ?) ORDER BY ticket DESC LIMIT 1",
+            (holder, STATUS_WAITING, STATUS_ACTIVE),
+        ).fetchone()
+        if row is None:
+            return None
+        ticket, status = row
+        active, position = _queue_state(conn, ticket, time.time())
+    finally:
+        conn.close()
+    eta_sec = 0 if status == STATUS_ACTIVE else estimate_wait_sec(position, db_file=db_file)
+    return {"status": status, "position": position, "active": active, "eta_sec": eta_sec}
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import hashlib
+import zipfile
+from db import get_connection
+from layout_store import LAYOUT_EXT, FORMAT_VERSION, read_layout_index
+
+# --- PDF 레이아웃 분석 결과 캐시 ---
+# (PDF SHA-256, 레이아웃 서비스 버전)을 키로 이미 분석한 JSON 파일을 재사용합니다.
+# 서비스 모델/버전을 바꾸면 .env 의 LAYOUT_SERVICE_VERSION 을 올려 기존 결과를 무효화합니다.
+LAYOUT_CACHE_DB = "paper.db"
+DEFAULT_SERVICE_VERSION = "1"
+
+# 캐시 테이블이 생기기 전에 저장된 uploaded/<hash>.json 도 검증 후 현재 버전 결과로 등록
+# (<hash>.layout.zip 은 워커가 현재 버전 결과를 쓰는 경로이므로 대상이 아님. 다른 버전으로 등록된 파일도 제외)
+ADOPT_LEGACY_JSON = True
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# 레이아웃 서비스에 보낼 앞쪽 페이지 수 (0 이면 전체 PDF). 서지정보 추출 범위(MAX_PAGE_NUMBER)와 맞춤
+DEFAULT_PAGE_WINDOW = 2
+
+
+def get_service_version():
+    return os.getenv("LAYOUT_SERVICE_VERSION", DEFAULT_SERVICE_VERSION)
+
+
+def get_page_window():
+    """레이아웃 분석할 앞쪽 페이지 수. None 이면 전체 PDF."""
+    window = int(os.getenv("LAYOUT_PAGE_WINDOW", DEFAULT_PAGE_WINDOW))
+    return window if window > 0 else None
+
+
+def file_sha256(path):
+    sha256_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256_hash.update(chunk)
+    return sha256_hash.hexdigest()
+
+
+_initialized_dbs = set()  # 이 프로세스에서 테이블을 확인한 DB 파일 (조회 때마다 DDL 을 실행하지 않도록)
+
+
+def init_layout_cache_table(db_file=None):
+    conn = get_connection(db_file or LAYOUT_CACHE_DB)
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS "layout_cache" (
+                "pdf_hash" TEXT,
+                "service_version" TEXT,
+                "json_path" TEXT,
+                "block_count" INTEGER,
+                "created_at" REAL,
+                PRIMARY KEY ("pdf_hash", "service_version")
+            )
+        """
+        )
+        # 앞쪽 N 페이지만 분석한 결과면 N, 전체 문서면 NULL
+        columns = [col[1] for col in conn.execute("PRAGMA table_info(layout_cache)").fetchall()]
+        if "page_window" not in columns:
+            conn.execute('ALTER TABLE layout_cache ADD COLUMN "page_window" INTEGER')
+        conn.commit()
+        _initialized_dbs.add(db_file or LAYOUT_CACHE_DB)
+    finally:
+        conn.close()
+
+
+def validate_layout(json_data):
+    """레이아웃 분석 결과가 블록 목록 형식(page_number/text)인지 확인합니다."""
+    if not isinstance(json_data, list) or not json_data:
+        return False
+    for block in json_data:
+        if not isinstance(block, dict):
+            return False
+        if not isinstance(block.get("page_number"), int) or not isinstance(block.get("text", ""), str):
+            return False
+    return True
+
+
+def _is_valid_layout_file(json_path):
+    """저장된 레이아웃 파일이 읽을 수 있는 상태인지 확인합니다. (압축 형식은 index 만 확인)"""
+    try:
+        if json_path.endswith(LAYOUT_EXT):
+            index = read_layout_index(json_path)
+            return index.get("format") == FORMAT_VERSION and index.get("block_count", 0) > 0
+        with open(json_path, "r", encoding="utf-8") as f:
+            return validate_layout(json.load(f))
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return False
+
+
+def put_cached_layout(pdf_hash, json_path, block_count, page_window=None, version=None, db_file=None):
+    conn = get_connection(db_file or LAYOUT_CACHE_DB)
+    try:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO layout_cache
+                (pdf_hash, service_version, json_path, block_count, created_at, page_window)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            (pdf_hash, version or get_service_version(), json_path, block_count, time.time(), page_window),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_cached_layout(pdf_hash, legacy_dir=None, version=None, db_file=None):
+    """
+    캐시된 레이아웃 파일 경로를 반환합니다. 없거나 파일이 손상되었으면 None.
+    앞쪽 일부 페이지만 분석한 결과는 현재 페이지 범위(LAYOUT_PAGE_WINDOW)를 모두 포함할 때만 사용합니다.
+    legacy_dir 를 주면 캐시 등록 전 저장된 <legacy_dir>/<pdf_hash>.json 도 확인합니다.
+    """
+    version = version or get_service_version()
+    page_window = get_page_window()
+    if (db_file or LAYOUT_CACHE_DB) not in _initialized_dbs:
+        init_layout_cache_table(db_file)
+    conn = get_connection(db_file or LAYOUT_CACHE_DB)
+    try:
+        row = conn.execute(
+            "SELECT json_path, page_window FROM layout_cache WHERE pdf_hash = ? AND service_version = ?",
+            (pdf_hash, version),
+        ).fetchone()
+        if row and row[1] is not None and (page_window is None or row[1] < page_window):
+            return None  # 필요한 페이지보다 적게 분석된 결과 -> 다시 분석
+        if row:
+            if _is_valid_layout_file(row[0]):
+                return row[0]
+            # 파일이 지워졌거나 손상된 경우 항목을 지움 (변환된 파일이 있으면 아래에서 다시 등록)
+            print(f"[⚠️ LAYOUT CACHE] invalid cached layout for {pdf_hash}: {row[0]}")
+            conn.execute(
+                "DELETE FROM layout_cache WHERE pdf_hash = ? AND service_version = ?",
+                (pdf_hash, version),
+            )
+            conn.commit()
+    finally:
+        conn.close()
+
+    if ADOPT_LEGACY_JSON and legacy_dir:
+        # 앞쪽 페이지만 분석(LAYOUT_PAGE_WINDOW)하기 전의 결과이므로 전체 문서 결과(page_window=None)로 등록
+        legacy_path = os.path.join(legacy_dir, f"{pdf_hash}.json")
+        if os.path.exists(legacy_path) and not _is_registered(legacy_path, db_file) and _is_valid_layout_file(legacy_path):
+            put_cached_layout(pdf_hash, legacy_path, None, version=version, db_file=db_file)
+            return legacy_path
+    return None
+
+
+def _is_registered(json_path, db_file=None):
+    # 이미 (다른 버전으로) 캐시에 등록된 파일이면 True -> 서비스 버전을 올렸을 때 이전 결과를 다시 쓰지 않음
+    conn = get_connection(db_file or LAYOUT_CACHE_DB)
+    try:
+        return conn.execute("SELECT 1 FROM layout_cache WHERE json_path = ? LIMIT 1", (json_path,)).fetchone() is not None
+    finally:
+        conn.close()
@@ -0,0 +1,213 @@
+import io
+import os
+import json
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# pypdf 가 있으면 앞쪽 N 페이지만 잘라서 전송할 수 있음 (없으면 항상 전체 PDF 전송)
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:
+    PdfReader = PdfWriter = None
+
+# --- PDF 레이아웃 분석 서비스 공용 클라이언트 ---
+# 프로세스마다 하나의 requests.Session 을 공유하여 연결(keep-alive)을 재사용합니다.
+LAYOUT_POOL_SIZE = 8  # 호스트당 유지할 연결 수 (동시 업로드 수에 맞춤)
+LAYOUT_MAX_RETRIES = 2  # 연결 실패 / 5xx 응답 시 추가 시도 횟수
+LAYOUT_BACKOFF_FACTOR = 1.0  # 재시도 대기: 1초, 2초, 4초 ...
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 시각화/OCR PDF 응답을 나눠 받는 크기
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+REJECTED_STATUS_CODES = (429, 503)  # 서비스 과부하로 거절: 작업을 잠시 뒤로 미룸
+
+
+class LayoutServiceError(Exception):
+    """PDF 레이아웃 분석 서비스 호출 실패. 메시지는 화면에 그대로 표시할 수 있는 문장입니다."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def rejected(self):
+        return self.status_code in REJECTED_STATUS_CODES
+
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _create_session():
+    # 재시도는 _post_pdf 에서 파일을 다시 열어 처리 (스트리밍 전송은 본문을 되감을 수 없음)
+    adapter = HTTPAdapter(pool_connections=LAYOUT_POOL_SIZE, pool_maxsize=LAYOUT_POOL_SIZE, max_retries=0)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """프로세스 공용 Session 을 반환합니다. (fork 된 자식 프로세스에서는 새로 생성)"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = _create_session()
+            _session_pid = os.getpid()
+        return _session
+
+
+class _MultipartBody:
+    """
+    PDF 파일 1개를 담은 multipart/form-data 본문.
+    requests 가 read() 로 조금씩 읽어 보내므로 PDF 크기와 관계없이 메모리 사용량이 일정하고,
+    __len__ 으로 Content-Length 를 알려 chunked 전송 없이 보냅니다.
+    """
+
+    def __init__(self, field, pdf_path, f, content_type="application/pdf"):
+        boundary = uuid.uuid4().hex
+        filename = os.path.basename(pdf_path).replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self._length = len(head) + os.fstat(f.fileno()).st_size + len(tail)
+        self._parts = [io.BytesIO(head), f, io.BytesIO(tail)]
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        chunks = []
+        while self._parts and size != 0:
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+
+def _post_once(url, pdf_path, timeout, stream=False):
+    with open(pdf_path, "rb") as f:
+        body = _MultipartBody("file", pdf_path, f)
+        return get_session().post(
+            url, data=body, headers={"Content-Type": body.content_type}, timeout=timeout, stream=stream
+        )
+
+
+def _post_pdf(url, pdf_path, timeout, stream=False):
+    """
+    PDF 파일을 multipart 로 전송하고 응답을 반환합니다. 실패 시 LayoutServiceError.
+    stream=True 이면 응답 본문을 미리 읽지 않습니다. (_write_atomic 으로 나눠 받은 뒤 연결 반환)
+    연결 실패와 5xx 응답은 LAYOUT_MAX_RETRIES 회까지 재시도합니다.
+    분석 도중 응답 시간 초과는 재시도하지 않습니다 (같은 시간을 또 기다리게 됨).
+    """
+    try:
+        attempt = 0
+        while True:
+            try:
+                response = _post_once(url, pdf_path, timeout, stream)
+            except requests.exceptions.ConnectionError:
+                if attempt >= LAYOUT_MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= LAYOUT_MAX_RETRIES:
+                    break
+                response.close()
+            time.sleep(LAYOUT_BACKOFF_FACTOR * (2 ** attempt))
+            attempt += 1
+        if response.status_code >= 400:
+            response.close()
+        response.raise_for_status()
+        return response
+    except requests.exceptions.Timeout:
+        raise LayoutServiceError(f"요청 시간 초과: PDF 분석 서비스가 {timeout}초 내에 응답하지 않았습니다.")
+    except requests.exceptions.ConnectionError:
+        raise LayoutServiceError(
+            "연결 오류: PDF 분석 서비스에 연결할 수 없습니다. 서비스 URL을 확인하거나 네트워크 상태를 확인해주세요."
+        )
+    except requests.exceptions.RequestException as e:
+        status_code = e.response.status_code if e.response is not None else None
+        raise LayoutServiceError(f"PDF 분석 요청 중 오류 발생: {e}", status_code=status_code)
+    except OSError as e:
+        raise LayoutServiceError(f"PDF 파일을 읽을 수 없습니다: {e}")
+
+
+def _write_atomic(output_path, response):
+    # stream=True 응답을 임시 파일에 나눠 쓴 뒤 이름을 바꿔, 중단되어도 반쯤 쓰인 파일이 남지 않게 함
+    temp_path = f"{output_path}.part"
+    try:
+        with open(temp_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(temp_path, output_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        response.close()
+
+
+def analyze_pdf(pdf_path, service_url, timeout):
+    """레이아웃 분석 결과(블록 목록 JSON)를 반환합니다."""
+    response = _post_pdf(service_url, pdf_path, timeout)
+    try:
+        return response.json()
+    except json.JSONDecodeError:
+        raise LayoutServiceError("서비스에서 유효한 JSON 응답을 받지 못했습니다.")
+
+
+def visualize_pdf(pdf_path, output_path, service_url, timeout):
+    """레이아웃 블록이 표시된 시각화 PDF를 output_path 에 저장합니다."""
+    response = _post_pdf(f"{service_url.rstrip('/')}/visualize", pdf_path, timeout, stream=True)
+    _write_atomic(output_path, response)
+
+
+def truncate_pdf(pdf_path, max_pages):
+    """
+    PDF의 앞쪽 max_pages 페이지만 담은 임시 PDF 경로를 반환합니다. (파일명은 원본과 같음)
+    pypdf 가 없거나, 페이지 수가 max_pages 이하이거나, 자르지 못하면 None 을 반환합니다.
+    사용 후 remove_truncated_pdf 로 지웁니다.
+    """
+    if PdfReader is None or not max_pages:
+        return None
+    temp_dir = None
+    try:
+        reader = PdfReader(pdf_path)
+        if len(reader.pages) <= max_pages:
+            return None
+        writer = PdfWriter()
+        for page in reader.pages[:max_pages]:
+            writer.add_page(page)
+        temp_dir = tempfile.mkdtemp(prefix="layout_pages_")
+        truncated_path = os.path.join(temp_dir, os.path.basename(pdf_path))
+        with open(truncated_path, "wb") as f:
+            writer.write(f)
+        return truncated_path
+    except Exception as e:
+        # 암호화/손상 PDF 등은 전체 문서로 분석
+        print(f"[⚠️ LAYOUT] PDF 페이지 자르기 실패, 전체 문서 사용: {pdf_path} ({e})")
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return None
+
+
+def remove_truncated_pdf(truncated_path):
+    shutil.rmtree(os.path.dirname(truncated_path), ignore_errors=True)
+
+
+def ocr_pdf(pdf_path, output_path, ocr_url, timeout):
+    """OCR 처리된 PDF를 output_path 에 저장합니다."""
+    response = _post_pdf(ocr_url, pdf_path, timeout, stream=True)
+    _write_atomic(output_path, response)
@@ -0,0 +1,153 @@
+"""
+PDF 레이아웃 분석 결과 저장 형식.
+
+레이아웃 JSON(블록 목록)을 페이지별로 나누어 압축(zip, deflate)한 파일로 저장합니다.
+    index.json        {"format": 1, "pages": [1, 2, ...], "block_count": N}
+    pages/0001.json   1페이지 블록 목록 (공백 없는 JSON)
+    pages/other.json  page_number 가 정수가 아닌 블록 (있을 때만)
+필요한 페이지만 읽을 수 있으므로 서지정보 추출 시 앞쪽 몇 페이지만 파싱합니다.
+기존 .json 파일도 그대로 읽을 수 있으며, export 로 기존 형식의 JSON을 다시 만들 수 있습니다.
+
+사용 예:
+    python layout_store.py export uploaded/<hash>.layout.zip            # <hash>.json 으로 내보내기
+    python layout_store.py convert uploaded                              # 폴더의 .json 을 변환
+"""
+import os
+import sys
+import json
+import zipfile
+import argparse
+
+LAYOUT_EXT = ".layout.zip"
+FORMAT_VERSION = 1
+INDEX_NAME = "index.json"
+OTHER_PAGE_NAME = "pages/other.json"
+
+
+def _page_member(page):
+    return f"pages/{page:04d}.json"
+
+
+def is_layout_file(filename):
+    return filename.endswith(LAYOUT_EXT) or filename.lower().endswith(".json")
+
+
+def layout_stem(filename):
+    """'<hash>.layout.zip' / '<hash>.json' 에서 '<hash>' 를 반환합니다."""
+    name = os.path.basename(filename)
+    if name.endswith(LAYOUT_EXT):
+        return name[: -len(LAYOUT_EXT)]
+    return os.path.splitext(name)[0]
+
+
+def save_layout(json_data, path):
+    """블록 목록을 페이지별 압축 파일로 저장합니다. 임시 파일에 쓴 뒤 이름을 바꿉니다."""
+    pages = {}
+    others = []
+    for block in json_data:
+        page = block.get("page_number") if isinstance(block, dict) else None
+        if isinstance(page, int):
+            pages.setdefault(page, []).append(block)
+        else:
+            others.append(block)
+
+    index = {"format": FORMAT_VERSION, "pages": sorted(pages), "block_count": len(json_data)}
+    temp_path = f"{path}.part"
+    try:
+        with zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(INDEX_NAME, json.dumps(index))
+            for page in index["pages"]:
+                zf.writestr(_page_member(page), json.dumps(pages[page], ensure_ascii=False, separators=(",", ":")))
+            if others:
+                zf.writestr(OTHER_PAGE_NAME, json.dumps(others, ensure_ascii=False, separators=(",", ":")))
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def load_layout(path, pages=None):
+    """
+    레이아웃 블록 목록을 읽습니다.
+    pages 에 페이지 번호 집합을 주면 해당 페이지 블록만 읽습니다. (None 이면 전체)
+    .json 파일은 전체를 읽은 뒤 페이지로 거릅니다.
+    """
+    if not path.endswith(LAYOUT_EXT):
+        with open(path, "r", encoding="utf-8") as f:
+            json_data = json.load(f)
+        if pages is None:
+            return json_data
+        return [block for block in json_data if block.get("page_number") in pages]
+
+    with zipfile.ZipFile(path) as zf:
+        index = json.loads(zf.read(INDEX_NAME))
+        json_data = []
+        for page in index["pages"]:
+            if pages is None or page in pages:
+                json_data.extend(json.loads(zf.read(_page_member(page))))
+        if pages is None and OTHER_PAGE_NAME in zf.namelist():
+            json_data.extend(json.loads(zf.read(OTHER_PAGE_NAME)))
+        return json_data
+
+
+def read_layout_index(path):
+    with zipfile.ZipFile(path) as zf:
+        return json.loads(zf.read(INDEX_NAME))
+
+
+def export_layout_json(path, out_path=None):
+    """저장된 레이아웃을 기존 형식(들여쓰기 JSON)으로 내보내고 경로를 반환합니다."""
+    out_path = out_path or os.path.join(os.path.dirname(path), f"{layout_stem(path)}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(load_layout(path), f, ensure_ascii=False, indent=4)
+    return out_path
+
+
+def convert_folder(folder, remove_json=False):
+    """폴더의 <hash>.json 레이아웃 파일을 <hash>.layout.zip 으로 변환합니다."""
+    converted, skipped = 0, 0
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith(".json"):
+            continue
+        json_path = os.path.join(folder, name)
+        layout_path = os.path.join(folder, layout_stem(name) + LAYOUT_EXT)
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                json_data = json.load(f)
+            if not isinstance(json_data, list):
+                skipped += 1
+                continue
+            if not os.path.exists(layout_path):
+                save_layout(json_data, layout_path)
+            if remove_json:
+                os.remove(json_path)
+            converted += 1
+        except Exception as e:
+            print(f"  오류: '{name}' 변환 실패: {e}")
+            skipped += 1
+    print(f"변환 {converted}건, 건너뜀 {skipped}건")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="레이아웃 저장 파일 내보내기/변환")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="레이아웃 파일을 JSON 으로 내보내기")
+    export_parser.add_argument("path")
+    export_parser.add_argument("out_path", nargs="?")
+    convert_parser = sub.add_parser("convert", help="폴더의 JSON 레이아웃 파일을 압축 형식으로 변환")
+    convert_parser.add_argument("folder")
+    convert_parser.add_argument("--remove-json", action="store_true", help="변환 후 원본 JSON 삭제")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(export_layout_json(args.path, args.out_path))
+    else:
+        if not os.path.isdir(args.folder):
+            print(f"오류: '{args.folder}' 폴더가 존재하지 않습니다.")
+            sys.exit(1)
+        convert_folder(args.folder, remove_json=args.remove_json)
+
+
+if __name__ == "__main__":
+    main()
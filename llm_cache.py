@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from db import get_connection
+
+# --- LLM 응답 캐시 설정 (기본값, .env 의 LLM_CACHE_* 로 변경 가능) ---
+LLM_CACHE_PATH = "llm_cache.db"
+LLM_CACHE_MAX_ENTRIES = 200000
+
+# put 호출 N회마다 용량 초과 여부 확인
+EVICT_CHECK_INTERVAL = 100
+
+
+def hash_text(text):
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    (모델명, 필드명, 지시문 해시, 입력 텍스트 해시)를 키로 하는 SQLite 기반 LLM 응답 캐시.
+    파싱에 성공한 응답만 저장하며, 최대 건수를 넘으면 오래 사용되지 않은 항목부터 삭제합니다.
+    """
+
+    def __init__(self, db_path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        return get_connection(self.db_path)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS "llm_cache" (
+                    "model_name" TEXT,
+                    "field_name" TEXT,
+                    "prompt_hash" TEXT,
+                    "input_hash" TEXT,
+                    "parsed" TEXT,
+                    "raw" TEXT,
+                    "created_at" REAL,
+                    "last_access" REAL,
+                    PRIMARY KEY ("model_name", "field_name", "prompt_hash", "input_hash")
+                )
+            """
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS "idx_llm_cache_last_access" ON "llm_cache" ("last_access")'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS "idx_llm_cache_prompt_hash" ON "llm_cache" ("prompt_hash")'
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, model_name, field_name, instruction_prompt, input_data):
+        """캐시된 응답({"parsed", "raw"})을 반환합니다. 없으면 None."""
+        key = (model_name, field_name, hash_text(instruction_prompt), hash_text(input_data))
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                """
+                SELECT parsed, raw FROM llm_cache
+                WHERE model_name = ? AND field_name = ? AND prompt_hash = ? AND input_hash = ?
+            """,
+                key,
+            ).fetchone()
+            if row:
+                conn.execute(
+                    """
+                    UPDATE llm_cache SET last_access = ?
+                    WHERE model_name = ? AND field_name = ? AND prompt_hash = ? AND input_hash = ?
+                """,
+                    (time.time(),) + key,
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"[⚠️ CACHE] read failed for field '{field_name}': {e}")
+            row = None
+        finally:
+            conn.close()
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not row:
+            return None
+        return {"parsed": json.loads(row[0]), "raw": row[1]}
+
+    def put(self, model_name, field_name, instruction_prompt, input_data, response):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                    (model_name, field_name, prompt_hash, input_hash, parsed, raw, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+                (
+                    model_name,
+                    field_name,
+                    hash_text(instruction_prompt),
+                    hash_text(input_data),
+                    json.dumps(response["parsed"], ensure_ascii=False),
+                    response.get("raw", ""),
+                    now,
+                    now,
+                ),
+            )
+            conn.commit()
+        except Exception as e:
+            print(f"[⚠️ CACHE] write failed for field '{field_name}': {e}")
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._puts += 1
+            check_evict = self._puts % EVICT_CHECK_INTERVAL == 0
+        if check_evict:
+            self.evict()
+
+    def evict(self):
+        """최대 건수를 넘는 항목을 last_access 오래된 순으로 삭제합니다."""
+        conn = self._connect()
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE rowid IN (
+                        SELECT rowid FROM llm_cache ORDER BY last_access ASC LIMIT ?
+                    )
+                """,
+                    (excess,),
+                )
+                conn.commit()
+            return max(excess, 0)
+        finally:
+            conn.close()
+
+    def invalidate(self, model_name=None, instruction_prompt=None, prompt_hash=None):
+        """
+        모델 또는 프롬프트 버전 단위로 캐시를 무효화합니다.
+        인자를 모두 생략하면 전체 캐시를 비웁니다. 삭제된 건수를 반환합니다.
+        """
+        if instruction_prompt is not None:
+            prompt_hash = hash_text(instruction_prompt)
+
+        conditions, params = [], []
+        if model_name is not None:
+            conditions.append("model_name = ?")
+            params.append(model_name)
+        if prompt_hash is not None:
+            conditions.append("prompt_hash = ?")
+            params.append(prompt_hash)
+
+        sql = "DELETE FROM llm_cache"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+        conn = self._connect()
+        try:
+            deleted = conn.execute(sql, params).rowcount
+            conn.commit()
+            return deleted
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """프로세스 공용 캐시 인스턴스를 반환합니다. 비활성화 시 None."""
+    global _default_cache
+    if os.getenv("LLM_CACHE_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(
+                db_path=os.getenv("LLM_CACHE_PATH", LLM_CACHE_PATH),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", LLM_CACHE_MAX_ENTRIES)),
+            )
+        return _default_cache
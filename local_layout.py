@@ -0,0 +1,119 @@
+import os
+from layout_cache import get_cached_layout, get_page_window, put_cached_layout
+from layout_store import LAYOUT_EXT, save_layout
+
+# --- 텍스트 레이어 PDF 로컬 분석 ---
+# 텍스트가 포함된 PDF는 원격 레이아웃 서비스 대신 PyMuPDF 로 앞쪽 페이지 블록을 바로 추출합니다.
+# 스캔본(이미지 PDF)처럼 텍스트가 거의 없으면 None 을 반환하여 원격 서비스/OCR 로 넘깁니다.
+# PyMuPDF(fitz)가 없으면 항상 원격 서비스를 사용합니다.
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+LOCAL_LAYOUT_ENABLED = True
+LOCAL_MIN_CHARS = 200  # 분석 범위 전체에서 이 글자 수 미만이면 스캔본으로 간주
+HEADER_FOOTER_RATIO = 0.08  # 페이지 위/아래 8% 영역의 블록은 머리말/꼬리말
+TITLE_FONT_RATIO = 1.3  # 1페이지에서 본문보다 이만큼 큰 글꼴의 가장 큰 블록은 제목
+
+# 로컬 분석 결과는 원격 서비스 결과(LAYOUT_SERVICE_VERSION)와 다른 버전 키와 폴더에 저장합니다.
+# (같은 키/파일명을 쓰면 원격 분석 결과로 재사용되거나 이전 결과 파일로 등록됨) 추출 규칙을 바꾸면 번호를 올립니다.
+LOCAL_LAYOUT_VERSION = "local-1"
+LOCAL_LAYOUT_SUBDIR = "local"
+
+
+def _block_text_and_size(block):
+    lines, sizes = [], []
+    for line in block.get("lines", []):
+        spans = line.get("spans", [])
+        lines.append("".join(span.get("text", "") for span in spans))
+        sizes += [span.get("size", 0) for span in spans if span.get("text", "").strip()]
+    text = " ".join(line.strip() for line in lines if line.strip())
+    return text, (max(sizes) if sizes else 0)
+
+
+def extract_local_blocks(pdf_path, max_pages=None):
+    """
+    PDF 텍스트 레이어에서 레이아웃 서비스와 같은 형식의 블록 목록
+    (page_number, type, text, left, top, width, height, page_width, page_height)을 만듭니다.
+    PyMuPDF 가 없거나 텍스트가 부족하면 None.
+    """
+    if fitz is None:
+        return None
+
+    blocks = []
+    with fitz.open(pdf_path) as doc:
+        if doc.needs_pass:
+            return None
+        page_count = doc.page_count if not max_pages else min(max_pages, doc.page_count)
+        for page_index in range(page_count):
+            page = doc[page_index]
+            page_width, page_height = page.rect.width, page.rect.height
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:  # 0: 텍스트, 1: 이미지
+                    continue
+                text, font_size = _block_text_and_size(block)
+                if not text:
+                    continue
+                x0, y0, x1, y1 = block["bbox"]
+                if y1 <= page_height * HEADER_FOOTER_RATIO:
+                    block_type = "Page header"
+                elif y0 >= page_height * (1 - HEADER_FOOTER_RATIO):
+                    block_type = "Page footer"
+                else:
+                    block_type = "Text"
+                blocks.append({
+                    "left": x0,
+                    "top": y0,
+                    "width": x1 - x0,
+                    "height": y1 - y0,
+                    "page_number": page_index + 1,
+                    "page_width": page_width,
+                    "page_height": page_height,
+                    "text": text,
+                    "type": block_type,
+                    "_font_size": font_size,
+                })
+
+    if sum(len(block["text"]) for block in blocks) < LOCAL_MIN_CHARS:
+        return None
+
+    # 1페이지 본문 블록 중 글꼴이 가장 큰 블록을 제목으로 표시
+    first_page = [b for b in blocks if b["page_number"] == 1 and b["type"] == "Text"]
+    if first_page:
+        sizes = sorted(b["_font_size"] for b in first_page)
+        body_size = sizes[len(sizes) // 2]
+        title = max(first_page, key=lambda b: b["_font_size"])
+        if body_size and title["_font_size"] >= body_size * TITLE_FONT_RATIO:
+            title["type"] = "Title"
+    for block in blocks:
+        del block["_font_size"]
+    return blocks
+
+
+def analyze_locally(pdf_path, pdf_hash, output_folder):
+    """
+    텍스트 레이어로 앞쪽 페이지(LAYOUT_PAGE_WINDOW)를 분석하여 저장하고 레이아웃 파일 경로를 반환합니다.
+    같은 PDF의 로컬 분석 결과가 캐시(LOCAL_LAYOUT_VERSION)에 있으면 그 경로를 반환합니다.
+    로컬 분석을 할 수 없으면(비활성화, PyMuPDF 없음, 스캔본, 읽기 오류) None.
+    """
+    if not LOCAL_LAYOUT_ENABLED or os.getenv("LOCAL_LAYOUT_ENABLED", "1") in ("0", "false", "False"):
+        return None
+    cached_path = get_cached_layout(pdf_hash, version=LOCAL_LAYOUT_VERSION)
+    if cached_path:
+        return cached_path
+    page_window = get_page_window()
+    try:
+        json_data = extract_local_blocks(pdf_path, max_pages=page_window)
+    except Exception as e:
+        print(f"[⚠️ LOCAL LAYOUT] 로컬 분석 실패, 원격 서비스 사용: {pdf_path} ({e})")
+        return None
+    if not json_data:
+        return None
+
+    local_folder = os.path.join(output_folder, LOCAL_LAYOUT_SUBDIR)
+    os.makedirs(local_folder, exist_ok=True)
+    json_path = os.path.join(local_folder, f"{os.path.splitext(os.path.basename(pdf_path))[0]}{LAYOUT_EXT}")
+    save_layout(json_data, json_path)
+    put_cached_layout(pdf_hash, json_path, len(json_data), page_window=page_window, version=LOCAL_LAYOUT_VERSION)
+    return json_path
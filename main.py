@@ -5,12 +5,28 @@ import datetime
 import os
 import sqlite3
 import bcrypt
-import json
 import pandas as pd
-from get_paper_info import get_paper_df, get_pdf_json
 from name_change import korean_name_to_english
+from extraction_metrics import load_metrics, summarize_metrics
+from db import get_connection, transaction
+from schema import (
+    migrate, has_search_index, author_search_sql, paper_list_sql,
+    MY_PAPERS_SQL, ALL_PAPERS_SQL, RECEIPT_SQL,
+)
+from upsert import upsert_dataframe
+from layout_cache import get_cached_layout, init_layout_cache_table
+from layout_store import LAYOUT_EXT
+from local_layout import LOCAL_LAYOUT_SUBDIR, analyze_locally
+from visual_cache import get_cached_visualization, remove_visualization
+from layout_admission import init_admission_table, estimate_wait_sec, get_wait_status
+from job_queue import (
+    enqueue_job, get_job, init_job_table, get_queue_position,
+    KIND_LAYOUT, KIND_EXTRACT, KIND_ANALYZE, KIND_VISUALIZE,
+    STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE,
+)
 import base64
 import shutil
+import tempfile
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -19,6 +35,7 @@ import plotly.graph_objects as go
 from collections import Counter
 import re
 import textwrap
+import time
 from dotenv import load_dotenv
 
 # --- 상수 정의 ---
@@ -41,6 +58,84 @@ if not GMAIL_APP_PASSWORD:
     raise ValueError("❌🔑❌ 'GMAIL_APP_PASSWORD'가 .env 파일에 없습니다.")
 
 
+# --- 백그라운드 작업 상태 조회 ---
+JOB_POLL_INTERVAL = 2  # 초
+
+
+def _format_eta(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60}분 {seconds % 60}초" if seconds >= 60 else f"{seconds}초"
+
+
+def wait_for_job(job_id, label):
+    """
+    작업이 대기/실행 중이면 상태를 표시하고 잠시 후 화면을 다시 그립니다.
+    완료(done) 또는 실패(failed) 상태가 되면 작업 정보를 반환합니다.
+    """
+    job = get_job(job_id)
+    if job and job["status"] in (STATUS_QUEUED, STATUS_RUNNING):
+        if job["status"] == STATUS_QUEUED:
+            position = get_queue_position(job_id, DB_FILE) or 0
+            status_text = f"대기 중 (앞에 {position}건, 예상 대기 약 {_format_eta(estimate_wait_sec(position, db_file=DB_FILE))})"
+        else:
+            status_text = "처리 중"
+            # 레이아웃 서비스 요청 차례를 기다리는 중이면 순번 표시
+            wait_status = get_wait_status(f"job:{job_id}", DB_FILE)
+            if wait_status and wait_status["status"] == "waiting":
+                status_text = (
+                    f"PDF 분석 서비스 대기 중 (앞에 {wait_status['position']}건, "
+                    f"예상 대기 약 {_format_eta(wait_status['eta_sec'])})"
+                )
+        if job["attempts"] > 1 or (job["status"] == STATUS_QUEUED and job["error"]):
+            status_text += f" (재시도 {job['attempts']}회, 최근 오류: {job['error']})"
+        st.info(f"⏳ {label}: {status_text}")
+        time.sleep(JOB_POLL_INTERVAL)
+        st.rerun()
+    return job
+
+
+def show_visualization_button(pdf_fname, key):
+    """
+    관리자용 레이아웃 시각화 PDF 버튼. 시각화 PDF는 요청할 때만 워커에서 만들고(visual_cache),
+    이미 있으면 바로 다운로드 버튼을 표시합니다.
+    """
+    pdf_hash = os.path.splitext(pdf_fname)[0]
+    job_key = f"{key}_vis_job_id"
+    vis_path = get_cached_visualization(pdf_hash)
+    if vis_path is None:
+        if st.session_state.get(job_key):
+            job = wait_for_job(st.session_state[job_key], "시각화 PDF 생성")
+            del st.session_state[job_key]
+            if job and job["status"] == STATUS_DONE:
+                vis_path = job["result"]["vis_path"]
+            else:
+                error = job["error"] if job else "작업 정보를 찾을 수 없습니다."
+                st.error(f"시각화 PDF 생성 실패: {error}")
+        elif st.button("🖼️ 레이아웃 시각화 PDF 생성", key=f"{key}_vis_btn"):
+            pdf_path = os.path.join(upload_folder, pdf_fname)
+            if os.path.exists(pdf_path):
+                st.session_state[job_key] = enqueue_job(KIND_VISUALIZE, {"pdf_path": pdf_path})
+                st.rerun()
+            else:
+                st.error("⚠️ 원본 PDF 파일이 서버에 없습니다.")
+    if vis_path and os.path.exists(vis_path):
+        with open(vis_path, "rb") as f:
+            st.download_button(
+                "🖼️ 레이아웃 시각화 PDF 다운로드", f.read(), file_name=f"{pdf_hash}_vis.pdf",
+                mime="application/pdf", key=f"{key}_vis_download",
+            )
+
+
+def job_result_to_paper_df(job):
+    """추출 작업 결과를 get_paper_df 와 같은 형태(+ LLM 결과 파일 경로)로 변환합니다."""
+    if not job or job["status"] != STATUS_DONE:
+        error = job["error"] if job else "작업 정보를 찾을 수 없습니다."
+        return None, None, None, error, None, None
+    result = job["result"]
+    a_info = pd.DataFrame(result["a_info"]) if result.get("a_info") is not None else None
+    c_info = pd.DataFrame(result["c_info"]) if result.get("c_info") is not None else None
+    return result["json_data"], a_info, c_info, result["fail_count"], result["model_name"], result["llm_json_path"]
+
 
 # --- 테마 설정 (Color Palettes - Design Guide 반영) ---
 THEMES = {
@@ -267,132 +362,23 @@ def send_processing_result_email(recipient_email, paper_details):
         return False, f"전송 실패: {e}"
 
 # --- 데이터베이스 함수 ---
+@st.cache_resource
 def init_db():
-    """데이터베이스를 초기화하고 필요한 테이블 및 컬럼이 없으면 생성합니다."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    # 1. user_info 테이블 생성
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS "user_info" (
-            "name" TEXT, "id" TEXT PRIMARY KEY, "kri" TEXT,"email" TEXT, "hname" TEXT,
-            "jkind" TEXT, "jrank" TEXT, "duty" TEXT, "dep" TEXT,
-            "state" TEXT, "password" TEXT
-        )
     """
-    )
-    c.execute("PRAGMA table_info(user_info)")
-    columns = [col[1] for col in c.fetchall()]
-    for i in range(1, 5):
-        if f"hname{i}" not in columns:
-            c.execute(f"ALTER TABLE user_info ADD COLUMN hname{i} TEXT")
-
-    # 2. 비로그인 업로드용 u_info 테이블 생성
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS "u_info" (
-            "ORI_FILE_NAME" TEXT,
-            "PDF_FILE_NAME" TEXT,
-            "AUTHOR" TEXT,
-            "ID" TEXT,
-            "ROLE" TEXT,
-            "EMAIL" TEXT,
-            "DONE" TEXT,
-            "OLD_FILE_NAME" TEXT,
-            "SAVE_DATE" TEXT
-        )
+    프로세스 시작 시 한 번만 실행: 스키마 마이그레이션(schema.MIGRATIONS)과 작업 큐/캐시 테이블 준비.
+    화면을 다시 그릴 때(rerun)는 DDL이나 쓰기를 하지 않습니다.
     """
-    )
-
-    # 3. 시스템 설정(테마 등) 저장을 위한 system_config 테이블
-    c.execute(
-        """
-        CREATE TABLE IF NOT EXISTS "system_config" (
-            "key" TEXT PRIMARY KEY,
-            "value" TEXT
-        )
-    """
-    )
-    
-    # 4. c_info 테이블 생성 (없으면)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS "c_info" (
-            "YEAR" INTEGER,
-            "ORI_FILE_NAME" TEXT,
-            "PDF_FILE_NAME" TEXT,
-            "JSON_FILE_NAME" TEXT,
-            "LLM_JSON_FILE_NAME" TEXT,
-            "TITLE" TEXT,
-            "AUTHOR_LIST" TEXT,
-            "AFFILIATION_LIST" TEXT,
-            "FIRST_AUTHOR" TEXT,
-            "CORRESPONDING_AUTHOR" TEXT,
-            "CO_AUTHOR" TEXT,
-            "KEYWORDS" TEXT,
-            "JOURNAL_NAME" TEXT,
-            "PUBLICATION_YEAR" INTEGER,
-            "VOLUME" TEXT,
-            "ISSUE" TEXT,
-            "PAGE" TEXT,
-            "DOI" TEXT
-        )
-    """)
-
-    # 5. a_info 테이블 생성 (없으면)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS "a_info" (
-            "YEAR" INTEGER,
-            "ORI_FILE_NAME" TEXT,
-            "PDF_FILE_NAME" TEXT,
-            "JSON_FILE_NAME" TEXT,
-            "LLM_JSON_FILE_NAME" TEXT,
-            "AUTHOR" TEXT,
-            "AFFILIATION" TEXT,
-            "ROLE" TEXT,
-            "직원번호" TEXT,
-            "이름" TEXT,
-            "소속" TEXT,
-            "부서" TEXT
-        )
-    """)
-
-    # [수정] 이력 관리 컬럼 추가 (a_info, c_info, user_info)
-    # user_info는 hr_info 역할도 겸함
-    target_tables = ["c_info", "a_info", "user_info"]
-    audit_cols = ["REG_DT", "REG_ID", "MOD_DT", "MOD_ID"]
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    for tbl in target_tables:
-        c.execute(f"PRAGMA table_info({tbl})")
-        existing_cols = [col[1] for col in c.fetchall()]
-        
-        for col in audit_cols:
-            if col not in existing_cols:
-                try:
-                    c.execute(f"ALTER TABLE {tbl} ADD COLUMN {col} TEXT")
-                    # print(f"Added column {col} to table {tbl}")
-                except Exception as e:
-                    print(f"Error adding column {col} to {tbl}: {e}")
-        
-        # [수정] 기존 데이터에 대한 Default 값 채우기 (REG_DT가 비어있는 경우)
-        try:
-            # REG_DT, REG_ID가 NULL이거나 비어있으면 초기값 설정
-            # MOD_DT, MOD_ID는 수정 시 업데이트되므로 굳이 초기화 안 해도 되지만, 통일성을 위해 같이 해도 됨.
-            # 여기서는 REG 정보만 필수 초기화
-            c.execute(f"UPDATE {tbl} SET REG_DT = ? WHERE REG_DT IS NULL OR REG_DT = ''", (current_time,))
-            c.execute(f"UPDATE {tbl} SET REG_ID = ? WHERE REG_ID IS NULL OR REG_ID = ''", ("AD00000",))
-            c.execute(f"UPDATE {tbl} SET MOD_DT = ? WHERE MOD_DT IS NULL OR MOD_DT = ''", (current_time,))
-            c.execute(f"UPDATE {tbl} SET MOD_ID = ? WHERE MOD_ID IS NULL OR MOD_ID = ''", ("AD00000",))
-        except Exception as e:
-            print(f"Error updating default values for {tbl}: {e}")
-
-    conn.commit()
-    conn.close()
+    applied = migrate(DB_FILE)
+    # 백그라운드 작업 큐/레이아웃 캐시/요청 제한 테이블 (worker.py 와 공유)
+    init_job_table(DB_FILE)
+    init_layout_cache_table(DB_FILE)
+    init_admission_table(DB_FILE)
+    return applied
 
 #  검색 필터에 사용할 년도, 저널, 부서 목록을 DB에서 가져옵니다
 def get_filter_options():
     """검색 필터용 옵션(년도, 저널, 부서)을 DB에서 가져옵니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     options = {"years": [], "journals": [], "depts": []}
     
     try:
@@ -428,7 +414,7 @@ def get_filter_options():
 # [추가] 시스템 테마 관련 DB 함수
 def get_system_theme():
     """DB에서 전역 테마 설정을 가져옵니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     try:
         c.execute("SELECT value FROM system_config WHERE key = 'global_theme'")
@@ -443,7 +429,7 @@ def get_system_theme():
 
 def set_system_theme(theme_name):
     """DB에 전역 테마 설정을 저장합니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     try:
         # Upsert (SQLite 지원 버전에 따라 다름, 여기선 REPLACE 사용)
@@ -458,7 +444,7 @@ def set_system_theme(theme_name):
 
 def verify_user(user_id, password):
     """사용자 자격 증명을 데이터베이스와 대조하여 확인합니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     c.execute("SELECT password FROM user_info WHERE id = ?", (user_id,))
     result = c.fetchone()
@@ -471,7 +457,7 @@ def verify_user(user_id, password):
 
 def update_password(user_id, new_password):
     """주어진 사용자의 비밀번호를 업데이트합니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     hashed_new_password = bcrypt.hashpw(
         new_password.encode("utf-8"), bcrypt.gensalt()
@@ -488,7 +474,7 @@ def add_or_update_user(data, is_new_user, user_id="AD00000"):
     새로운 사용자를 추가하거나 기존 사용자를 업데이트합니다.
     [수정] 이력 관리 컬럼(REG_DT, REG_ID, MOD_DT, MOD_ID) 처리 추가
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
@@ -552,7 +538,7 @@ def add_or_update_user(data, is_new_user, user_id="AD00000"):
 
 def get_all_users_data():
     """데이터베이스에서 모든 사용자 데이터를 가져옵니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     users = pd.read_sql(
         "SELECT name, id, kri, email,  hname, jkind, jrank, duty, dep, state, password, hname1, hname2, hname3, hname4 FROM user_info",
         conn,
@@ -563,7 +549,7 @@ def get_all_users_data():
 
 def get_user_by_id(user_id):
     """ID로 단일 사용자 데이터를 가져옵니다."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     c.execute(
         "SELECT name, id, kri, email,  hname, jkind, jrank, duty, dep, state, password, hname1, hname2, hname3, hname4 FROM user_info WHERE id = ?",
@@ -582,7 +568,7 @@ def search_author_by_name(name_variations, korean_name=None):
     if not name_variations:
         return pd.DataFrame()
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     try:
         cursor = conn.cursor()
         # a_info 테이블 존재 여부 확인
@@ -593,30 +579,12 @@ def search_author_by_name(name_variations, korean_name=None):
             conn.close()
             return pd.DataFrame()
 
-        # [수정 1] 쿼리 조건 생성 (테이블 별칭 'a' 사용)
-        # 대소문자 구분 없는 검색을 위해 LOWER 사용
-        query_parts = ["LOWER(a.AUTHOR) LIKE LOWER(?)"] * len(name_variations)
-        params = [f"%{var}%" for var in name_variations]
-
-        # [수정 2] JOIN 쿼리 작성
+        # 영문 이름 변형은 대소문자 없이 부분 일치(전문 검색 색인, 관련도 순), 한글 이름은 일치 조건 (OR)
         # a_info(a)와 c_info(c)를 PDF_FILE_NAME 기준으로 결합 (LEFT JOIN)
         # a 테이블에서는 저자, 역할, 소속을 가져오고, c 테이블에서는 해당 논문의 모든 서지정보를 가져옴
-        # [수정] 한글 이름 조건 추가
-        if korean_name:
-            query_parts.append("a.이름 = ?")
-            params.append(korean_name)
-
-        if not query_parts:
-            conn.close()
-            return pd.DataFrame()
-                
-        full_query = f"""
-            SELECT a.AUTHOR, a.ROLE, a.AFFILIATION, a.이름,a.직원번호, c.*
-            FROM a_info a
-            LEFT JOIN c_info c ON a.PDF_FILE_NAME = c.PDF_FILE_NAME
-            WHERE {' OR '.join(query_parts)}
-            ORDER BY c.PUBLICATION_YEAR, c.TITLE, a.AUTHOR, a.ROLE
-        """
+        full_query, params = author_search_sql(
+            name_variations, korean_name=korean_name, use_fts=has_search_index(conn)
+        )
 
         df = pd.read_sql_query(full_query, conn, params=params)
         
@@ -642,7 +610,7 @@ def search_users_by_name(kname_query, name_query=None):
     if not kname_query:
         return []
 
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     conn.row_factory = sqlite3.Row  # 딕셔너리처럼 접근하기 위해
     c = conn.cursor()
 
@@ -669,7 +637,7 @@ def claim_my_paper(pdf_filename, author, affiliation, user_id, user_name):
     """
     선택된 논문 저자 정보(a_info)에 사용자의 직원번호(ID)와 이름(Name)을 업데이트합니다.
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     c = conn.cursor()
     try:
         # a_info 테이블 업데이트
@@ -695,12 +663,13 @@ def claim_my_paper(pdf_filename, author, affiliation, user_id, user_name):
     finally:
         conn.close()
 
-def get_my_papers(user_name, user_id):
+def get_my_papers(user_name, user_id, filters=None):
     """
     a_info의 '이름'이 user_name과 일치하는 행을 찾고, 
     해당 PDF_FILE_NAME을 기준으로 c_info의 상세 정보를 결합(JOIN)하여 반환합니다.
+    filters(검색 조건)를 주면 그 조건에 맞는 논문만 관련도 순으로 반환합니다. (paper_list_sql)
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     try:
         # a_info 테이블 존재 확인
         cursor = conn.cursor()
@@ -711,16 +680,15 @@ def get_my_papers(user_name, user_id):
         # [핵심 로직]
         # 1. a_info(a)와 c_info(c)를 PDF_FILE_NAME으로 조인
         # 2. 조건: a.이름 = 로그인한 사용자 이름 AND a.직원번호 = 아이디
-        query = """
-            SELECT c.*, a.AUTHOR, a.ROLE, a.AFFILIATION, a.이름
-            FROM a_info a
-            JOIN c_info c ON a.PDF_FILE_NAME = c.PDF_FILE_NAME
-            WHERE a.이름 = ?
-                AND a.직원번호 = ?
-            ORDER BY c.PUBLICATION_YEAR, c.TITLE, a.AUTHOR, a.ROLE
-        """
+        if filters:
+            query, params = paper_list_sql(
+                filters["title"], year=filters["year"], journal=filters["journal"],
+                member=(user_name, user_id), use_fts=has_search_index(conn),
+            )
+        else:
+            query, params = MY_PAPERS_SQL, (user_name, user_id)
         
-        df = pd.read_sql_query(query, conn, params=(user_name,user_id,))
+        df = pd.read_sql_query(query, conn, params=params)
         
         # 중복된 컬럼(PDF_FILE_NAME 등)이 있을 경우 제거
         df = df.loc[:, ~df.columns.duplicated()]
@@ -736,83 +704,16 @@ def get_my_papers(user_name, user_id):
 def update_or_add_paper_data(df, table_name, key_columns, user_id="AD00000"):
     """
     논문 데이터(a_info, c_info)를 데이터베이스에 업서트(Upsert)합니다.
-    [수정] 이력 관리 로직 추가:
-    - Insert 시 REG_DT, REG_ID 저장
-    - Update 시 MOD_DT, MOD_ID 저장 (REG 정보는 유지)
+    - 테이블 고유 키 기준 INSERT ... ON CONFLICT DO UPDATE (upsert.py)
+    - Insert 시 REG_DT, REG_ID 저장, Update 시 MOD_DT, MOD_ID 저장 (REG 정보는 유지)
+    - key_columns 값(예: PDF_FILE_NAME) 단위로 df 에 없는 기존 행은 삭제 (논문의 저자 목록 교체)
     """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
     if df.empty:
-        conn.close()
         return True
 
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
+    conn = get_connection(DB_FILE)
     try:
-        # 1. 기존 데이터에서 REG 정보 조회 (덮어쓰기 방지)
-        # 키 컬럼을 기준으로 기존 DB 데이터를 조회
-        keys = df[key_columns].drop_duplicates()
-        existing_reg_info = {} # {(key1, key2...): {'REG_DT': ..., 'REG_ID': ...}}
-        
-        # key_columns가 여러 개일 수 있으므로 동적 쿼리 생성
-        where_clause = " AND ".join([f"{col} = ?" for col in key_columns])
-        select_query = f"SELECT {', '.join(key_columns)}, REG_DT, REG_ID FROM {table_name} WHERE {where_clause}"
-        
-        for _, row in keys.iterrows():
-            params = tuple(row[col] for col in key_columns)
-            try:
-                cursor.execute(select_query, params)
-                res = cursor.fetchone()
-                if res:
-                    # 키 값을 튜플로 만들어서 딕셔너리 키로 사용
-                    key_val = tuple(res[i] for i in range(len(key_columns)))
-                    # REG_DT(인덱스 -2), REG_ID(인덱스 -1)
-                    existing_reg_info[key_val] = {'REG_DT': res[-2], 'REG_ID': res[-1]}
-            except Exception:
-                pass # 테이블이 없거나 컬럼이 없을 경우 패스
-
-        # 2. DataFrame에 이력 정보 채우기
-        # REG_DT, REG_ID, MOD_DT, MOD_ID 컬럼 확보
-        for col in ['REG_DT', 'REG_ID', 'MOD_DT', 'MOD_ID']:
-            if col not in df.columns:
-                df[col] = None
-
-        # 행별로 순회하며 값 설정 (Apply보다 반복문이 명확함)
-        for idx, row in df.iterrows():
-            key_val = tuple(row[col] for col in key_columns)
-            
-            # 기존 데이터가 있으면 REG 정보 복원
-            if key_val in existing_reg_info:
-                df.at[idx, 'REG_DT'] = existing_reg_info[key_val]['REG_DT']
-                df.at[idx, 'REG_ID'] = existing_reg_info[key_val]['REG_ID']
-            
-            # REG_DT가 없으면(신규) 현재 시간/ID 입력
-            if pd.isna(df.at[idx, 'REG_DT']) or df.at[idx, 'REG_DT'] == '':
-                df.at[idx, 'REG_DT'] = current_time
-                df.at[idx, 'REG_ID'] = user_id
-            
-            # MOD_DT, MOD_ID는 무조건 갱신
-            df.at[idx, 'MOD_DT'] = current_time
-            df.at[idx, 'MOD_ID'] = user_id
-
-        # 3. 기존 Upsert 로직 진행 (Delete -> Insert)
-        # 빈 테이블 생성용 (컬럼 정보 얻기)
-        df.head(0).to_sql(table_name, conn, if_exists="append", index=False)
-        existing_columns = [
-            desc[0]
-            for desc in cursor.execute(f'SELECT * FROM "{table_name}"').description
-        ]
-        df_to_append = df.reindex(columns=existing_columns).fillna(value=pd.NA)
-
-        # 기존 데이터 삭제
-        for _, key_row in keys.iterrows():
-            conditions = " AND ".join([f'"{col}" = ?' for col in key_columns])
-            values = tuple(key_row[col] for col in key_columns)
-            sql_delete = f'DELETE FROM "{table_name}" WHERE {conditions}'
-            cursor.execute(sql_delete, values)
-
-        # 데이터 삽입
-        df_to_append.to_sql(table_name, conn, if_exists="append", index=False)
+        upsert_dataframe(conn, df, table_name, user_id=user_id, prune_by=key_columns)
         conn.commit()
         return True
     except Exception as e:
@@ -958,6 +859,7 @@ def create_sidebar():
 
         if st.session_state.username == "AD00000":
             menu_btn("사용자 관리", "user_management", "⚙️")
+            menu_btn("추출 통계 (관리자)", "metrics", "📊")
 
         st.markdown("<div style='margin: 30px 0; border-top: 1px solid #ddd;'></div>", unsafe_allow_html=True)
         
@@ -1164,39 +1066,52 @@ def show_login_page():
                             if not os.path.exists(upload_folder):
                                 os.makedirs(upload_folder)
 
-                            conn = sqlite3.connect(DB_FILE)
-                            cur = conn.cursor()
                             success_logs = []
                             duplicate_logs = []
-                            
-                            for u_file, u_role in valid_uploads:
-                                file_bytes = u_file.getvalue()
-                                file_hash = calculate_hash(file_bytes)
-                                pdf_file_name = f"{file_hash}.pdf"
-                                save_path = os.path.join(upload_folder, pdf_file_name)
-                                ori_file_name = u_file.name
-
-                                file_exists = os.path.exists(save_path)
-                                cur.execute("SELECT PDF_FILE_NAME FROM u_info WHERE PDF_FILE_NAME = ?", (pdf_file_name,))
-                                db_exists = cur.fetchone() is not None
-
-                                if file_exists or db_exists:
-                                    reason = []
-                                    if file_exists: reason.append("서버 파일 중복")
-                                    if db_exists: reason.append("DB 데이터 중복")
-                                    duplicate_logs.append(f"{ori_file_name}")
-                                else:
-                                    with open(save_path, "wb") as f:
-                                        f.write(file_bytes)
-                                    save_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                    cur.execute(
-                                        "INSERT INTO u_info (ORI_FILE_NAME, PDF_FILE_NAME, AUTHOR,ID, ROLE, EMAIL, DONE, OLD_FILE_NAME, SAVE_DATE) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                                        (ori_file_name, pdf_file_name, u_author,'',u_role, u_email, 0,'', save_date)
-                                    )
-                                    success_logs.append(f"{ori_file_name} ({u_role})")
 
-                            conn.commit()
-                            conn.close()
+                            # 1. 파일 저장 (DB 쓰기 잠금 없이): 서버에 같은 파일이 있으면 중복
+                            # 2. DB 중복 확인과 접수 등록만 짧은 트랜잭션으로
+                            saved_uploads = []  # (원본 파일명, 역할, 저장 파일명, 저장 경로)
+                            db_duplicates = []
+                            registered = False
+                            try:
+                                for u_file, u_role in valid_uploads:
+                                    temp_path, file_hash = spool_upload(u_file, upload_folder)
+                                    try:
+                                        pdf_file_name = f"{file_hash}.pdf"
+                                        save_path = os.path.join(upload_folder, pdf_file_name)
+                                        if commit_upload(temp_path, save_path):
+                                            saved_uploads.append((u_file.name, u_role, pdf_file_name, save_path))
+                                        else:
+                                            duplicate_logs.append(f"{u_file.name}")
+                                    finally:
+                                        # 중간에 오류가 나면 임시(.part) 파일 삭제 (저장/중복 처리된 경우는 이미 없음)
+                                        if os.path.exists(temp_path):
+                                            os.remove(temp_path)
+
+                                with transaction(DB_FILE, immediate=True) as conn:
+                                    save_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                                    for ori_file_name, u_role, pdf_file_name, save_path in saved_uploads:
+                                        db_exists = conn.execute(
+                                            "SELECT 1 FROM u_info WHERE PDF_FILE_NAME = ?", (pdf_file_name,)
+                                        ).fetchone() is not None
+                                        if db_exists:
+                                            db_duplicates.append(save_path)
+                                            duplicate_logs.append(f"{ori_file_name}")
+                                            continue
+                                        conn.execute(
+                                            "INSERT INTO u_info (ORI_FILE_NAME, PDF_FILE_NAME, AUTHOR,ID, ROLE, EMAIL, DONE, OLD_FILE_NAME, SAVE_DATE) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                            (ori_file_name, pdf_file_name, u_author,'',u_role, u_email, 0,'', save_date)
+                                        )
+                                        success_logs.append(f"{ori_file_name} ({u_role})")
+                                registered = True
+                            finally:
+                                # 등록에 실패하면 이번에 저장한 파일을 모두, 성공하면 DB에 이미 접수된 파일만 삭제
+                                # (남겨 두면 다시 올린 파일이 "서버 파일 중복"으로 거절됨)
+                                remove_paths = db_duplicates if registered else [u[3] for u in saved_uploads]
+                                for save_path in remove_paths:
+                                    if os.path.exists(save_path):
+                                        os.remove(save_path)
                             
                             if success_logs:
                                 st.success(f"✅ 총 {len(success_logs)}건이 성공적으로 접수되었습니다!")
@@ -1209,50 +1124,60 @@ def show_login_page():
                         except Exception as e:
                             st.error(f"저장 중 오류 발생: {e}")
 
-# [STEP 6-1] 파일 이름 저장
-def generate_output_filename(filename, suffix, model_name):
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_model_name = model_name.replace(":", "_").replace(".", "_")
-    base = filename.replace(".json", "").replace(" ", "_")[:200]
-    return f"{timestamp}_{safe_model_name}_{base}_{suffix}"
+# 3. 해시 계산 및 임시 저장 함수 (SHA-256)
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 업로드 파일 해시/저장 단위 (1MB)
+# mkstemp 는 0600 으로 만들므로, 저장 전에 일반 파일 생성과 같은 권한(0666 & ~umask)으로 맞춤
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+UPLOAD_FILE_MODE = 0o666 & ~_UMASK
 
 
-# [STEP 6-2] JSON 파일 저장
-def save_output_file(result, filename, model_name, OUTPUT_FOLDER):
+def spool_upload(uploaded_file, folder):
+    """
+    업로드 파일을 청크 단위로 읽으며 SHA-256 을 계산하고 같은 폴더의 임시 파일에 저장합니다.
+    파일 전체를 bytes 로 복사하지 않으므로 PDF 크기와 관계없이 메모리 사용량이 일정합니다.
+    (임시 파일 경로, 해시) 를 반환합니다.
+    """
+    os.makedirs(folder, exist_ok=True)
+    sha256_hash = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".part")
     try:
-        output_filename = generate_output_filename(filename, "output.json", model_name)
-        output_path = os.path.join(OUTPUT_FOLDER, output_filename)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
-        return output_path, None
-
-    except Exception as e:
-        print(f"[❌❌] JSON_FAILED : {filename}\nError : {e}")
-        return None, filename
+        uploaded_file.seek(0)
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter(lambda: uploaded_file.read(UPLOAD_CHUNK_SIZE), b""):
+                sha256_hash.update(chunk)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, UPLOAD_FILE_MODE)
+    except Exception:
+        os.remove(temp_path)
+        raise
+    return temp_path, sha256_hash.hexdigest()
 
 
-# 3. 해시 계산 함수 (SHA-256)
-def calculate_hash(file_bytes):
-    sha256_hash = hashlib.sha256()
-    sha256_hash.update(file_bytes)
-    return sha256_hash.hexdigest()
+def commit_upload(temp_path, save_path):
+    """
+    임시 파일을 최종 경로로 원자적으로 옮깁니다 (os.replace).
+    이미 같은 파일(같은 해시)이 있으면 임시 파일만 지우고 False 를 반환합니다.
+    """
+    if os.path.exists(save_path):
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, save_path)
+    return True
 
 
 # 4. 파일 저장 로직
 def save_paper(uploaded_file, upload_folder):
-    # 파일 내용을 바이트로 읽음
-    file_bytes = uploaded_file.getvalue()
-
-    # 해시 계산 (이것이 물리적 파일명이 됨)
-    file_hash = calculate_hash(file_bytes)
-    physical_filename = f"{file_hash}.pdf"
-    save_path = os.path.join(upload_folder, physical_filename)
-
     try:
+        # 해시 계산과 저장을 한 번에 (해시가 물리적 파일명이 됨)
+        temp_path, file_hash = spool_upload(uploaded_file, upload_folder)
+        physical_filename = f"{file_hash}.pdf"
+        save_path = os.path.join(upload_folder, physical_filename)
+
         # A. 물리적 파일 저장 (이미 존재하면 건너뜀)
-        if not os.path.exists(save_path):
-            with open(save_path, "wb") as f:
-                f.write(file_bytes)
+        if commit_upload(temp_path, save_path):
             # 새로운 파일: 경로, 중복아님(False)
             return save_path, False
         else:
@@ -1266,7 +1191,7 @@ def save_paper(uploaded_file, upload_folder):
 
 # [추가] 중복된 파일의 DB 정보를 가져오는 함수
 def get_duplicate_paper_info(pdf_filename):
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     try:
         # c_info 테이블에서 파일명이 일치하는 정보 조회
         # (테이블 구조에 따라 컬럼명이 다를 수 있으나, 코드 흐름상 PDF_FILE_NAME을 키로 사용한다고 가정)
@@ -1295,7 +1220,8 @@ def show_main_app_page():
             "is_duplicate", "last_json_path", "last_uploaded_pdf_path",
             "json_data", "a_paper_info", "c_paper_info",
             "a_paper_info_original", "c_paper_info_original",
-            "extraction_done", "editing", "show_save_success", "dup_confirm_state"
+            "extraction_done", "editing", "show_save_success", "dup_confirm_state",
+            "layout_job_id", "layout_job_pdf", "extract_job_id", "force_layout"
         ]
         for key in keys_to_reset:
             if key in st.session_state:
@@ -1387,44 +1313,76 @@ def show_main_app_page():
         if not st.session_state.get("last_json_path") or \
             os.path.basename(file_path).split(".")[0] not in st.session_state.get("last_json_path", ""):
 
-            with st.spinner("PDF 분석 중..."):
-                json_data, error = get_pdf_json(file_path, PDF_SERVICE_URL, REQUEST_TIMEOUT)
-
+            # [레이아웃 캐시] 같은 PDF를 이미 분석했으면 서비스를 다시 호출하지 않고 바로 사용
+            # [로컬 분석] 텍스트 레이어가 있는 PDF는 작업 큐/원격 서비스 없이 바로 분석
+            force_layout = st.session_state.get("force_layout", False)
+            job = None
+            if not force_layout and st.session_state.get("layout_job_pdf") != file_path:
+                # save_paper 가 <sha256>.pdf 로 저장하므로 파일명이 곧 해시 (다시 읽지 않음)
+                file_hash = os.path.splitext(os.path.basename(file_path))[0]
+                cached_json_path = get_cached_layout(file_hash, legacy_dir=upload_folder)
+                if cached_json_path:
+                    job = {"status": STATUS_DONE, "result": {"json_path": cached_json_path, "cached": True}}
+                else:
+                    local_json_path = analyze_locally(file_path, file_hash, upload_folder)
+                    if local_json_path:
+                        job = {"status": STATUS_DONE, "result": {"json_path": local_json_path, "local": True}}
+
+            if job is None:
+                # [작업 큐] 레이아웃 분석은 워커가 처리하고, 화면은 상태만 조회
+                if st.session_state.get("layout_job_pdf") != file_path:
+                    st.session_state.layout_job_id = enqueue_job(
+                        KIND_LAYOUT, {"pdf_path": file_path, "force": force_layout}
+                    )
+                    st.session_state.layout_job_pdf = file_path
+                job = wait_for_job(st.session_state.layout_job_id, "PDF 분석")
+                st.session_state.force_layout = False
             st.session_state.last_uploaded_pdf_path = file_path
 
-            if json_data:
-                json_filename = f"{os.path.splitext(os.path.basename(file_path))[0]}.json"
-                json_path = os.path.join(upload_folder, json_filename)
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(json_data, f, ensure_ascii=False, indent=4)
+            if job and job["status"] == STATUS_DONE:
+                json_path = job["result"]["json_path"]
+                json_filename = os.path.basename(json_path)
                 st.session_state.last_json_path = json_path
 
-                if st.session_state.get("is_duplicate"):
+                if job["result"].get("cached"):
+                    st.success(f"이전에 분석한 결과 '{json_filename}'를 재사용합니다.")
+                elif st.session_state.get("is_duplicate"):
                     st.success("기존 파일을 사용하여 분석을 완료했습니다.")
                 else:
                     st.success(f"PDF 분석 결과가 '{json_filename}'에 저장되었습니다.")
             else:
+                error = job["error"] if job else "작업 정보를 찾을 수 없습니다."
                 st.error(f"PDF 분석 실패: {error}")
 
     # 3. 서지정보 추출 버튼 및 결과 UI (기존 코드 유지)
+    if st.session_state.get("last_json_path") and not st.session_state.get("extraction_done"):
+        if st.button("🔄 강제 재분석", key="force_layout_btn", help="저장된 레이아웃 분석 결과를 무시하고 PDF를 다시 분석합니다."):
+            for key in ["last_json_path", "layout_job_id", "layout_job_pdf"]:
+                if key in st.session_state:
+                    del st.session_state[key]
+            st.session_state.force_layout = True
+            st.rerun()
+
     if st.session_state.get("last_json_path"):
         col_extract, col_reset1 = st.columns([0.7, 0.3])
         
         with col_extract:
             if st.button("서지정보 추출", key="extract_btn"):
-                with st.spinner("논문 서지정보 추출 중..."):
-                    json_data, a_info, c_info, fail_count, model_name = get_paper_df(st.session_state.last_json_path)
-                json_name = os.path.basename(st.session_state.last_json_path)
-                # output_path = save_output_file(json_data, json_name, model_name, os.path.dirname(st.session_state.last_uploaded_pdf_path))
-                output_path = save_output_file(json_data, json_name, model_name,resolve_folder)
+                st.session_state.extract_job_id = enqueue_job(KIND_EXTRACT, {"json_path": st.session_state.last_json_path})
+                st.rerun()
+
+            # [작업 큐] 서지정보 추출 결과 조회
+            if st.session_state.get("extract_job_id"):
+                job = wait_for_job(st.session_state.extract_job_id, "논문 서지정보 추출")
+                del st.session_state["extract_job_id"]
+                json_data, a_info, c_info, fail_count, model_name, output_path = job_result_to_paper_df(job)
 
-                
                 if c_info is not None:
                     # 파일명 정보 매핑
                     pdf_name = os.path.basename(st.session_state.last_uploaded_pdf_path)
                     ori_pdf_name = st.session_state.uploaded_file_name # 관리자 모드에서도 세션에 저장됨
                     json_name = os.path.basename(st.session_state.last_json_path)
-                    llm_json_name = os.path.basename(output_path[0])
+                    llm_json_name = os.path.basename(output_path)
                     
                     new_rows = pd.DataFrame([
                         {"Key": "ORI_FILE_NAME", "Value": ori_pdf_name},
@@ -1517,21 +1475,6 @@ def show_main_app_page():
                     edited_a.loc[edited_a['AUTHOR'] == selected_myself, '직원번호'] = st.session_state.username # <-- 추가됨
 
                     key_cols = ["PDF_FILE_NAME"]
-                    
-                    # 컬럼 확인 로직
-                    try:
-                        conn = sqlite3.connect(DB_FILE)
-                        cur = conn.cursor()
-                        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='a_info'")
-                        if cur.fetchone():
-                            cur.execute("PRAGMA table_info(a_info)")
-                            columns = [info[1] for info in cur.fetchall()]
-                            if '이름' not in columns:
-                                cur.execute("ALTER TABLE a_info ADD COLUMN 이름 TEXT")
-                                conn.commit()
-                        conn.close()
-                    except Exception as e:
-                        print(f"Column check error: {e}")
 
                     # [수정] 사용자 ID 전달
                     c_saved = update_or_add_paper_data(df_c_transposed, "c_info", key_cols, user_id=st.session_state.username)
@@ -1701,18 +1644,10 @@ def show_user_management_page():
 # [추가] 관리자용 전체 논문 조회 함수
 def get_all_papers():
     """관리자용: 전체 논문 리스트 조회 (c_info + a_info 저자/이름 통합)"""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_connection(DB_FILE)
     try:
-        # [수정] 저자(영문)와 이름(한글)을 모두 합쳐서 SEARCH_AUTHORS로 만듦
-        # IFNULL을 사용하여 NULL 값 처리 (SQLite 호환)
-        query = """
-            SELECT c.*, 
-                GROUP_CONCAT(IFNULL(a.AUTHOR, '') || ' ' || IFNULL(a.이름, ''), ', ') as SEARCH_AUTHORS
-            FROM c_info c
-            LEFT JOIN a_info a ON c.PDF_FILE_NAME = a.PDF_FILE_NAME
-            GROUP BY c.PDF_FILE_NAME
-            ORDER BY c.PUBLICATION_YEAR DESC, c.TITLE
-        """
+        # 저자(영문)와 이름(한글)을 모두 합쳐서 SEARCH_AUTHORS로 만듦
+        query = ALL_PAPERS_SQL
         df = pd.read_sql_query(query, conn)
         return df
     except Exception as e:
@@ -1721,6 +1656,66 @@ def get_all_papers():
     finally:
         conn.close()
 
+def search_papers(filters):
+    """관리자용: 검색 조건(논문명/키워드, 저자, 발행년도, 저널명, 부서)에 맞는 논문 리스트 (get_all_papers 와 같은 열, 관련도 순)"""
+    conn = get_connection(DB_FILE)
+    try:
+        query, params = paper_list_sql(
+            filters["title"], filters["author"], year=filters["year"], journal=filters["journal"],
+            dept=filters["dept"], use_fts=has_search_index(conn),
+        )
+        return pd.read_sql_query(query, conn, params=params)
+    except Exception as e:
+        st.error(f"논문 검색 중 오류: {e}")
+        return pd.DataFrame()
+    finally:
+        conn.close()
+
+def show_metrics_page():
+    """서지정보 추출 LLM 호출 통계(필드/모델별 지연 시간, 토큰, 비용)를 표시합니다."""
+    st.subheader("추출 통계")
+
+    period_options = {"최근 1일": 1, "최근 7일": 7, "최근 30일": 30, "전체": None}
+    period = st.selectbox("조회 기간", list(period_options.keys()), index=1)
+    try:
+        df = load_metrics(DB_FILE, days=period_options[period])
+    except Exception as e:
+        st.error(f"추출 통계 조회 중 오류: {e}")
+        return
+
+    if df.empty:
+        st.info("기록된 추출 통계가 없습니다.")
+        return
+
+    by_model = summarize_metrics(df, group_by=["model_name"])
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("LLM 요청 수", f"{by_model['requests'].sum():,.0f}")
+    col2.metric("캐시 적중률", f"{df['cache_hit'].mean():.1%}")
+    col3.metric("토큰 (입력/출력)", f"{int(by_model['prompt_tokens'].sum()):,} / {int(by_model['completion_tokens'].sum()):,}")
+    col4.metric("추정 비용 (USD)", f"${by_model['cost_usd'].sum():,.2f}")
+
+    column_config = {
+        "calls": "필드 호출 수",
+        "requests": st.column_config.NumberColumn("LLM 요청 수", format="%.1f"),
+        "cache_hit_rate": st.column_config.NumberColumn("캐시 적중률", format="%.2f"),
+        "error_rate": st.column_config.NumberColumn("오류율", format="%.2f"),
+        "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.0f"),
+        "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.0f"),
+        "prompt_tokens": "입력 토큰",
+        "completion_tokens": "출력 토큰",
+        "cost_usd": st.column_config.NumberColumn("비용 (USD)", format="%.4f"),
+    }
+
+    st.markdown("#### 모델별")
+    st.dataframe(by_model, use_container_width=True, hide_index=True, column_config=column_config)
+
+    st.markdown("#### 필드별")
+    st.dataframe(summarize_metrics(df), use_container_width=True, hide_index=True, column_config=column_config)
+
+    with st.expander("결과 분포 (outcome)"):
+        outcome_df = df.groupby(["model_name", "outcome"]).size().unstack(fill_value=0)
+        st.dataframe(outcome_df, use_container_width=True)
+
 # [수정] 통계 대시보드 표시 함수
 def show_dashboard(df, is_admin=False):
     # --- 스타일 설정 ---
@@ -1913,7 +1908,7 @@ def show_dashboard(df, is_admin=False):
             # 관리자 모드: 저자별 통계
             st.markdown("#### 👨‍🔬 전체 저자 활동 순위")
             try:
-                conn = sqlite3.connect(DB_FILE)
+                conn = get_connection(DB_FILE)
                 q = """
                     SELECT AUTHOR as '저자명', COUNT(*) as '논문수',
                     SUM(CASE WHEN ROLE='FIRST_AUTHOR' THEN 1 ELSE 0 END) as '1저자',
@@ -2033,16 +2028,28 @@ def show_my_papers_page():
     if "admin_edit_target_pdf" not in st.session_state:
         st.session_state.admin_edit_target_pdf = None
 
-    # 2. 데이터 가져오기
+    # 2. 데이터 가져오기 (검색 조건이 있으면 조건에 맞는 논문만 DB에서 조회, 전체 목록은 조건이 없을 때만)
+    f = st.session_state.search_filters
+    filters = None
+    if f["applied"]:
+        filters = {
+            "title": f["title"],
+            "author": f["author"] if is_admin else "",
+            "year": None if f["year"] == "전체" else f["year"],
+            "journal": None if f["journal"] == "전체" else f["journal"],
+            "dept": None if not is_admin or f["dept"] == "전체" else f["dept"],
+        }
+        if not any(filters.values()):
+            filters = None
     if is_admin:
-        df_base = get_all_papers()
+        df_base = search_papers(filters) if filters else get_all_papers()
         display_cols = ['TITLE', 'PUBLICATION_YEAR', 'JOURNAL_NAME', 'SEARCH_AUTHORS', 'DOI', 'PDF_FILE_NAME']
     else:
         user_data = get_user_by_id(st.session_state.username)
         if user_data:
             user_name = user_data[0] 
             user_id = user_data[1] 
-            df_base = get_my_papers(user_name, user_id)
+            df_base = get_my_papers(user_name, user_id, filters)
             display_cols = ['AUTHOR', 'ROLE', 'AFFILIATION', 'TITLE', 'PUBLICATION_YEAR', 'JOURNAL_NAME', 'DOI', 'PDF_FILE_NAME']
         else:
             st.error("사용자 프로필 정보를 불러올 수 없습니다.")
@@ -2065,7 +2072,7 @@ def show_my_papers_page():
                 if is_admin:
                     col1, col2, col3 = st.columns([1.5, 1, 1])
                     with col1:
-                        search_title = st.text_input("논문명 (포함 검색)", value=st.session_state.search_filters["title"])
+                        search_title = st.text_input("논문명/키워드 (포함 검색)", value=st.session_state.search_filters["title"])
                     with col2:
                         search_author = st.text_input("저자명", value=st.session_state.search_filters["author"])
                     with col3:
@@ -2085,7 +2092,7 @@ def show_my_papers_page():
                 else:
                     col1, col2, col3 = st.columns([2, 1, 1])
                     with col1:
-                        search_title = st.text_input("논문명 (포함 검색)", value=st.session_state.search_filters["title"])
+                        search_title = st.text_input("논문명/키워드 (포함 검색)", value=st.session_state.search_filters["title"])
                     with col2:
                         curr_yr = st.session_state.search_filters["year"]
                         idx_yr = years.index(curr_yr) if curr_yr in years else 0
@@ -2125,40 +2132,7 @@ def show_my_papers_page():
                 st.session_state.admin_paper_editing = False
                 st.rerun()
 
-        # 데이터 필터링 로직
         df_view = df_base.copy()
-        if not df_view.empty and st.session_state.search_filters["applied"]:
-            f = st.session_state.search_filters
-            if f["title"]:
-                df_view = df_view[df_view['TITLE'].str.contains(f["title"], case=False, na=False)]
-            if f["year"] != "전체":
-                df_view = df_view[df_view['PUBLICATION_YEAR'].astype(str) == f["year"]]
-            if f["journal"] != "전체":
-                df_view = df_view[df_view['JOURNAL_NAME'] == f["journal"]]
-            if is_admin and f["author"]:
-                if 'SEARCH_AUTHORS' in df_view.columns:
-                    df_view = df_view[df_view['SEARCH_AUTHORS'].str.contains(f["author"], case=False, na=False)]
-                elif 'AUTHOR_LIST' in df_view.columns:
-                    df_view = df_view[df_view['AUTHOR_LIST'].str.contains(f["author"], case=False, na=False)]
-            if is_admin and f["dept"] != "전체":
-                try:
-                    conn = sqlite3.connect(DB_FILE)
-                    cur = conn.cursor()
-                    cur.execute("SELECT id FROM user_info WHERE dep = ?", (f["dept"],))
-                    dept_user_ids = [row[0] for row in cur.fetchall()]
-                    conn.close()
-                    if dept_user_ids:
-                        conn = sqlite3.connect(DB_FILE)
-                        placeholders = ','.join(['?'] * len(dept_user_ids))
-                        q_paper = f"SELECT DISTINCT PDF_FILE_NAME FROM a_info WHERE 직원번호 IN ({placeholders})"
-                        target_pdfs_df = pd.read_sql_query(q_paper, conn, params=tuple(dept_user_ids))
-                        conn.close()
-                        target_pdfs = target_pdfs_df['PDF_FILE_NAME'].tolist()
-                        df_view = df_view[df_view['PDF_FILE_NAME'].isin(target_pdfs)]
-                    else:
-                        df_view = pd.DataFrame() 
-                except Exception as e:
-                    st.error(f"부서 검색 오류: {e}")
 
         # 결과 리스트 출력
         if df_view.empty:
@@ -2260,32 +2234,26 @@ def show_my_papers_page():
                         new_pdf = st.file_uploader("교체할 PDF 업로드", type=["pdf"], key="change_pdf_uploader")
                         
                         if new_pdf:
-                            file_bytes = new_pdf.getvalue()
-                            file_hash = calculate_hash(file_bytes)
+                            temp_path, file_hash = spool_upload(new_pdf, upload_folder)
                             new_pdf_filename = f"{file_hash}.pdf"
                             save_path = os.path.join(upload_folder, new_pdf_filename)
-                            if not os.path.exists(save_path):
-                                with open(save_path, "wb") as f:
-                                    f.write(file_bytes)
+                            commit_upload(temp_path, save_path)
                             
                             try:
-                                conn = sqlite3.connect(DB_FILE)
-                                cur = conn.cursor()
                                 save_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                                 user_info = get_user_by_id(st.session_state.username)
                                 u_id = st.session_state.username
                                 u_author = user_info[0] if user_info else ""
                                 
-                                cur.execute(
-                                    """
-                                    INSERT INTO u_info 
-                                    (ORI_FILE_NAME, PDF_FILE_NAME, AUTHOR, ROLE, EMAIL, DONE, SAVE_DATE, ID, OLD_FILE_NAME) 
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                    """,
-                                    (new_pdf.name, new_pdf_filename, u_author, "PDF_CHANGE_REQUEST", "", 0, save_date, u_id, pdf_fname)
-                                )
-                                conn.commit()
-                                conn.close()
+                                with transaction(DB_FILE) as conn:
+                                    conn.execute(
+                                        """
+                                        INSERT INTO u_info 
+                                        (ORI_FILE_NAME, PDF_FILE_NAME, AUTHOR, ROLE, EMAIL, DONE, SAVE_DATE, ID, OLD_FILE_NAME) 
+                                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                        """,
+                                        (new_pdf.name, new_pdf_filename, u_author, "PDF_CHANGE_REQUEST", "", 0, save_date, u_id, pdf_fname)
+                                    )
                                 st.success("✅ 변경 요청이 접수처리(관리자) 신청되었습니다.")
                                 st.session_state.change_pdf_mode = False 
                             except Exception as e:
@@ -2296,8 +2264,9 @@ def show_my_papers_page():
                     st.markdown("---")
                     st.markdown(f"#### ✏️ 논문 정보 편집: {title}")
                     st.info("💡 'c_info'(서지정보)와 'a_info'(저자정보)를 직접 수정할 수 있습니다.")
+                    show_visualization_button(pdf_fname, "admin_edit")
 
-                    conn = sqlite3.connect(DB_FILE)
+                    conn = get_connection(DB_FILE)
                     try:
                         c_query = "SELECT * FROM c_info WHERE PDF_FILE_NAME = ?"
                         c_df_edit = pd.read_sql_query(c_query, conn, params=(pdf_fname,))
@@ -2376,24 +2345,28 @@ def show_my_papers_page():
                     with col_delete:
                         if st.button("🗑️ 삭제 (파일 포함)", type="primary", use_container_width=True):
                             try:
-                                conn = sqlite3.connect(DB_FILE)
-                                cur = conn.cursor()
-                                
                                 # 1. DB 삭제
-                                cur.execute("DELETE FROM c_info WHERE PDF_FILE_NAME = ?", (pdf_fname,))
-                                cur.execute("DELETE FROM a_info WHERE PDF_FILE_NAME = ?", (pdf_fname,))
-                                conn.commit()
+                                with transaction(DB_FILE) as conn:
+                                    conn.execute("DELETE FROM c_info WHERE PDF_FILE_NAME = ?", (pdf_fname,))
+                                    conn.execute("DELETE FROM a_info WHERE PDF_FILE_NAME = ?", (pdf_fname,))
                                 
                                 # 2. 파일 삭제
                                 pdf_path = os.path.join(upload_folder, pdf_fname)
                                 if os.path.exists(pdf_path):
                                     os.remove(pdf_path)
                                 
-                                json_fname = f"{os.path.splitext(pdf_fname)[0]}.json"
-                                json_path = os.path.join(upload_folder, json_fname)
-                                if os.path.exists(json_path):
-                                    os.remove(json_path)
+                                for json_ext in (".json", LAYOUT_EXT):
+                                    json_path = os.path.join(upload_folder, f"{os.path.splitext(pdf_fname)[0]}{json_ext}")
+                                    if os.path.exists(json_path):
+                                        os.remove(json_path)
+                                local_json_path = os.path.join(
+                                    upload_folder, LOCAL_LAYOUT_SUBDIR, f"{os.path.splitext(pdf_fname)[0]}{LAYOUT_EXT}"
+                                )
+                                if os.path.exists(local_json_path):
+                                    os.remove(local_json_path)
                                 
+                                remove_visualization(os.path.splitext(pdf_fname)[0])
+
                                 if os.path.exists(resolve_folder):
                                     file_hash = os.path.splitext(pdf_fname)[0]
                                     for f in os.listdir(resolve_folder):
@@ -2401,8 +2374,6 @@ def show_my_papers_page():
                                             try: os.remove(os.path.join(resolve_folder, f))
                                             except: pass
 
-                                conn.close()
-                                
                                 st.success(f"삭제 성공 : {title}")
                                 st.session_state.admin_paper_editing = False
                                 st.rerun()
@@ -3926,7 +3897,7 @@ def show_my_info_page():
     # [수정] 이미 동기화가 수행되었는지 확인 (False/None일 때만 실행)
     if not st.session_state.get("hname_auto_synced"):
         try:
-            conn = sqlite3.connect(DB_FILE)
+            conn = get_connection(DB_FILE)
             cur = conn.cursor()
             
             # 내 논문(a_info)에서 사용된 저자명(AUTHOR) 추출
@@ -3988,7 +3959,7 @@ def show_my_info_page():
 
         col1, col2, _ = st.columns([0.2, 0.2, 0.6])
         if col1.form_submit_button("변경완료"):
-            conn = sqlite3.connect(DB_FILE)
+            conn = get_connection(DB_FILE)
             c = conn.cursor()
             try:
                 current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -4078,7 +4049,7 @@ def show_my_info_page():
             names.extend([None]*4)
             try:
                 current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                conn = sqlite3.connect(DB_FILE)
+                conn = get_connection(DB_FILE)
                 conn.execute(
                     "UPDATE user_info SET hname1=?, hname2=?, hname3=?, hname4=?, MOD_DT=?, MOD_ID=? WHERE id=?", 
                     (*names[:4], current_time, st.session_state.username, st.session_state.username)
@@ -4194,13 +4165,11 @@ def show_my_info_page():
                             if updated:
                                 try:
                                     current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                    conn = sqlite3.connect(DB_FILE)
-                                    conn.execute(
-                                        "UPDATE user_info SET hname1=?, hname2=?, hname3=?, hname4=?, MOD_DT=?, MOD_ID=? WHERE id=?", 
-                                        (*updated_hnames, current_time, st.session_state.username, st.session_state.username)
-                                    )
-                                    conn.commit()
-                                    conn.close()
+                                    with transaction(DB_FILE) as conn:
+                                        conn.execute(
+                                            "UPDATE user_info SET hname1=?, hname2=?, hname3=?, hname4=?, MOD_DT=?, MOD_ID=? WHERE id=?", 
+                                            (*updated_hnames, current_time, st.session_state.username, st.session_state.username)
+                                        )
                                     st.session_state.eng_name_inputs = [name if name else "" for name in updated_hnames]
                                     st.success(f"추가되었습니다.")
                                     st.rerun()
@@ -4407,15 +4376,8 @@ def show_receipt_processing_page():
     )
 
     # 2. 데이터 가져오기
-    conn = sqlite3.connect(DB_FILE)
-    query_base = "SELECT * FROM u_info"
-    
-    if filter_option == "처리전":
-        query = query_base + " WHERE DONE = 0 OR DONE = '0' ORDER BY SAVE_DATE ASC"
-    elif filter_option == "처리완료":
-        query = query_base + " WHERE DONE >= 1 OR DONE = '1' OR DONE = '2' ORDER BY SAVE_DATE ASC"
-    else:
-        query = query_base + " ORDER BY SAVE_DATE ASC"
+    conn = get_connection(DB_FILE)
+    query = RECEIPT_SQL.get(filter_option, RECEIPT_SQL["전체"])
     
     try:
         df = pd.read_sql_query(query, conn)
@@ -4474,7 +4436,7 @@ def show_receipt_processing_page():
                                 try:
                                     pdf_list = valid_targets['PDF_FILE_NAME'].tolist()
                                     if pdf_list:
-                                        conn = sqlite3.connect(DB_FILE)
+                                        conn = get_connection(DB_FILE)
                                         placeholders = ','.join(['?'] * len(pdf_list))
                                         title_query = f"SELECT PDF_FILE_NAME, TITLE FROM c_info WHERE PDF_FILE_NAME IN ({placeholders})"
                                         title_df = pd.read_sql_query(title_query, conn, params=tuple(pdf_list))
@@ -4506,7 +4468,7 @@ def show_receipt_processing_page():
                                 
                                 success_count = 0
                                 fail_log = []
-                                conn = sqlite3.connect(DB_FILE)
+                                conn = get_connection(DB_FILE)
                                 cur = conn.cursor()
                                 
                                 try:
@@ -4544,7 +4506,7 @@ def show_receipt_processing_page():
         # [버튼 2] 삭제
         with col_btn2:
             if st.button("🗑️ 선택된 항목 삭제", type="primary"):
-                conn = sqlite3.connect(DB_FILE)
+                conn = get_connection(DB_FILE)
                 cur = conn.cursor()
                 deleted_count = 0
                 
@@ -4588,59 +4550,63 @@ def show_receipt_processing_page():
         st.markdown("---")
         st.markdown(f"##### 🔍 단일 항목 분석: {target_ori_name}")
         
+        force_layout = st.checkbox("강제 재분석", key="receipt_force_layout",
+                                   help="저장된 레이아웃 분석 결과를 무시하고 PDF를 다시 분석합니다.")
         if st.button("서지정보 분석 (단일 항목)"):
             file_path = os.path.join(upload_folder, target_pdf_name)
             if os.path.exists(file_path):
-                with st.spinner("PDF 분석 및 서지정보 추출 중..."):
-                    # 1) PDF -> JSON
-                    json_data, error = get_pdf_json(file_path, PDF_SERVICE_URL, REQUEST_TIMEOUT)
+                # [작업 큐] PDF -> JSON -> 서지정보 를 워커에서 처리 (레이아웃은 캐시가 있으면 재사용)
+                st.session_state.receipt_job_id = enqueue_job(
+                    KIND_ANALYZE, {"pdf_path": file_path, "force": force_layout}
+                )
+                st.session_state.receipt_job_pdf = target_pdf_name
+                st.rerun()
+            else:
+                st.error("파일 없음")
+        show_visualization_button(target_pdf_name, "receipt")
+
+        if st.session_state.get("receipt_job_id") and st.session_state.get("receipt_job_pdf") == target_pdf_name:
+            job = wait_for_job(st.session_state.receipt_job_id, "PDF 분석 및 서지정보 추출")
+            del st.session_state["receipt_job_id"]
+            if job and job["status"] == STATUS_DONE:
+                json_data, a_info, c_info, fail_count, model_name, output_path = job_result_to_paper_df(job)
+                json_filename = os.path.basename(job["result"]["json_path"])
+                llm_json_name = os.path.basename(output_path) if output_path else ""
+
+                if c_info is not None:
+                    new_rows = pd.DataFrame([
+                        {"Key": "ORI_FILE_NAME", "Value": target_ori_name},
+                        {"Key": "PDF_FILE_NAME", "Value": target_pdf_name},
+                        {"Key": "JSON_FILE_NAME", "Value": json_filename},
+                        {"Key": "LLM_JSON_FILE_NAME", "Value": llm_json_name},
+                    ])
+                    c_info = pd.concat([c_info.drop(14, errors="ignore"), new_rows], ignore_index=True)
                     
-                    if json_data:
-                        json_filename = f"{os.path.splitext(target_pdf_name)[0]}.json"
-                        json_path = os.path.join(upload_folder, json_filename)
-                        with open(json_path, "w", encoding="utf-8") as f:
-                            json.dump(json_data, f, ensure_ascii=False, indent=4)
-                        
-                        # 2) JSON -> 서지정보
-                        json_data, a_info, c_info, fail_count, model_name = get_paper_df(json_path)
-                        output_path = save_output_file(json_data, json_filename, model_name, resolve_folder)
-                        llm_json_name = os.path.basename(output_path[0])
-
-                        if c_info is not None:
-                            new_rows = pd.DataFrame([
-                                {"Key": "ORI_FILE_NAME", "Value": target_ori_name},
-                                {"Key": "PDF_FILE_NAME", "Value": target_pdf_name},
-                                {"Key": "JSON_FILE_NAME", "Value": json_filename},
-                                {"Key": "LLM_JSON_FILE_NAME", "Value": llm_json_name},
-                            ])
-                            c_info = pd.concat([c_info.drop(14, errors="ignore"), new_rows], ignore_index=True)
-                            
-                            a_info["ORI_FILE_NAME"] = target_ori_name
-                            a_info["PDF_FILE_NAME"] = target_pdf_name
-                            a_info["JSON_FILE_NAME"] = json_filename
-                            a_info["LLM_JSON_FILE_NAME"] = llm_json_name
-                            
-                            if '이름' not in a_info.columns:
-                                a_info['이름'] = None
+                    a_info["ORI_FILE_NAME"] = target_ori_name
+                    a_info["PDF_FILE_NAME"] = target_pdf_name
+                    a_info["JSON_FILE_NAME"] = json_filename
+                    a_info["LLM_JSON_FILE_NAME"] = llm_json_name
+                    
+                    if '이름' not in a_info.columns:
+                        a_info['이름'] = None
 
-                            a_info = a_info[['AUTHOR', 'AFFILIATION', 'ROLE', '이름', 'ORI_FILE_NAME','PDF_FILE_NAME', 'JSON_FILE_NAME','LLM_JSON_FILE_NAME']]
-                            
-                            st.session_state.receipt_c_info = c_info
-                            st.session_state.receipt_a_info = a_info
-                            st.session_state.receipt_c_info_original = c_info.copy()
-                            st.session_state.receipt_a_info_original = a_info.copy()
-                            
-                            st.session_state.receipt_target_pdf = target_pdf_name
-                            st.session_state.receipt_target_author = target_author_name
-                            st.session_state.receipt_analysis_done = True
-                            st.session_state.receipt_editing = False 
-                            st.rerun()
-                        else:
-                            st.error(f"서지정보 추출 실패. {fail_count}")
-                    else:
-                        st.error(f"분석 실패: {error}")
+                    a_info = a_info[['AUTHOR', 'AFFILIATION', 'ROLE', '이름', 'ORI_FILE_NAME','PDF_FILE_NAME', 'JSON_FILE_NAME','LLM_JSON_FILE_NAME']]
+                    
+                    st.session_state.receipt_c_info = c_info
+                    st.session_state.receipt_a_info = a_info
+                    st.session_state.receipt_c_info_original = c_info.copy()
+                    st.session_state.receipt_a_info_original = a_info.copy()
+                    
+                    st.session_state.receipt_target_pdf = target_pdf_name
+                    st.session_state.receipt_target_author = target_author_name
+                    st.session_state.receipt_analysis_done = True
+                    st.session_state.receipt_editing = False 
+                    st.rerun()
+                else:
+                    st.error(f"서지정보 추출 실패. {fail_count}")
             else:
-                st.error("파일 없음")
+                error = job["error"] if job else "작업 정보를 찾을 수 없습니다."
+                st.error(f"분석 실패: {error}")
 
     # 6. 분석 결과 표시 및 처리
     if st.session_state.get("receipt_analysis_done") and st.session_state.get("receipt_target_pdf"):
@@ -4726,16 +4692,6 @@ def show_receipt_processing_page():
                             df_a_to_save.loc[mask, '직원번호'] = str(target_user_id)
 
                     key_cols = ["PDF_FILE_NAME"]
-                    try:
-                        conn = sqlite3.connect(DB_FILE)
-                        cur = conn.cursor()
-                        cur.execute("PRAGMA table_info(a_info)")
-                        columns = [info[1] for info in cur.fetchall()]
-                        if '이름' not in columns: cur.execute("ALTER TABLE a_info ADD COLUMN 이름 TEXT")
-                        if '직원번호' not in columns: cur.execute("ALTER TABLE a_info ADD COLUMN 직원번호 TEXT")
-                        conn.commit()
-                        conn.close()
-                    except Exception as e: print(f"Column check error: {e}")
 
                     # [수정] user_id 전달하여 이력 관리 (접수처리는 관리자만 하므로 'AD00000' 혹은 현재 로그인 유저)
                     c_saved = update_or_add_paper_data(df_c_transposed, "c_info", key_cols, user_id=st.session_state.username)
@@ -4743,7 +4699,7 @@ def show_receipt_processing_page():
                     
                     if c_saved and a_saved:
                         try:
-                            conn = sqlite3.connect(DB_FILE)
+                            conn = get_connection(DB_FILE)
                             cur = conn.cursor()
                             cur.execute("UPDATE u_info SET DONE = 1 WHERE PDF_FILE_NAME = ?", (st.session_state.receipt_target_pdf,))
                             conn.commit()
@@ -4816,6 +4772,7 @@ def main():
         elif p == "my_papers": show_my_papers_page()
         elif p == "my_info": show_my_info_page()
         elif p == "user_management" and st.session_state.username == "AD00000": show_user_management_page()
+        elif p == "metrics" and st.session_state.username == "AD00000": show_metrics_page()
         elif p == "settings": show_settings_page()
         else: 
             st.session_state.page = "upload"
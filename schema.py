@@ -0,0 +1,601 @@
+import re
+import time
+import sqlite3
+import datetime
+from db import get_connection
+
+# --- paper.db 스키마 마이그레이션, 보조 인덱스, 화면 조회 쿼리 ---
+# 스키마 변경은 MIGRATIONS 에 번호 순으로 추가합니다. migrate() 는 schema_version 테이블에
+# 기록되지 않은 단계만 한 번씩 적용하며, 앱(main.py)은 프로세스 시작 시 한 번만 호출합니다.
+# 화면마다 PDF_FILE_NAME 으로 c_info/a_info 를 조인하고 직원번호, 이름, AUTHOR, dep, DONE 으로 거릅니다.
+# 아래 인덱스로 저자 행이 많아져도 전체 테이블을 읽지 않게 하고, 제목/저자 부분 일치 검색은 FTS5 색인을 씁니다.
+# 조회 쿼리는 여기 모아 두어 util/check_query_plans.py 로 실행 계획을 확인합니다.
+C_INFO_PDF_UNIQUE_INDEX = "ux_c_info_pdf_file_name"
+A_INFO_AUTHOR_UNIQUE_INDEX = "ux_a_info_author_key"
+
+# 업서트(upsert.py) 충돌 판정 키. 각 테이블의 고유 인덱스와 같은 식이어야 ON CONFLICT 가 동작합니다.
+# 저자 1명 = (논문, 저자, 소속) 1행. AUTHOR/AFFILIATION 이 NULL 인 행도 '' 와 같은 키로 봅니다.
+UPSERT_KEYS = {
+    "c_info": ("PDF_FILE_NAME",),
+    "a_info": ("PDF_FILE_NAME", "AUTHOR", "AFFILIATION"),
+}
+EMPTY_IF_NULL_KEYS = ("AUTHOR", "AFFILIATION")
+
+# 저자 지정(내 논문/접수 처리)으로 채우는 a_info 컬럼
+A_INFO_MEMBER_COLUMNS = ("직원번호", "이름", "소속", "부서")
+
+# 전문 검색(FTS5) 색인: {색인 테이블: (원본 테이블, 색인 컬럼)}
+# 원본 행의 rowid 를 그대로 쓰는 external content 테이블이며, 원본 변경은 트리거로 반영합니다.
+# (rowid 가 바뀌면 migrate() 시작 시 search_index_drift 로 찾아 다시 채움)
+# trigram 토크나이저라서 검색어가 3글자 이상이면 부분 일치(LIKE '%검색어%')와 같은 결과를 색인으로 찾습니다.
+FTS_TABLES = {
+    "c_info_fts": ("c_info", ("TITLE", "KEYWORDS", "JOURNAL_NAME")),
+    "a_info_fts": ("a_info", ("AUTHOR", "AFFILIATION", "이름")),
+}
+TRIGRAM_MIN_CHARS = 3
+
+INDEXES = (
+    # 논문 1건 = c_info 1행 (중복 행은 ensure_indexes 에서 정리 후 생성)
+    f'CREATE UNIQUE INDEX IF NOT EXISTS "{C_INFO_PDF_UNIQUE_INDEX}" ON "c_info" ("PDF_FILE_NAME")',
+    'CREATE INDEX IF NOT EXISTS "idx_c_info_year" ON "c_info" ("PUBLICATION_YEAR")',
+    'CREATE INDEX IF NOT EXISTS "idx_c_info_journal" ON "c_info" ("JOURNAL_NAME")',
+    # c_info 조인, 논문 단위 조회/삭제, 저자 지정(claim_my_paper)
+    'CREATE INDEX IF NOT EXISTS "idx_a_info_pdf" ON "a_info" ("PDF_FILE_NAME", "AUTHOR", "AFFILIATION")',
+    # 내 논문(직원번호 + 이름), 부서별 논문(직원번호 IN ...)
+    'CREATE INDEX IF NOT EXISTS "idx_a_info_emp" ON "a_info" ("직원번호", "이름", "PDF_FILE_NAME")',
+    # 저자 이름 검색: 부분 일치(LIKE)는 이 인덱스만 훑음 (테이블보다 훨씬 작음)
+    'CREATE INDEX IF NOT EXISTS "idx_a_info_author" ON "a_info" ("AUTHOR", "이름")',
+    'CREATE INDEX IF NOT EXISTS "idx_a_info_name" ON "a_info" ("이름")',
+    'CREATE INDEX IF NOT EXISTS "idx_user_info_name" ON "user_info" ("name")',
+    'CREATE INDEX IF NOT EXISTS "idx_user_info_dep" ON "user_info" ("dep")',
+    # 접수 처리 목록 (처리 상태별, 등록일 순)
+    'CREATE INDEX IF NOT EXISTS "idx_u_info_done" ON "u_info" ("DONE", "SAVE_DATE")',
+    'CREATE INDEX IF NOT EXISTS "idx_u_info_pdf" ON "u_info" ("PDF_FILE_NAME")',
+)
+
+
+# --- 화면 조회 쿼리 ---
+MY_PAPERS_SQL = """
+    SELECT c.*, a.AUTHOR, a.ROLE, a.AFFILIATION, a.이름
+    FROM a_info a
+    JOIN c_info c ON a.PDF_FILE_NAME = c.PDF_FILE_NAME
+    WHERE a.이름 = ?
+        AND a.직원번호 = ?
+    ORDER BY c.PUBLICATION_YEAR, c.TITLE, a.AUTHOR, a.ROLE
+"""
+
+# 저자(영문)와 이름(한글)을 모두 합쳐서 SEARCH_AUTHORS 로 만듦 (IFNULL 로 NULL 처리)
+ALL_PAPERS_SQL = """
+    SELECT c.*,
+        GROUP_CONCAT(IFNULL(a.AUTHOR, '') || ' ' || IFNULL(a.이름, ''), ', ') as SEARCH_AUTHORS
+    FROM c_info c
+    LEFT JOIN a_info a ON c.PDF_FILE_NAME = a.PDF_FILE_NAME
+    GROUP BY c.PDF_FILE_NAME
+    ORDER BY c.PUBLICATION_YEAR DESC, c.TITLE
+"""
+
+# DONE 은 TEXT 컬럼이므로 DONE >= 1 은 DONE >= '1' 과 같음 ('1', '2' 포함). 범위 조건 하나로 써야 인덱스를 사용
+RECEIPT_SQL = {
+    "처리전": "SELECT * FROM u_info WHERE DONE = 0 OR DONE = '0' ORDER BY SAVE_DATE ASC",
+    "처리완료": "SELECT * FROM u_info WHERE DONE >= '1' ORDER BY SAVE_DATE ASC",
+    "전체": "SELECT * FROM u_info ORDER BY SAVE_DATE ASC",
+}
+
+
+def author_search_sql(name_variations, korean_name=None, use_fts=True):
+    """
+    (쿼리, 파라미터): 영문 이름 변형(부분 일치, 대소문자 무시) OR 한글 이름(일치)으로 저자를 찾고 c_info 를 결합합니다.
+    영문 이름은 a_info_fts 색인으로 찾고 관련도(bm25) 순으로 정렬합니다. 한글 이름은 idx_a_info_name 으로 찾습니다.
+    """
+    extra = [("SELECT rowid, 0 AS score FROM a_info WHERE 이름 = ?", (korean_name,))] if korean_name else []
+    matched, params = fts_search_sql("a_info_fts", name_variations, ("AUTHOR",), use_fts, extra)
+    if matched is None:
+        return None, []
+    sql = f"""
+        SELECT a.AUTHOR, a.ROLE, a.AFFILIATION, a.이름, a.직원번호, c.*
+        FROM ({matched}) m
+        JOIN a_info a ON a.rowid = m.rowid
+        LEFT JOIN c_info c ON a.PDF_FILE_NAME = c.PDF_FILE_NAME
+        ORDER BY m.score, c.PUBLICATION_YEAR, c.TITLE, a.AUTHOR, a.ROLE
+    """
+    return sql, params
+
+
+def paper_search_sql(title="", author="", use_fts=True):
+    """
+    (쿼리, 파라미터): 논문명/키워드(title)와 저자 영문/한글 이름(author) 부분 일치 조건을 모두 만족하는
+    논문의 PDF_FILE_NAME 과 점수(score)를 관련도 순으로 반환합니다. 조건이 없으면 (None, []).
+    """
+    subqueries, params = [], []
+    if title:
+        matched, title_params = fts_search_sql("c_info_fts", [title], ("TITLE", "KEYWORDS"), use_fts)
+        subqueries.append(f"SELECT c.PDF_FILE_NAME, m.score FROM ({matched}) m JOIN c_info c ON c.rowid = m.rowid")
+        params += title_params
+    if author:
+        matched, author_params = fts_search_sql("a_info_fts", [author], ("AUTHOR", "이름"), use_fts)
+        subqueries.append(
+            f"SELECT a.PDF_FILE_NAME, MIN(m.score) AS score FROM ({matched}) m "
+            "JOIN a_info a ON a.rowid = m.rowid GROUP BY a.PDF_FILE_NAME"
+        )
+        params += author_params
+    if not subqueries:
+        return None, []
+    if len(subqueries) == 1:
+        return f"SELECT PDF_FILE_NAME, score FROM ({subqueries[0]}) ORDER BY score", params
+    sql = f"""
+        SELECT t.PDF_FILE_NAME, t.score + a.score AS score
+        FROM ({subqueries[0]}) t
+        JOIN ({subqueries[1]}) a ON a.PDF_FILE_NAME = t.PDF_FILE_NAME
+        ORDER BY score
+    """
+    return sql, params
+
+
+def paper_list_sql(title="", author="", year=None, journal=None, dept=None, member=None, use_fts=True):
+    """
+    (쿼리, 파라미터): 논문 목록 화면의 검색 결과. member=(이름, 직원번호) 이면 MY_PAPERS_SQL, 아니면 ALL_PAPERS_SQL 과 같은 열.
+    논문명/키워드(title), 저자(author) 검색어가 있으면 paper_search_sql 결과와 조인하여 관련도 순으로 정렬하고,
+    발행년도(year), 저널명(journal), 부서(dept, 직원정보 기준) 조건도 쿼리에서 거릅니다.
+    """
+    matched, params = paper_search_sql(title, author, use_fts)
+    conditions, where_params = [], []
+    if member:
+        select = "SELECT c.*, a.AUTHOR, a.ROLE, a.AFFILIATION, a.이름"
+        source = "a_info a JOIN c_info c ON a.PDF_FILE_NAME = c.PDF_FILE_NAME"
+        order = "c.PUBLICATION_YEAR, c.TITLE, a.AUTHOR, a.ROLE"
+        conditions += ["a.이름 = ?", "a.직원번호 = ?"]
+        where_params += list(member)
+    else:
+        select = (
+            "SELECT c.*, (SELECT GROUP_CONCAT(IFNULL(a.AUTHOR, '') || ' ' || IFNULL(a.이름, ''), ', ') "
+            "FROM a_info a WHERE a.PDF_FILE_NAME = c.PDF_FILE_NAME) AS SEARCH_AUTHORS"
+        )
+        source = "c_info c"
+        order = "c.PUBLICATION_YEAR DESC, c.TITLE"
+    if matched:
+        source = f"({matched}) m JOIN {source}"
+        conditions.append("c.PDF_FILE_NAME = m.PDF_FILE_NAME")
+        order = f"m.score, {order}"
+    if year:
+        conditions.append("c.PUBLICATION_YEAR = ?")
+        where_params.append(year)
+    if journal:
+        conditions.append("c.JOURNAL_NAME = ?")
+        where_params.append(journal)
+    if dept:
+        conditions.append(
+            "c.PDF_FILE_NAME IN (SELECT d.PDF_FILE_NAME FROM a_info d "
+            "WHERE d.직원번호 IN (SELECT id FROM user_info WHERE dep = ?))"
+        )
+        where_params.append(dept)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{select} FROM {source} {where} ORDER BY {order}", params + where_params
+
+
+def dedupe_c_info(conn):
+    """PDF_FILE_NAME 이 같은 c_info 행 중 가장 나중에 저장된 행만 남기고 지운 행 수를 반환합니다."""
+    cur = conn.execute(
+        """
+        DELETE FROM c_info
+        WHERE PDF_FILE_NAME IS NOT NULL AND rowid NOT IN (
+            SELECT MAX(rowid) FROM c_info WHERE PDF_FILE_NAME IS NOT NULL GROUP BY PDF_FILE_NAME
+        )
+    """
+    )
+    return cur.rowcount
+
+
+def ensure_indexes(conn):
+    """INDEXES 를 만듭니다. c_info 고유 인덱스를 처음 만들 때는 중복 논문 행을 먼저 정리합니다. (커밋은 호출하는 쪽)"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (C_INFO_PDF_UNIQUE_INDEX,)
+    ).fetchone()
+    if not exists:
+        removed = dedupe_c_info(conn)
+        if removed:
+            print(f"[schema] c_info 중복 논문 행 {removed}건 정리 (PDF_FILE_NAME 기준, 최신 행 유지)")
+    for ddl in INDEXES:
+        conn.execute(ddl)
+
+
+def key_expr(column, alias=None):
+    """UPSERT_KEYS 컬럼의 키 식. (NULL 을 '' 로 보는 컬럼은 IFNULL)"""
+    ref = f'{alias}."{column}"' if alias else f'"{column}"'
+    return f"IFNULL({ref}, '')" if column in EMPTY_IF_NULL_KEYS else ref
+
+
+def _add_a_info_unique_key(conn):
+    # 같은 (논문, 저자, 소속) 행이 여러 개면 저자 지정(직원번호)된 행을 우선, 그중 가장 나중에 저장된 행만 남김
+    keys = ", ".join(key_expr(col) for col in UPSERT_KEYS["a_info"])
+    duplicates = f"""
+        SELECT rowid, "직원번호" FROM (
+            SELECT rowid, "직원번호", ROW_NUMBER() OVER (
+                PARTITION BY {keys}
+                ORDER BY IFNULL("직원번호", '') <> '' DESC, rowid DESC
+            ) AS rn
+            FROM a_info
+        ) WHERE rn > 1
+    """
+    lost_claims = conn.execute(
+        f"""SELECT COUNT(*) FROM ({duplicates}) WHERE IFNULL("직원번호", '') <> ''"""
+    ).fetchone()[0]
+    cur = conn.execute(f"DELETE FROM a_info WHERE rowid IN (SELECT rowid FROM ({duplicates}))")
+    if cur.rowcount:
+        print(f"[schema] a_info 중복 저자 행 {cur.rowcount}건 정리 (논문, 저자, 소속 기준, 저자 지정 행 > 최신 행 유지)")
+    if lost_claims:
+        print(f"[schema] 경고: 같은 저자 키에 저자 지정이 여러 건이라 {lost_claims}건의 저자 지정이 삭제되었습니다.")
+    conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{A_INFO_AUTHOR_UNIQUE_INDEX}" ON "a_info" ({keys})')
+
+
+def fts_supported(conn):
+    """SQLite 에 FTS5 trigram 토크나이저가 있는지 확인합니다. (SQLite 3.34 이상)"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._fts_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def has_search_index(conn):
+    names = tuple(FTS_TABLES)
+    rows = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(names))})", names
+    ).fetchone()
+    return rows[0] == len(names)
+
+
+def _fts_triggers(fts_table, table, columns):
+    cols = ", ".join(f'"{col}"' for col in columns)
+    new_values = ", ".join(f'new."{col}"' for col in columns)
+    old_values = ", ".join(f'old."{col}"' for col in columns)
+    insert_new = f'INSERT INTO "{fts_table}" (rowid, {cols}) VALUES (new.rowid, {new_values});'
+    # external content 테이블은 지울 때 색인했던 값을 그대로 넘겨야 함
+    delete_old = f'INSERT INTO "{fts_table}" ("{fts_table}", rowid, {cols}) VALUES (\'delete\', old.rowid, {old_values});'
+    return (
+        f'CREATE TRIGGER IF NOT EXISTS "{fts_table}_ai" AFTER INSERT ON "{table}" BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts_table}_ad" AFTER DELETE ON "{table}" BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS "{fts_table}_au" AFTER UPDATE OF {cols} ON "{table}" '
+        f"BEGIN {delete_old} {insert_new} END",
+    )
+
+
+def ensure_search_index(conn, rebuild=False):
+    """
+    FTS_TABLES 색인 테이블과 동기화 트리거를 만들고, 새로 만들었거나 rebuild=True 이면 원본 전체로 색인을 다시 채웁니다.
+    (원본 테이블을 통째로 다시 만든 경우 rebuild. VACUUM 으로 rowid 가 바뀐 경우는 migrate() 가 자동으로 다시 채움) 커밋은 호출하는 쪽.
+    """
+    for fts_table, (table, columns) in FTS_TABLES.items():
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+        ).fetchone()
+        cols = ", ".join(f'"{col}"' for col in columns)
+        conn.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts_table}" USING fts5('
+            f"{cols}, content='{table}', content_rowid='rowid', tokenize='trigram')"
+        )
+        for ddl in _fts_triggers(fts_table, table, columns):
+            conn.execute(ddl)
+        if rebuild or not exists:
+            conn.execute(f'INSERT INTO "{fts_table}" ("{fts_table}") VALUES (\'rebuild\')')
+
+
+def search_index_drift(conn):
+    """
+    원본 테이블과 rowid 가 어긋난 전문 검색 색인 테이블 목록.
+    external content 색인은 원본 rowid 로 행을 찾는데, VACUUM 은 INTEGER PRIMARY KEY 가 없는 c_info/a_info 의
+    rowid 를 다시 매길 수 있습니다. 색인된 rowid(<색인>_docsize)와 원본 rowid 가 같은 집합인지 비교합니다.
+    """
+    drifted = []
+    for fts_table, (table, _) in FTS_TABLES.items():
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+        ).fetchone()
+        if not exists:
+            continue
+        table_rows, indexed_rows = conn.execute(
+            f'SELECT (SELECT COUNT(*) FROM "{table}"), (SELECT COUNT(*) FROM "{fts_table}_docsize")'
+        ).fetchone()
+        orphaned = conn.execute(
+            f'SELECT EXISTS (SELECT 1 FROM "{fts_table}_docsize" d '
+            f'WHERE NOT EXISTS (SELECT 1 FROM "{table}" t WHERE t.rowid = d.id))'
+        ).fetchone()[0]
+        if table_rows != indexed_rows or orphaned:
+            drifted.append(fts_table)
+    return drifted
+
+
+def sync_search_index(conn):
+    """rowid 가 어긋난 전문 검색 색인을 원본 전체로 다시 채우고 다시 채운 색인 목록을 반환합니다."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        drifted = search_index_drift(conn)
+        for fts_table in drifted:
+            conn.execute(f'INSERT INTO "{fts_table}" ("{fts_table}") VALUES (\'rebuild\')')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    for fts_table in drifted:
+        print(f"[schema] 전문 검색 색인 {fts_table} 의 rowid 가 원본과 달라 다시 채움 (VACUUM 등)")
+    return drifted
+
+
+def _add_search_index(conn):
+    if not fts_supported(conn):
+        # 색인 없이도 검색은 LIKE 로 동작 (SQLite 업그레이드 후 util/rebuild_search_index.py 로 생성)
+        print(f"[schema] SQLite {sqlite3.sqlite_version} 에 FTS5 trigram 이 없어 전문 검색 색인을 만들지 않습니다.")
+        return
+    ensure_search_index(conn)
+
+
+def fts_match_expr(terms, columns=None):
+    """
+    검색어 목록을 FTS5 MATCH 식으로 만듭니다. 각 검색어는 부분 일치 구문이며 OR 로 묶습니다.
+    TRIGRAM_MIN_CHARS 보다 짧은 검색어는 색인으로 찾을 수 없으므로 제외합니다. (없으면 None)
+    """
+    phrases = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= TRIGRAM_MIN_CHARS]
+    if not phrases:
+        return None
+    expr = " OR ".join(phrases)
+    if columns:
+        expr = "{" + " ".join(f'"{col}"' for col in columns) + "} : (" + expr + ")"
+    return expr
+
+
+def fts_search_sql(fts_table, terms, columns, use_fts=True, extra=()):
+    """
+    (쿼리, 파라미터): terms 중 하나라도 columns 에 부분 일치하는 원본 rowid 와 점수(score, 작을수록 관련도 높음).
+    3글자 이상은 MATCH(bm25 순위), 짧은 검색어는 색인 테이블 LIKE 로 찾고 점수 0 으로 둡니다.
+    use_fts=False 이면(색인 없음) 원본 테이블 LIKE 로 찾습니다. extra: 함께 합칠 (rowid, score) 쿼리와 파라미터 목록.
+    """
+    terms = [term for term in terms if term]
+    parts, params = [], []
+    like_terms, like_table = terms, FTS_TABLES[fts_table][0]
+    if use_fts:
+        match_expr = fts_match_expr(terms, columns)
+        if match_expr:
+            parts.append(f'SELECT rowid, rank AS score FROM "{fts_table}" WHERE "{fts_table}" MATCH ?')
+            params.append(match_expr)
+        like_terms = [term for term in terms if len(term) < TRIGRAM_MIN_CHARS]
+        like_table = fts_table
+    if like_terms:
+        conditions = " OR ".join(f'"{col}" LIKE ?' for _ in like_terms for col in columns)
+        parts.append(f'SELECT rowid, 0 AS score FROM "{like_table}" WHERE {conditions}')
+        params += [f"%{term}%" for term in like_terms for _ in columns]
+    for sql, extra_params in extra:
+        parts.append(sql)
+        params += list(extra_params)
+    if not parts:
+        return None, []
+    return f"SELECT rowid, MIN(score) AS score FROM ({' UNION ALL '.join(parts)}) GROUP BY rowid", params
+
+
+def _create_base_tables(conn):
+    c = conn.cursor()
+    # 1. user_info 테이블 생성
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "user_info" (
+            "name" TEXT, "id" TEXT PRIMARY KEY, "kri" TEXT,"email" TEXT, "hname" TEXT,
+            "jkind" TEXT, "jrank" TEXT, "duty" TEXT, "dep" TEXT,
+            "state" TEXT, "password" TEXT
+        )
+    """
+    )
+    c.execute("PRAGMA table_info(user_info)")
+    columns = [col[1] for col in c.fetchall()]
+    for i in range(1, 5):
+        if f"hname{i}" not in columns:
+            c.execute(f"ALTER TABLE user_info ADD COLUMN hname{i} TEXT")
+
+    # 2. 비로그인 업로드용 u_info 테이블 생성
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "u_info" (
+            "ORI_FILE_NAME" TEXT,
+            "PDF_FILE_NAME" TEXT,
+            "AUTHOR" TEXT,
+            "ID" TEXT,
+            "ROLE" TEXT,
+            "EMAIL" TEXT,
+            "DONE" TEXT,
+            "OLD_FILE_NAME" TEXT,
+            "SAVE_DATE" TEXT
+        )
+    """
+    )
+
+    # 3. 시스템 설정(테마 등) 저장을 위한 system_config 테이블
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "system_config" (
+            "key" TEXT PRIMARY KEY,
+            "value" TEXT
+        )
+    """
+    )
+    
+    # 4. c_info 테이블 생성 (없으면)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS "c_info" (
+            "YEAR" INTEGER,
+            "ORI_FILE_NAME" TEXT,
+            "PDF_FILE_NAME" TEXT,
+            "JSON_FILE_NAME" TEXT,
+            "LLM_JSON_FILE_NAME" TEXT,
+            "TITLE" TEXT,
+            "AUTHOR_LIST" TEXT,
+            "AFFILIATION_LIST" TEXT,
+            "FIRST_AUTHOR" TEXT,
+            "CORRESPONDING_AUTHOR" TEXT,
+            "CO_AUTHOR" TEXT,
+            "KEYWORDS" TEXT,
+            "JOURNAL_NAME" TEXT,
+            "PUBLICATION_YEAR" INTEGER,
+            "VOLUME" TEXT,
+            "ISSUE" TEXT,
+            "PAGE" TEXT,
+            "DOI" TEXT
+        )
+    """)
+
+    # 5. a_info 테이블 생성 (없으면)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS "a_info" (
+            "YEAR" INTEGER,
+            "ORI_FILE_NAME" TEXT,
+            "PDF_FILE_NAME" TEXT,
+            "JSON_FILE_NAME" TEXT,
+            "LLM_JSON_FILE_NAME" TEXT,
+            "AUTHOR" TEXT,
+            "AFFILIATION" TEXT,
+            "ROLE" TEXT,
+            "직원번호" TEXT,
+            "이름" TEXT,
+            "소속" TEXT,
+            "부서" TEXT
+        )
+    """)
+    # 저자 지정 컬럼이 생기기 전에 만든 a_info 에는 컬럼 추가 (조회용 인덱스/전문 검색 색인이 이 컬럼을 사용)
+    c.execute("PRAGMA table_info(a_info)")
+    columns = [col[1] for col in c.fetchall()]
+    for col in A_INFO_MEMBER_COLUMNS:
+        if col not in columns:
+            c.execute(f'ALTER TABLE a_info ADD COLUMN "{col}" TEXT')
+
+
+def _add_audit_columns(conn):
+    # user_info는 hr_info 역할도 겸함
+    c = conn.cursor()
+    target_tables = ["c_info", "a_info", "user_info"]
+    audit_cols = ["REG_DT", "REG_ID", "MOD_DT", "MOD_ID"]
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    for tbl in target_tables:
+        c.execute(f"PRAGMA table_info({tbl})")
+        existing_cols = [col[1] for col in c.fetchall()]
+        for col in audit_cols:
+            if col not in existing_cols:
+                c.execute(f"ALTER TABLE {tbl} ADD COLUMN {col} TEXT")
+
+        # 기존 데이터에 대한 Default 값 채우기 (이후 저장은 앱에서 이력 값을 함께 기록)
+        c.execute(f"UPDATE {tbl} SET REG_DT = ? WHERE REG_DT IS NULL OR REG_DT = ''", (current_time,))
+        c.execute(f"UPDATE {tbl} SET REG_ID = ? WHERE REG_ID IS NULL OR REG_ID = ''", ("AD00000",))
+        c.execute(f"UPDATE {tbl} SET MOD_DT = ? WHERE MOD_DT IS NULL OR MOD_DT = ''", (current_time,))
+        c.execute(f"UPDATE {tbl} SET MOD_ID = ? WHERE MOD_ID IS NULL OR MOD_ID = ''", ("AD00000",))
+
+
+# (버전, 설명, 적용 함수). 이미 배포된 단계는 수정하지 말고 새 단계를 뒤에 추가
+MIGRATIONS = (
+    (1, "기본 테이블 (user_info, u_info, system_config, c_info, a_info)", _create_base_tables),
+    (2, "이력 관리 컬럼 (REG_DT, REG_ID, MOD_DT, MOD_ID) 추가 및 기존 행 채우기", _add_audit_columns),
+    (3, "조회용 인덱스, c_info.PDF_FILE_NAME 고유 키", ensure_indexes),
+    (4, "a_info (PDF_FILE_NAME, AUTHOR, AFFILIATION) 고유 키", _add_a_info_unique_key),
+    (5, "전문 검색 색인 (c_info_fts, a_info_fts) 및 동기화 트리거", _add_search_index),
+)
+
+
+def _init_version_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS "schema_version" (
+            "version" INTEGER PRIMARY KEY,
+            "description" TEXT,
+            "applied_at" REAL
+        )
+    """
+    )
+    conn.commit()
+
+
+def get_schema_version(conn):
+    return conn.execute("SELECT IFNULL(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(db_file=None):
+    """
+    적용되지 않은 마이그레이션을 순서대로 한 단계씩 트랜잭션으로 적용하고, 적용한 버전 목록을 반환합니다.
+    여러 프로세스가 동시에 시작해도 쓰기 잠금(BEGIN IMMEDIATE) 안에서 버전을 다시 확인하므로 한 번만 적용됩니다.
+    마지막으로 전문 검색 색인이 원본과 어긋났으면(sync_search_index) 다시 채웁니다.
+    """
+    conn = get_connection(db_file)
+    applied = []
+    try:
+        _init_version_table(conn)
+        for version, description, apply in MIGRATIONS:
+            conn.execute("BEGIN IMMEDIATE")
+            if version <= get_schema_version(conn):
+                conn.rollback()
+                continue
+            apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, time.time()),
+            )
+            conn.commit()
+            applied.append(version)
+            print(f"[schema] 마이그레이션 {version} 적용: {description}")
+        sync_search_index(conn)
+        if applied:
+            # 새 인덱스/데이터 변경을 쿼리 계획 통계에 반영
+            conn.execute("PRAGMA optimize")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return applied
+
+
+def explain_query_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN 결과의 detail 문자열 목록."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def full_scans(plan):
+    """
+    실행 계획에서 테이블 전체를 읽는 단계만 반환합니다.
+    인덱스 순서로 모든 행을 읽는 SCAN ... USING (COVERING) INDEX 도 전체 스캔으로 봅니다.
+    전문 검색 색인은 MATCH 로 찾는 단계(INDEX n:M...)만 제외하고, LIKE 등으로 색인 전체를 읽는 단계(INDEX n:L0)는 포함합니다.
+    하위 쿼리 결과(MATERIALIZE/CO-ROUTINE)를 읽는 단계는 제외합니다.
+    """
+    subqueries = {step.split()[-1] for step in plan if step.startswith(("MATERIALIZE ", "CO-ROUTINE "))}
+    return [
+        step for step in plan
+        if step.startswith("SCAN ")
+        and not _is_match_scan(step)
+        and step.split()[1] not in subqueries
+    ]
+
+
+def _is_match_scan(step):
+    # FTS5 실행 계획의 idxStr: M = MATCH, L = LIKE, G = GLOB, = / < / > = rowid 조건
+    found = re.search(r"VIRTUAL TABLE INDEX \d+:(\S*)", step)
+    return bool(found) and "M" in found.group(1)
+
+
+# 모든 행을 보여주는 화면의 쿼리와 3글자 미만 검색어(trigram 색인으로 찾을 수 없어 LIKE)의 쿼리 (전체 스캔 허용)
+FULL_SCAN_ALLOWED = {"get_all_papers", "receipt 전체", "search_author_by_name (2글자)"}
+
+
+def hot_queries(use_fts=True):
+    """(이름, 쿼리, 파라미터) 목록. 검색 쿼리는 전문 검색 색인 사용 여부에 따라 다름."""
+    return [
+        ("get_my_papers", MY_PAPERS_SQL, ("홍길동", "E0001")),
+        ("get_all_papers", ALL_PAPERS_SQL, ()),
+        ("search_author_by_name (영문 1)", *author_search_sql(["hong"], use_fts=use_fts)),
+        ("search_author_by_name (영문 3 + 한글)",
+         *author_search_sql(["gildong hong", "hong gil-dong", "g. d. hong"], "홍길동", use_fts=use_fts)),
+        ("search_author_by_name (2글자)", *author_search_sql(["gd"], use_fts=use_fts)),
+        ("search_papers (논문명)", *paper_search_sql("learning", use_fts=use_fts)),
+        ("search_papers (논문명 + 저자)", *paper_search_sql("learning", "hong", use_fts=use_fts)),
+        ("논문 리스트 (논문명 + 발행년도)", *paper_list_sql("learning", year="2020", use_fts=use_fts)),
+        ("논문 리스트 (저자 + 부서)", *paper_list_sql(author="hong", dept="연구1팀", use_fts=use_fts)),
+        ("논문 리스트 (저널명)", *paper_list_sql(journal="Nature", use_fts=use_fts)),
+        ("내 논문 리스트 (논문명)", *paper_list_sql("learning", member=("홍길동", "E0001"), use_fts=use_fts)),
+        ("receipt 처리전", RECEIPT_SQL["처리전"], ()),
+        ("receipt 처리완료", RECEIPT_SQL["처리완료"], ()),
+        ("receipt 전체", RECEIPT_SQL["전체"], ()),
+    ]
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 모듈 (db, schema 등)
+
+import db
+import schema
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    """빈 임시 DB 에 migrate() 를 적용한 파일 경로. 테스트가 끝나면 이 스레드의 풀 연결을 닫습니다."""
+    path = str(tmp_path / "paper.db")
+    schema.migrate(path)
+    yield path
+    db.close_all()
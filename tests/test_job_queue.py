@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+import job_queue
+from job_queue import (
+    claim_job, complete_job, enqueue_job, fail_job, get_job, renew_lease, stage_lock,
+    KIND_ANALYZE, KIND_LAYOUT, STATUS_DONE, STATUS_QUEUED, STATUS_RUNNING,
+)
+
+
+@pytest.fixture
+def job_db(db_file):
+    job_queue.init_job_table(db_file)
+    return db_file
+
+
+def test_enqueue_dedup(job_db):
+    payload = {"pdf_path": "uploaded/abc.pdf"}
+    job_id = enqueue_job(KIND_ANALYZE, payload, db_file=job_db)
+    assert enqueue_job(KIND_ANALYZE, payload, db_file=job_db) == job_id
+    # 다른 단계, 강제 재분석은 별도 작업
+    assert enqueue_job(KIND_LAYOUT, payload, db_file=job_db) != job_id
+    assert enqueue_job(KIND_ANALYZE, dict(payload, force=True), db_file=job_db) != job_id
+
+    # 끝난 작업과는 합치지 않음
+    job = claim_job("w1", kinds=[KIND_ANALYZE], db_file=job_db)
+    assert job["id"] == job_id
+    assert complete_job(job_id, {"ok": True}, "w1", db_file=job_db)
+    assert enqueue_job(KIND_ANALYZE, payload, db_file=job_db) != job_id
+
+
+def test_claim_is_exclusive(job_db):
+    job_id = enqueue_job(KIND_LAYOUT, {"pdf_path": "uploaded/abc.pdf"}, db_file=job_db)
+    job = claim_job("w1", db_file=job_db)
+    assert (job["id"], job["status"], job["attempts"], job["locked_by"]) == (job_id, STATUS_RUNNING, 1, "w1")
+    assert claim_job("w2", db_file=job_db) is None
+
+
+def test_expired_lease_is_reclaimed(job_db):
+    job_id = enqueue_job(KIND_LAYOUT, {"pdf_path": "uploaded/abc.pdf"}, db_file=job_db)
+    claim_job("w1", lease_sec=-1, db_file=job_db)
+    job = claim_job("w2", db_file=job_db)
+    assert (job["id"], job["locked_by"], job["attempts"]) == (job_id, "w2", 2)
+    # 점유를 잃은 워커의 결과는 기록하지 않음
+    assert not complete_job(job_id, {}, "w1", db_file=job_db)
+    assert fail_job(job_id, "x", "w1", db_file=job_db) is None
+    assert not renew_lease(job_id, "w1", db_file=job_db)
+    assert complete_job(job_id, {}, "w2", db_file=job_db)
+    assert get_job(job_id, job_db)["status"] == STATUS_DONE
+
+
+def test_renew_lease_extends_job_and_stage_lock(job_db):
+    job_id = enqueue_job(KIND_LAYOUT, {"pdf_path": "uploaded/abc.pdf"}, db_file=job_db)
+    claim_job("w1", lease_sec=-1, db_file=job_db)
+    with stage_lock("layout:abc", job_queue.job_holder(job_id), lease_sec=-1, db_file=job_db):
+        assert renew_lease(job_id, "w1", lease_sec=60, db_file=job_db)
+        assert claim_job("w2", db_file=job_db) is None
+        # 연장된 단계 잠금은 다른 작업이 가져가지 못함
+        assert not job_queue._try_stage_lock("layout:abc", "job:other", 60, job_db)
+    assert get_job(job_id, job_db)["locked_until"] > time.time()
+
+
+def test_fail_job_backs_off_then_fails(job_db):
+    job_id = enqueue_job(KIND_LAYOUT, {"pdf_path": "uploaded/abc.pdf"}, max_attempts=2, db_file=job_db)
+    claim_job("w1", db_file=job_db)
+    assert fail_job(job_id, "boom", "w1", db_file=job_db) == STATUS_QUEUED
+    job = get_job(job_id, job_db)
+    assert job["run_after"] > time.time()
+    assert claim_job("w1", db_file=job_db) is None  # 백오프 중
+
+    conn = job_queue._connect(job_db)
+    try:
+        conn.execute("UPDATE jobs SET run_after = 0 WHERE id = ?", (job_id,))
+        conn.commit()
+    finally:
+        conn.close()
+    claim_job("w1", db_file=job_db)
+    assert fail_job(job_id, "boom", "w1", db_file=job_db) == job_queue.STATUS_FAILED
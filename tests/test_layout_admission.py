@@ -0,0 +1,54 @@
+import threading
+import time
+
+import pytest
+
+import layout_admission
+from db import close_all
+from layout_admission import AdmissionTimeout, acquire_slot, init_admission_table, layout_slot, release_slot
+
+
+@pytest.fixture
+def slot_db(db_file):
+    init_admission_table(db_file)
+    return db_file
+
+
+def test_slots_are_granted_in_order(slot_db, monkeypatch):
+    monkeypatch.setattr(layout_admission, "POLL_INTERVAL", 0.01)
+    first = acquire_slot("a", max_concurrency=1, db_file=slot_db)
+    order = []
+
+    def wait(holder):
+        try:
+            with layout_slot(holder, max_concurrency=1, wait_timeout=10, db_file=slot_db):
+                order.append(holder)
+        finally:
+            close_all()
+
+    threads = []
+    for holder in ("b", "c"):
+        thread = threading.Thread(target=wait, args=(holder,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.1)  # b 가 먼저 대기열에 들어가도록
+    assert order == []
+    release_slot(first, slot_db)
+    for thread in threads:
+        thread.join()
+    assert order == ["b", "c"]
+
+
+def test_timeout_leaves_queue(slot_db, monkeypatch):
+    monkeypatch.setattr(layout_admission, "POLL_INTERVAL", 0.01)
+    acquire_slot("a", max_concurrency=1, db_file=slot_db)
+    with pytest.raises(AdmissionTimeout):
+        acquire_slot("b", max_concurrency=1, wait_timeout=0.1, db_file=slot_db)
+    assert layout_admission.get_wait_status("b", slot_db) is None
+
+
+def test_dead_active_slot_is_reclaimed(slot_db, monkeypatch):
+    monkeypatch.setattr(layout_admission, "POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(layout_admission, "SLOT_LEASE_SEC", 0.05)
+    acquire_slot("dead", max_concurrency=1, db_file=slot_db)  # heartbeat 없이 방치
+    assert acquire_slot("b", max_concurrency=1, wait_timeout=5, db_file=slot_db)
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import layout_cache
+from layout_cache import get_cached_layout, put_cached_layout, init_layout_cache_table
+
+PDF_HASH = "a" * 64
+
+
+@pytest.fixture
+def layout_json(tmp_path):
+    path = tmp_path / f"{PDF_HASH}.json"
+    path.write_text(json.dumps([{"page_number": 1, "text": "Title"}]), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def page_window(monkeypatch):
+    monkeypatch.setenv("LAYOUT_PAGE_WINDOW", "2")
+
+
+def test_service_version_invalidates(db_file, layout_json):
+    init_layout_cache_table(db_file)
+    put_cached_layout(PDF_HASH, layout_json, 1, page_window=2, version="1", db_file=db_file)
+    assert get_cached_layout(PDF_HASH, version="1", db_file=db_file) == layout_json
+    assert get_cached_layout(PDF_HASH, version="2", db_file=db_file) is None
+
+
+def test_page_window_must_cover_current_window(db_file, layout_json, monkeypatch):
+    init_layout_cache_table(db_file)
+    put_cached_layout(PDF_HASH, layout_json, 1, page_window=2, version="1", db_file=db_file)
+    monkeypatch.setenv("LAYOUT_PAGE_WINDOW", "3")
+    assert get_cached_layout(PDF_HASH, version="1", db_file=db_file) is None
+    monkeypatch.setenv("LAYOUT_PAGE_WINDOW", "0")  # 전체 문서
+    assert get_cached_layout(PDF_HASH, version="1", db_file=db_file) is None
+
+    # 전체 문서 결과는 어떤 페이지 범위에도 사용
+    put_cached_layout(PDF_HASH, layout_json, 1, page_window=None, version="1", db_file=db_file)
+    assert get_cached_layout(PDF_HASH, version="1", db_file=db_file) == layout_json
+
+
+def test_missing_file_drops_entry(db_file, tmp_path):
+    missing = str(tmp_path / "gone.json")
+    init_layout_cache_table(db_file)
+    put_cached_layout(PDF_HASH, missing, 1, page_window=2, version="1", db_file=db_file)
+    assert get_cached_layout(PDF_HASH, version="1", db_file=db_file) is None
+    assert not layout_cache._is_registered(missing, db_file)
+
+
+def test_legacy_json_adopted_once(db_file, layout_json, tmp_path):
+    legacy_dir = str(tmp_path)
+    assert layout_cache.ADOPT_LEGACY_JSON
+    assert get_cached_layout(PDF_HASH, legacy_dir=legacy_dir, version="1", db_file=db_file) == layout_json
+    # 서비스 버전을 올리면 이미 등록된 예전 결과를 다시 쓰지 않음
+    assert get_cached_layout(PDF_HASH, legacy_dir=legacy_dir, version="2", db_file=db_file) is None
@@ -0,0 +1,27 @@
+import pytest
+
+from db import get_connection
+from schema import explain_query_plan, full_scans, has_search_index, hot_queries, FULL_SCAN_ALLOWED
+
+
+@pytest.mark.parametrize("name, sql, params", hot_queries(), ids=[name for name, _, _ in hot_queries()])
+def test_hot_query_uses_index(db_file, name, sql, params):
+    # 전문 검색 색인이 있는 DB 기준 (색인이 없으면 검색 쿼리는 LIKE 로 전체를 읽음)
+    conn = get_connection(db_file)
+    try:
+        assert has_search_index(conn)
+        plan = explain_query_plan(conn, sql, params)
+    finally:
+        conn.close()
+    if name in FULL_SCAN_ALLOWED:
+        pytest.skip("전체 스캔 허용 쿼리")
+    assert full_scans(plan) == [], plan
+
+
+def test_full_scans_detects_table_scan(db_file):
+    conn = get_connection(db_file)
+    try:
+        plan = explain_query_plan(conn, "SELECT * FROM c_info WHERE DOI = ?", ("x",))
+    finally:
+        conn.close()
+    assert full_scans(plan) == ["SCAN c_info"]
@@ -0,0 +1,78 @@
+import sqlite3
+
+import schema
+from db import get_connection
+
+
+def _schema_snapshot(conn):
+    return sorted(conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'").fetchall())
+
+
+def test_migrate_applies_each_step_once(db_file):
+    conn = get_connection(db_file)
+    try:
+        before = _schema_snapshot(conn)
+        assert schema.get_schema_version(conn) == schema.MIGRATIONS[-1][0]
+    finally:
+        conn.close()
+
+    assert schema.migrate(db_file) == []
+
+    conn = get_connection(db_file)
+    try:
+        assert _schema_snapshot(conn) == before
+        assert conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0] == len(schema.MIGRATIONS)
+    finally:
+        conn.close()
+
+
+def test_migration_steps_can_run_again(db_file):
+    # schema_version 기록 전에 중단된 단계가 다시 실행되어도 오류 없이 같은 스키마가 되어야 함
+    conn = get_connection(db_file)
+    try:
+        before = _schema_snapshot(conn)
+        for _, _, apply in schema.MIGRATIONS:
+            apply(conn)
+            conn.commit()
+        assert _schema_snapshot(conn) == before
+    finally:
+        conn.close()
+
+
+def test_migrate_legacy_tables(tmp_path):
+    # 마이그레이션 도입 전 DB: 저자 지정 컬럼 없는 a_info, 중복 행
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE c_info ("PDF_FILE_NAME" TEXT, "TITLE" TEXT, "KEYWORDS" TEXT, "JOURNAL_NAME" TEXT)')
+    conn.execute('CREATE TABLE a_info ("PDF_FILE_NAME" TEXT, "AUTHOR" TEXT, "AFFILIATION" TEXT, "ROLE" TEXT)')
+    conn.executemany("INSERT INTO c_info VALUES (?, ?, NULL, NULL)", [("a.pdf", "old"), ("a.pdf", "new")])
+    conn.executemany("INSERT INTO a_info VALUES (?, ?, ?, ?)", [("a.pdf", "Hong", None, "1"), ("a.pdf", "Hong", "", "2")])
+    conn.commit()
+    conn.close()
+
+    assert schema.migrate(path) == [version for version, _, _ in schema.MIGRATIONS]
+
+    conn = get_connection(path)
+    try:
+        assert conn.execute("SELECT TITLE FROM c_info").fetchall() == [("new",)]
+        assert conn.execute("SELECT ROLE, 직원번호 FROM a_info").fetchall() == [("2", None)]
+        assert schema.search_index_drift(conn) == []
+    finally:
+        conn.close()
+
+
+def test_a_info_unique_key_keeps_claimed_row():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE a_info ("PDF_FILE_NAME", "AUTHOR", "AFFILIATION", "ROLE", "직원번호", "이름")')
+    conn.executemany(
+        "INSERT INTO a_info VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("a.pdf", "Hong", None, "old", "E0001", "홍길동"),  # 저자 지정된 예전 행
+            ("a.pdf", "Hong", "", "new", None, None),
+            ("b.pdf", "Kim", "X", "old", "", None),
+            ("b.pdf", "Kim", "X", "new", "", None),
+        ],
+    )
+    schema._add_a_info_unique_key(conn)
+    rows = conn.execute("SELECT PDF_FILE_NAME, ROLE, 직원번호 FROM a_info ORDER BY PDF_FILE_NAME").fetchall()
+    assert rows == [("a.pdf", "old", "E0001"), ("b.pdf", "new", "")]
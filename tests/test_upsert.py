@@ -0,0 +1,76 @@
+from db import get_connection
+from upsert import upsert_rows
+
+A_COLUMNS = ("PDF_FILE_NAME", "AUTHOR", "AFFILIATION", "ROLE")
+
+
+def _rows(conn, sql):
+    return conn.execute(sql).fetchall()
+
+
+def test_upsert_keeps_reg_and_updates_mod(db_file):
+    conn = get_connection(db_file)
+    try:
+        assert upsert_rows(conn, "c_info", ("PDF_FILE_NAME", "TITLE"), [("a.pdf", "old")], user_id="U1") == (1, 0)
+        conn.execute("UPDATE c_info SET REG_DT = '2000-01-01 00:00:00', MOD_DT = '2000-01-01 00:00:00'")
+        conn.commit()
+
+        assert upsert_rows(conn, "c_info", ("PDF_FILE_NAME", "TITLE"), [("a.pdf", "new")], user_id="U2") == (1, 0)
+        conn.commit()
+        [(title, reg_dt, reg_id, mod_dt, mod_id)] = _rows(conn, "SELECT TITLE, REG_DT, REG_ID, MOD_DT, MOD_ID FROM c_info")
+    finally:
+        conn.close()
+    assert (title, reg_dt, reg_id, mod_id) == ("new", "2000-01-01 00:00:00", "U1", "U2")
+    assert mod_dt > reg_dt
+
+
+def test_upsert_keep_columns_and_untouched_columns(db_file):
+    conn = get_connection(db_file)
+    try:
+        upsert_rows(conn, "c_info", ("PDF_FILE_NAME", "ORI_FILE_NAME"), [("a.pdf", "원본.pdf")])
+        upsert_rows(conn, "a_info", A_COLUMNS, [("a.pdf", "Hong", None, "1")])
+        conn.execute("UPDATE a_info SET 직원번호 = 'E0001', 이름 = '홍길동'")  # 저자 지정
+
+        upsert_rows(conn, "c_info", ("PDF_FILE_NAME", "ORI_FILE_NAME"), [("a.pdf", "다른.pdf")],
+                    keep_columns=("ORI_FILE_NAME",))
+        # AFFILIATION NULL 과 '' 는 같은 키
+        upsert_rows(conn, "a_info", A_COLUMNS, [("a.pdf", "Hong", "", "2")])
+        conn.commit()
+        assert _rows(conn, "SELECT ORI_FILE_NAME FROM c_info") == [("원본.pdf",)]
+        assert _rows(conn, "SELECT ROLE, 직원번호, 이름 FROM a_info") == [("2", "E0001", "홍길동")]
+    finally:
+        conn.close()
+
+
+def test_upsert_prune_by_paper(db_file):
+    conn = get_connection(db_file)
+    try:
+        upsert_rows(conn, "a_info", A_COLUMNS, [
+            ("a.pdf", "Hong", "X", "1"), ("a.pdf", "Kim", None, "2"), ("b.pdf", "Lee", "Y", "1"),
+        ])
+        inserted, pruned = upsert_rows(conn, "a_info", A_COLUMNS, [("a.pdf", "Kim", "", "1")], prune_by=("PDF_FILE_NAME",))
+        conn.commit()
+        rows = _rows(conn, "SELECT PDF_FILE_NAME, AUTHOR, ROLE FROM a_info ORDER BY PDF_FILE_NAME, AUTHOR")
+    finally:
+        conn.close()
+    assert (inserted, pruned) == (1, 1)
+    # a.pdf 는 입력 저자만 남고, 입력에 없는 b.pdf 는 그대로
+    assert rows == [("a.pdf", "Kim", "1"), ("b.pdf", "Lee", "1")]
+
+
+def test_upsert_prune_groups_without_rows(db_file):
+    conn = get_connection(db_file)
+    try:
+        upsert_rows(conn, "a_info", A_COLUMNS, [("a.pdf", "Hong", "X", "1"), ("b.pdf", "Lee", "Y", "1")])
+        # a.pdf 는 저자 0명으로 다시 추출됨
+        inserted, pruned = upsert_rows(
+            conn, "a_info", A_COLUMNS, [("b.pdf", "Lee", "Y", "2")],
+            prune_by=("PDF_FILE_NAME",), prune_groups=["a.pdf", "b.pdf"],
+        )
+        assert upsert_rows(conn, "a_info", A_COLUMNS, [], prune_by=("PDF_FILE_NAME",), prune_groups=["b.pdf"]) == (0, 1)
+        conn.commit()
+        rows = _rows(conn, "SELECT PDF_FILE_NAME FROM a_info")
+    finally:
+        conn.close()
+    assert (inserted, pruned) == (1, 1)
+    assert rows == []
@@ -0,0 +1,145 @@
+import datetime
+from schema import UPSERT_KEYS, EMPTY_IF_NULL_KEYS, key_expr
+
+# --- c_info / a_info 일괄 업서트 ---
+# 테이블의 고유 키(schema.UPSERT_KEYS)로 INSERT ... ON CONFLICT DO UPDATE 를 executemany 한 번으로 실행합니다.
+# 새 행은 REG_DT/REG_ID 와 MOD_DT/MOD_ID 를 모두 기록하고, 기존 행은 REG 정보를 유지한 채 MOD 정보만 갱신합니다.
+# 입력에 없는 컬럼(예: 저자 지정으로 채운 직원번호/이름)은 기존 값을 그대로 둡니다.
+# 트랜잭션 커밋/롤백은 호출하는 쪽에서 합니다. (논문 1건 저장, 수만 건 일괄 적재 모두 같은 함수 사용)
+AUDIT_COLUMNS = ("REG_DT", "REG_ID", "MOD_DT", "MOD_ID")
+
+
+def get_table_columns(conn, table_name):
+    return [col[1] for col in conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()]
+
+
+def _clean(value):
+    # NaN/NaT/pd.NA 등 pandas 결측값을 NULL 로 변환
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()  # numpy 스칼라 → 파이썬 값 (sqlite3 바인딩용)
+    try:
+        return None if value != value else value
+    except TypeError:
+        return None  # pd.NA
+
+
+def _upsert_sql(table_name, columns, keep_columns):
+    key_columns = UPSERT_KEYS[table_name]
+    insert_columns = list(columns) + list(AUDIT_COLUMNS)
+    assignments = [
+        f'"{col}" = excluded."{col}"'
+        for col in columns
+        if col not in key_columns and col not in keep_columns
+    ]
+    # 이력 컬럼이 비어 있던 기존 행은 이번 값으로 채움
+    assignments += [
+        "\"REG_DT\" = COALESCE(NULLIF(\"REG_DT\", ''), excluded.\"REG_DT\")",
+        "\"REG_ID\" = COALESCE(NULLIF(\"REG_ID\", ''), excluded.\"REG_ID\")",
+        '"MOD_DT" = excluded."MOD_DT"',
+        '"MOD_ID" = excluded."MOD_ID"',
+    ]
+    return 'INSERT INTO "{}" ({}) VALUES ({}) ON CONFLICT ({}) DO UPDATE SET {}'.format(
+        table_name,
+        ", ".join(f'"{col}"' for col in insert_columns),
+        ", ".join("?" * len(insert_columns)),
+        ", ".join(key_expr(col) for col in key_columns),
+        ", ".join(assignments),
+    )
+
+
+def _prune(conn, table_name, key_rows, prune_by, groups=None):
+    """
+    prune_by 값(예: PDF_FILE_NAME)이 이번 입력에 있는 행 중 입력에 없는 키의 행을 지웁니다.
+    (논문 단위로 저자 목록을 통째로 교체하는 경우: 이름이 바뀌거나 빠진 저자 행 삭제)
+    groups 를 주면 입력 행과 관계없이 그 prune_by 값들을 대상으로 합니다. (입력 행이 없는 값은 기존 행 모두 삭제)
+    """
+    key_columns = UPSERT_KEYS[table_name]
+    temp_table = f"_upsert_keys_{table_name}"
+    group_table = f"_upsert_groups_{table_name}"
+    temp_columns = ", ".join(f'"{col}"' for col in key_columns)
+    group_select = ", ".join(f'"{col}"' for col in prune_by)
+    conn.execute(
+        f'CREATE TEMP TABLE IF NOT EXISTS "{temp_table}" ({temp_columns}, PRIMARY KEY ({temp_columns})) WITHOUT ROWID'
+    )
+    conn.execute(
+        f'CREATE TEMP TABLE IF NOT EXISTS "{group_table}" ({group_select}, PRIMARY KEY ({group_select})) WITHOUT ROWID'
+    )
+    conn.execute(f'DELETE FROM temp."{temp_table}"')
+    conn.execute(f'DELETE FROM temp."{group_table}"')
+    # 키 식(key_expr)과 같은 값으로 저장해 두어야 아래 NOT EXISTS 가 기본 키로 찾음
+    empty_if_null = [col in EMPTY_IF_NULL_KEYS for col in key_columns]
+    conn.executemany(
+        f'INSERT OR IGNORE INTO temp."{temp_table}" VALUES ({", ".join("?" * len(key_columns))})',
+        (
+            tuple("" if value is None and empty else value for value, empty in zip(row, empty_if_null))
+            for row in key_rows
+        ),
+    )
+    if groups is None:
+        conn.execute(
+            f'INSERT OR IGNORE INTO temp."{group_table}" SELECT DISTINCT {group_select} FROM temp."{temp_table}"'
+        )
+    else:
+        conn.executemany(
+            f'INSERT OR IGNORE INTO temp."{group_table}" VALUES ({", ".join("?" * len(prune_by))})',
+            (tuple(group) if isinstance(group, (tuple, list)) else (group,) for group in groups),
+        )
+    group = ", ".join(f't."{col}"' for col in prune_by)
+    matches = " AND ".join(f'k."{col}" = {key_expr(col, "t")}' for col in key_columns)
+    cur = conn.execute(
+        f"""
+        DELETE FROM "{table_name}" AS t
+        WHERE ({group}) IN (SELECT {group_select} FROM temp."{group_table}")
+            AND NOT EXISTS (SELECT 1 FROM temp."{temp_table}" AS k WHERE {matches})
+    """
+    )
+    conn.execute(f'DELETE FROM temp."{temp_table}"')
+    conn.execute(f'DELETE FROM temp."{group_table}"')
+    return cur.rowcount
+
+
+def upsert_rows(conn, table_name, columns, rows, user_id="AD00000", keep_columns=(), prune_by=None, prune_groups=None):
+    """
+    columns 순서의 행(튜플/리스트) 목록을 table_name 에 업서트하고 (반영 행 수, 삭제 행 수)를 반환합니다.
+    - 테이블에 없는 컬럼과 이력 컬럼(AUDIT_COLUMNS)은 무시합니다.
+    - keep_columns: 기존 행이 있으면 값을 바꾸지 않을 컬럼 (예: 원본 파일명 ORI_FILE_NAME)
+    - prune_by: 지정하면 해당 컬럼 값 단위로 입력에 없는 기존 행을 지웁니다. (_prune 참고)
+    - prune_groups: 정리할 prune_by 값 목록. 주지 않으면 입력 행에 나온 값만 정리하므로,
+      입력 행이 하나도 없는 값(예: 저자 0명으로 추출된 논문)도 정리하려면 명시합니다.
+    """
+    key_columns = UPSERT_KEYS[table_name]
+    table_columns = set(get_table_columns(conn, table_name))
+    positions = [
+        i for i, col in enumerate(columns)
+        if col in table_columns and col not in AUDIT_COLUMNS
+    ]
+    target_columns = [columns[i] for i in positions]
+    missing = [col for col in key_columns if col not in target_columns]
+    if missing:
+        raise ValueError(f"'{table_name}' 업서트 키 컬럼이 없습니다: {', '.join(missing)}")
+
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    audit = (current_time, user_id, current_time, user_id)
+    values = [tuple(_clean(row[i]) for i in positions) + audit for row in rows]
+    if not values and prune_groups is None:
+        return 0, 0
+
+    if values:
+        conn.executemany(_upsert_sql(table_name, target_columns, keep_columns), values)
+    pruned = 0
+    if prune_by and not set(key_columns) <= set(prune_by):
+        key_positions = [target_columns.index(col) for col in key_columns]
+        key_rows = [tuple(value[i] for i in key_positions) for value in values]
+        pruned = _prune(conn, table_name, key_rows, prune_by, prune_groups)
+    return len(values), pruned
+
+
+def upsert_dataframe(conn, df, table_name, user_id="AD00000", keep_columns=(), prune_by=None):
+    """DataFrame 을 upsert_rows 로 반영합니다. (반환값 동일)"""
+    df = df.loc[:, ~df.columns.duplicated()]
+    return upsert_rows(
+        conn, table_name, list(df.columns), df.itertuples(index=False, name=None),
+        user_id=user_id, keep_columns=keep_columns, prune_by=prune_by,
+    )
@@ -0,0 +1,141 @@
+"""
+논문 저장(update_or_add_paper_data) 방식 비교 벤치마크.
+임시 DB에 가상의 논문/저자 데이터를 만들어, 이전 방식(키별 SELECT + iterrows + 키별 DELETE + to_sql)과
+upsert.py 의 일괄 업서트(ON CONFLICT DO UPDATE + executemany)의 처리 시간을 비교합니다.
+
+사용 예:
+    python util/benchmark_upsert.py                      # 논문 2,000건 x 저자 10명
+    python util/benchmark_upsert.py --papers 5000 --authors 8 --single 50
+"""
+import os
+import time
+import argparse
+import datetime
+import tempfile
+import pandas as pd
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection, close_all
+from schema import migrate
+from upsert import upsert_dataframe
+
+
+def legacy_update_or_add(conn, df, table_name, key_columns, user_id="AD00000"):
+    """변경 전 main.update_or_add_paper_data 의 알고리즘 (Streamlit 출력만 제외)."""
+    cursor = conn.cursor()
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    keys = df[key_columns].drop_duplicates()
+    existing_reg_info = {}
+    where_clause = " AND ".join([f"{col} = ?" for col in key_columns])
+    select_query = f"SELECT {', '.join(key_columns)}, REG_DT, REG_ID FROM {table_name} WHERE {where_clause}"
+    for _, row in keys.iterrows():
+        cursor.execute(select_query, tuple(row[col] for col in key_columns))
+        res = cursor.fetchone()
+        if res:
+            existing_reg_info[tuple(res[:len(key_columns)])] = {"REG_DT": res[-2], "REG_ID": res[-1]}
+
+    for col in ["REG_DT", "REG_ID", "MOD_DT", "MOD_ID"]:
+        if col not in df.columns:
+            df[col] = None
+    for idx, row in df.iterrows():
+        key_val = tuple(row[col] for col in key_columns)
+        if key_val in existing_reg_info:
+            df.at[idx, "REG_DT"] = existing_reg_info[key_val]["REG_DT"]
+            df.at[idx, "REG_ID"] = existing_reg_info[key_val]["REG_ID"]
+        if pd.isna(df.at[idx, "REG_DT"]) or df.at[idx, "REG_DT"] == "":
+            df.at[idx, "REG_DT"] = current_time
+            df.at[idx, "REG_ID"] = user_id
+        df.at[idx, "MOD_DT"] = current_time
+        df.at[idx, "MOD_ID"] = user_id
+
+    df.head(0).to_sql(table_name, conn, if_exists="append", index=False)
+    existing_columns = [desc[0] for desc in cursor.execute(f'SELECT * FROM "{table_name}"').description]
+    df_to_append = df.reindex(columns=existing_columns).fillna(value=pd.NA)
+    for _, key_row in keys.iterrows():
+        conditions = " AND ".join([f'"{col}" = ?' for col in key_columns])
+        cursor.execute(f'DELETE FROM "{table_name}" WHERE {conditions}', tuple(key_row[col] for col in key_columns))
+    df_to_append.to_sql(table_name, conn, if_exists="append", index=False)
+    conn.commit()
+
+
+def set_based_update_or_add(conn, df, table_name, key_columns, user_id="AD00000"):
+    upsert_dataframe(conn, df, table_name, user_id=user_id, prune_by=key_columns)
+    conn.commit()
+
+
+def make_papers(paper_count, author_count, title_suffix=""):
+    c_rows, a_rows = [], []
+    for i in range(paper_count):
+        pdf = f"paper_{i:06d}.pdf"
+        c_rows.append({
+            "PDF_FILE_NAME": pdf, "ORI_FILE_NAME": pdf, "TITLE": f"Title {i}{title_suffix}",
+            "JOURNAL_NAME": f"Journal {i % 50}", "PUBLICATION_YEAR": 2000 + i % 25, "DOI": f"10.1000/{i}",
+        })
+        for j in range(author_count):
+            a_rows.append({
+                "PDF_FILE_NAME": pdf, "ORI_FILE_NAME": pdf, "AUTHOR": f"Author {i}-{j}",
+                "AFFILIATION": f"Institute {j % 7}", "ROLE": "1저자" if j == 0 else "공저자",
+            })
+    return pd.DataFrame(c_rows), pd.DataFrame(a_rows)
+
+
+def run_case(save, db_file, c_df, a_df, single):
+    key_cols = ["PDF_FILE_NAME"]
+    conn = get_connection(db_file)
+    try:
+        results = {}
+        started = time.perf_counter()
+        save(conn, c_df.copy(), "c_info", key_cols)
+        save(conn, a_df.copy(), "a_info", key_cols)
+        results["일괄 신규"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        save(conn, c_df.assign(TITLE=c_df["TITLE"] + " (rev)"), "c_info", key_cols)
+        save(conn, a_df.assign(ROLE="공저자"), "a_info", key_cols)
+        results["일괄 갱신"] = time.perf_counter() - started
+
+        # 화면에서 논문 1건씩 저장 (c_info 1행 + 해당 논문 저자)
+        pdfs = c_df["PDF_FILE_NAME"].head(single).tolist()
+        started = time.perf_counter()
+        for pdf in pdfs:
+            save(conn, c_df[c_df["PDF_FILE_NAME"] == pdf].copy(), "c_info", key_cols)
+            save(conn, a_df[a_df["PDF_FILE_NAME"] == pdf].copy(), "a_info", key_cols)
+        results[f"1건씩 {len(pdfs)}회"] = time.perf_counter() - started
+
+        counts = (
+            conn.execute("SELECT COUNT(*) FROM c_info").fetchone()[0],
+            conn.execute("SELECT COUNT(*) FROM a_info").fetchone()[0],
+        )
+    finally:
+        conn.close()
+    return results, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="논문 저장 방식 비교 벤치마크")
+    parser.add_argument("--papers", type=int, default=2000, help="논문 수")
+    parser.add_argument("--authors", type=int, default=10, help="논문당 저자 수")
+    parser.add_argument("--single", type=int, default=20, help="1건씩 저장 반복 횟수")
+    args = parser.parse_args()
+
+    c_df, a_df = make_papers(args.papers, args.authors)
+    print(f"논문 {len(c_df):,}건, 저자 {len(a_df):,}행\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = {}
+        for name, save in (("이전 방식", legacy_update_or_add), ("일괄 업서트", set_based_update_or_add)):
+            db_file = os.path.join(tmp_dir, f"{name}.db")
+            migrate(db_file)
+            results, counts = run_case(save, db_file, c_df, a_df, args.single)
+            report[name] = results
+            print(f"[{name}] c_info {counts[0]:,}행, a_info {counts[1]:,}행")
+        close_all()
+
+    print(f"\n{'구분':<14}{'이전 방식':>12}{'일괄 업서트':>12}{'배율':>8}")
+    for case in report["이전 방식"]:
+        old, new = report["이전 방식"][case], report["일괄 업서트"][case]
+        print(f"{case:<14}{old:>11.2f}s{new:>11.2f}s{old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
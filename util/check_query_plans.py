@@ -0,0 +1,53 @@
+"""
+화면 조회 쿼리의 실행 계획(EXPLAIN QUERY PLAN)을 확인합니다.
+인덱스 없이(또는 인덱스 전체를 순서대로) 테이블 전체를 읽는 쿼리가 있으면 목록을 출력하고 종료 코드 1로 끝납니다.
+(전체 목록 화면처럼 모든 행을 보여주는 쿼리는 FULL_SCAN_ALLOWED 에 이름으로 등록하여 검사에서 제외)
+
+사용 예:
+    python util/check_query_plans.py               # paper.db
+    python util/check_query_plans.py --db other.db
+"""
+import os
+import sys
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection
+from schema import explain_query_plan, full_scans, has_search_index, hot_queries, FULL_SCAN_ALLOWED
+
+DB_FILE = "paper.db"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="화면 조회 쿼리 실행 계획 확인")
+    parser.add_argument("--db", default=DB_FILE, help="확인할 DB 파일")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"오류: '{args.db}' 파일이 없습니다. 앱을 한 번 실행하여 DB를 초기화하세요.")
+        sys.exit(1)
+
+    conn = get_connection(args.db)
+    failed = []
+    try:
+        use_fts = has_search_index(conn)
+        if not use_fts:
+            print("[경고] 전문 검색 색인이 없어 검색 쿼리는 LIKE 로 실행됩니다. (util/rebuild_search_index.py)\n")
+        for name, sql, params in hot_queries(use_fts):
+            plan = explain_query_plan(conn, sql, params)
+            scans = [] if name in FULL_SCAN_ALLOWED else full_scans(plan)
+            print(f"[{'FAIL' if scans else 'OK'}] {name}")
+            for step in plan:
+                print(f"    {step}")
+            if scans:
+                failed.append(name)
+    finally:
+        conn.close()
+
+    if failed:
+        print(f"\n전체 스캔 쿼리 {len(failed)}건: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n모든 조회 쿼리가 인덱스를 사용합니다.")
+
+
+if __name__ == "__main__":
+    main()
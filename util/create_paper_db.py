@@ -1,6 +1,8 @@
-import sqlite3
 import pandas as pd
 import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection
 
 # --- 통합될 새로운 데이터베이스 파일 이름 ---
 DB_NAME = "paper.db"
@@ -22,7 +24,7 @@ def migrate_databases():
     print(f"'{DB_NAME}'으로 데이터베이스 통합을 시작합니다...")
 
     # 새로운 통합 DB에 연결
-    conn_new = sqlite3.connect(DB_NAME)
+    conn_new = get_connection(DB_NAME)
 
     try:
         # 각 원본 DB 파일에 대해 반복 작업
@@ -37,7 +39,7 @@ def migrate_databases():
             print(f"- '{db_file}' 파일 처리 중...")
 
             # 원본 DB에 연결하여 데이터를 DataFrame으로 읽기
-            conn_old = sqlite3.connect(db_file)
+            conn_old = get_connection(db_file)
             try:
                 df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn_old)
 
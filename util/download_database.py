@@ -1,6 +1,8 @@
-import sqlite3
 import pandas as pd
 import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection
 
 # 파일명 설정
 SOURCE_DB = "paper.db"      # 원본 데이터베이스 (읽어올 곳)
@@ -18,7 +20,7 @@ def extract_user_info_to_new_db():
         # -------------------------------------------------------
         # 단계 1: 원본 DB(paper.db)에서 데이터 읽어오기
         # -------------------------------------------------------
-        conn_src = sqlite3.connect(SOURCE_DB)
+        conn_src = get_connection(SOURCE_DB)
         
         # user_info 테이블의 모든 데이터를 DataFrame으로 가져옵니다.
         try:
@@ -34,7 +36,7 @@ def extract_user_info_to_new_db():
         # -------------------------------------------------------
         # 단계 2: 새 DB(user_info.db)에 데이터 저장하기
         # -------------------------------------------------------
-        conn_target = sqlite3.connect(TARGET_DB)
+        conn_target = get_connection(TARGET_DB)
         
         # DataFrame을 통째로 새 DB의 'user_info' 테이블로 저장
         # if_exists='replace': 이미 파일/테이블이 있다면 덮어씁니다.
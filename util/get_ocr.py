@@ -1,8 +1,9 @@
 import os
-import requests
-import json
-import time
-from tqdm import tqdm  # tqdm 라이브러리 임포트
+import argparse
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from layout_client import ocr_pdf, LayoutServiceError
+from batch_runner import run_batch, print_summary, MANIFEST_NAME, DEFAULT_WORKERS, DEFAULT_DEADLINE_SEC
 
 # 설정
 PDF_DIR = "ocr_data"  # PDF 파일이 있는 폴더
@@ -11,75 +12,62 @@ SERVICE_URL = "http://localhost:5060/ocr"  # pdf-document-layout-analysis 서비
 REQUEST_TIMEOUT = 600  # 각 요청의 타임아웃 (초) - 10분 설정
 
 
+def ocr_one(pdf_file, budget, pdf_dir=PDF_DIR, result_dir=RESULT_DIR, request_timeout=REQUEST_TIMEOUT):
+    """PDF 1건을 OCR 처리하여 저장합니다. 실패 시 오류 메시지를 반환합니다. (budget: batch_runner.FileBudget)"""
+    pdf_path = os.path.join(pdf_dir, pdf_file)
+    filename_without_ext = os.path.splitext(pdf_file)[0]
+
+    # OCR 결과 경로  정의
+    ocr_output_path = os.path.join(result_dir, f"ocr_{filename_without_ext}.pdf")
+    try:
+        with budget.service_call(request_timeout) as timeout:
+            ocr_pdf(pdf_path, ocr_output_path, SERVICE_URL, timeout)
+    except LayoutServiceError as e:
+        return f"OCR 처리된 PDF 생성 중 오류 발생: {e}"
+    return ""
+
+
 def process_pdf_files():
     """
-    data 폴더의 모든 PDF 파일을 처리하여 OCR 처리된 PDF를 저장합니다.
-    진행률과 시간을 표시합니다.
+    ocr_data 폴더의 모든 PDF 파일을 처리하여 OCR 처리된 PDF를 저장합니다.
+    여러 파일을 동시에 처리하며, 중단 후 다시 실행하면 완료된 파일은 건너뜁니다.
     """
-    if not os.path.exists(PDF_DIR):
-        print(f"오류: '{PDF_DIR}' 폴더가 존재하지 않습니다.")
+    parser = argparse.ArgumentParser(description="PDF OCR 일괄 처리")
+    parser.add_argument("--pdf-dir", default=PDF_DIR, help="PDF 파일이 있는 폴더")
+    parser.add_argument("--result-dir", default=RESULT_DIR, help="결과를 저장할 폴더")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="동시 요청 수 (OCR 서비스 처리 용량에 맞춤)")
+    parser.add_argument("--deadline", type=int, default=DEFAULT_DEADLINE_SEC, help="파일 1건 처리 제한 시간 (초)")
+    parser.add_argument("--manifest", default=None, help="처리 기록 파일 경로 (기본: 결과 폴더의 .batch_manifest.jsonl)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf_dir):
+        print(f"오류: '{args.pdf_dir}' 폴더가 존재하지 않습니다.")
         print("PDF 파일을 이 폴더에 넣어주세요.")
         return
 
-    if not os.path.exists(RESULT_DIR):
-        os.makedirs(RESULT_DIR)
-        print(f"'{RESULT_DIR}' 폴더를 생성했습니다.")
+    if not os.path.exists(args.result_dir):
+        os.makedirs(args.result_dir)
+        print(f"'{args.result_dir}' 폴더를 생성했습니다.")
 
-    pdf_files = [f for f in os.listdir(PDF_DIR) if f.lower().endswith(".pdf")]
+    pdf_files = sorted(f for f in os.listdir(args.pdf_dir) if f.lower().endswith(".pdf"))
 
     if not pdf_files:
-        print(f"'{PDF_DIR}' 폴더에 PDF 파일이 없습니다. PDF 파일을 추가해주세요.")
+        print(f"'{args.pdf_dir}' 폴더에 PDF 파일이 없습니다. PDF 파일을 추가해주세요.")
         return
 
-    total_files = len(pdf_files)
-    print(
-        f"'{PDF_DIR}' 폴더에서 {total_files}개의 PDF 파일을 찾았습니다. 처리를 시작합니다..."
+    print(f"'{args.pdf_dir}' 폴더에서 {len(pdf_files)}개의 PDF 파일을 찾았습니다.")
+
+    # 요청 타임아웃은 파일당 제한 시간을 넘지 않도록 맞춤
+    request_timeout = min(REQUEST_TIMEOUT, args.deadline)
+    summary = run_batch(
+        pdf_files,
+        lambda f, budget: ocr_one(f, budget, args.pdf_dir, args.result_dir, request_timeout),
+        args.manifest or os.path.join(args.result_dir, MANIFEST_NAME),
+        workers=args.workers,
+        deadline_sec=args.deadline,
+        desc="OCR 처리 중",
     )
-
-    start_time = time.time()  # 전체 시작 시간 기록
-
-    # tqdm을 사용하여 진행률 바 표시
-    # desc: 진행률 바 앞에 표시될 설명
-    # unit: 단위
-    # leave=True: 완료 후 진행률 바를 남김
-    for i, pdf_file in enumerate(tqdm(pdf_files, desc="PDF 처리 중", unit="파일"), 1):
-        pdf_path = os.path.join(PDF_DIR, pdf_file)
-        filename_without_ext = os.path.splitext(pdf_file)[0]
-
-        # 각 파일의 예상 시간 계산을 위한 시작 시간 기록
-        file_start_time = time.time()
-
-        # OCR 결과 경로  정의
-        ocr_output_path = os.path.join(RESULT_DIR, f"ocr_{filename_without_ext}.pdf")
-
-        # 1. OCR 결과 요청 및 저장
-        try:
-            with open(pdf_path, "rb") as f:
-                files = {"file": (pdf_file, f, "application/pdf")}
-                response = requests.post(
-                    SERVICE_URL, files=files, timeout=REQUEST_TIMEOUT
-                )
-                response.raise_for_status()  # HTTP 오류 발생 시 예외 발생
-
-            with open(ocr_output_path, "wb") as f:
-                f.write(response.content)
-            tqdm.write(f"  '{pdf_file}' OCR 처리된 PDF 저장 완료.")  # tqdm과 함께 출력
-
-        except requests.exceptions.RequestException as e:
-            tqdm.write(f"  오류: '{pdf_file}' OCR 처리된 PDF 생성 중 오류 발생: {e}")
-        except Exception as e:
-            tqdm.write(
-                f"  오류: '{pdf_file}' OCR 처리 중 예기치 않은 오류 발생: {e}"
-            )
-
-    end_time = time.time()  # 전체 종료 시간 기록
-    total_elapsed_time = end_time - start_time
-
-    print("\n--- 모든 PDF 파일 처리 완료 ---")
-    print(f"총 소요 시간: {total_elapsed_time:.2f} 초")
-    if total_files > 0:
-        avg_time_per_file = total_elapsed_time / total_files
-        print(f"파일 당 평균 처리 시간: {avg_time_per_file:.2f} 초")
+    print_summary(summary)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,11 @@
-import sqlite3
 import pandas as pd
 import bcrypt
 import os
 from tqdm import tqdm
 from concurrent.futures import ProcessPoolExecutor, as_completed
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection
 
 DB_NAME = "paper.db"
 
@@ -30,7 +32,7 @@ def hash_user_info_passwords():
         print(f"[오류] 데이터베이스 파일 '{DB_NAME}'을(를) 찾을 수 없습니다.")
         return
 
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection(DB_NAME)
     print(f"'{DB_NAME}' 데이터베이스의 'user_info' 테이블 암호화를 시작합니다...")
 
     try:
@@ -84,7 +86,9 @@ def hash_user_info_passwords():
 
         # 4. 변경된 DataFrame을 다시 DB에 저장
         print("\n데이터베이스에 변경사항을 저장하는 중입니다...")
-        df.to_sql("user_info", conn, if_exists="replace", index=False)
+        # 테이블을 다시 만들지 않고 행만 교체 (인덱스 유지)
+        conn.execute("DELETE FROM user_info")
+        df.to_sql("user_info", conn, if_exists="append", index=False)
         conn.commit()
 
         print("모든 작업이 성공적으로 완료되었습니다.")
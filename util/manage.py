@@ -1,7 +1,10 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 import bcrypt
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection, transaction
 
 # ==============================================================================
 # 1. 데이터베이스 설정 및 함수
@@ -10,7 +13,7 @@ DB_NAME = "paper.db"
 
 def load_data(table_name, exclude_columns=None):
     """지정된 테이블에서 데이터를 로드하고 특정 컬럼을 제외할 수 있습니다."""
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection(DB_NAME)
     try:
         query = f"SELECT * FROM {table_name}"
         df = pd.read_sql_query(query, conn)
@@ -22,12 +25,10 @@ def load_data(table_name, exclude_columns=None):
         conn.close()
 
 def save_data(table_name, df):
-    """데이터프레임을 지정된 테이블에 저장합니다."""
-    conn = sqlite3.connect(DB_NAME)
-    try:
-        df.to_sql(table_name, conn, if_exists="replace", index=False)
-    finally:
-        conn.close()
+    """데이터프레임으로 지정된 테이블의 행을 교체합니다. (테이블 구조와 인덱스는 유지)"""
+    with transaction(DB_NAME) as conn:
+        conn.execute(f'DELETE FROM "{table_name}"')
+        df.to_sql(table_name, conn, if_exists="append", index=False)
 
 # ==============================================================================
 # 2. Streamlit 앱 구성
@@ -1,6 +1,8 @@
 # match_authors.py
 import os
-import sqlite3
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection
 from dotenv import load_dotenv
 from LLM_MODEL import GPTApi
 from difflib import SequenceMatcher
@@ -203,7 +205,7 @@ def match_authors_with_users(db_path="paper.db", limit=10):
     llm = GPTApi(model_name=MODEL_NAME, api_key=OPENAI_API_KEY)
 
     # DB 연결
-    conn = sqlite3.connect(db_path)
+    conn = get_connection(db_path)
     cursor = conn.cursor()
 
     # a_info 테이블에서 AUTHOR와 AFFILIATION 읽기
@@ -0,0 +1,45 @@
+"""
+전문 검색 색인(c_info_fts, a_info_fts)을 만들거나 원본 테이블 전체로 다시 채웁니다.
+- SQLite 를 FTS5 trigram 지원 버전(3.34 이상)으로 올린 뒤 색인을 처음 만들 때
+- c_info/a_info 를 통째로 다시 만들었거나(to_sql replace 등) 검색 결과가 맞지 않을 때
+  (VACUUM 으로 rowid 가 바뀐 경우는 앱 시작 시 schema.migrate() 가 자동으로 다시 채움)
+
+사용 예:
+    python util/rebuild_search_index.py               # paper.db
+    python util/rebuild_search_index.py --db other.db
+"""
+import os
+import sys
+import time
+import argparse
+import sqlite3
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import transaction
+from schema import FTS_TABLES, fts_supported, ensure_search_index
+
+DB_FILE = "paper.db"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전문 검색 색인 재생성")
+    parser.add_argument("--db", default=DB_FILE, help="대상 DB 파일")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"오류: '{args.db}' 파일이 없습니다. 앱을 한 번 실행하여 DB를 초기화하세요.")
+        sys.exit(1)
+
+    started = time.time()
+    with transaction(args.db, immediate=True) as conn:
+        if not fts_supported(conn):
+            print(f"오류: SQLite {sqlite3.sqlite_version} 에 FTS5 trigram 토크나이저가 없습니다. (3.34 이상 필요)")
+            sys.exit(1)
+        ensure_search_index(conn, rebuild=True)
+        for fts_table in FTS_TABLES:
+            conn.execute(f'INSERT INTO "{fts_table}" ("{fts_table}") VALUES (\'integrity-check\')')
+            conn.execute(f'INSERT INTO "{fts_table}" ("{fts_table}") VALUES (\'optimize\')')
+    print(f"전문 검색 색인 재생성 완료 ({', '.join(FTS_TABLES)}), {time.time() - started:.1f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import os
-import sqlite3
 from typing import List, Dict, TypedDict
 
 import pandas as pd
 from dotenv import load_dotenv
 
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import transaction
+
 # [수정됨] Pydantic v1 호환성을 위해 import 경로 변경
 from pydantic.v1 import BaseModel, Field
 from langchain_openai import ChatOpenAI
@@ -72,7 +75,7 @@ def fetch_names_from_db(state: GraphState) -> GraphState:
     print("--- 1. 데이터베이스에서 이름 가져오는 중 ---")
     db_path = state["db_path"]
     try:
-        with sqlite3.connect(db_path) as conn:
+        with transaction(db_path) as conn:
             a_info_df = pd.read_sql_query(
                 "SELECT DISTINCT AUTHOR FROM a_info ORDER BY AUTHOR;", conn
             )
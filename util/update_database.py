@@ -1,7 +1,9 @@
-import sqlite3
 import pandas as pd
 import os
 import bcrypt
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # 저장소 루트의 공용 모듈 (python util/<파일>.py 실행 시)
+from db import get_connection
 
 DB_NAME = "paper.db"
 
@@ -16,7 +18,7 @@ def update_db_schema():
         )
         return
 
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection(DB_NAME)
     print(f"'{DB_NAME}' 데이터베이스 스키마 업데이트를 시작합니다...")
 
     try:
@@ -63,8 +65,9 @@ def update_db_schema():
             "- 'user_info' 테이블에 'password' 컬럼을 추가하고 값을 업데이트했습니다."
         )
 
-        # 변경된 DataFrame을 다시 DB에 저장
-        df.to_sql("user_info", conn, if_exists="replace", index=False)
+        # 변경된 DataFrame을 다시 DB에 저장 (테이블을 다시 만들지 않고 행만 교체하여 인덱스/기본 키 유지)
+        conn.execute("DELETE FROM user_info")
+        df.to_sql("user_info", conn, if_exists="append", index=False)
 
         conn.commit()
         print("\n데이터베이스 스키마 업데이트가 성공적으로 완료되었습니다.")
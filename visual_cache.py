@@ -0,0 +1,106 @@
+import os
+import time
+from layout_cache import file_sha256, get_service_version
+from layout_client import visualize_pdf
+from layout_admission import layout_slot
+
+# --- 레이아웃 시각화 PDF 캐시 ---
+# 시각화 PDF는 관리자가 요청할 때만 만들고 visualized/<PDF 해시>.v<서비스 버전>_vis.pdf 로 저장합니다.
+# 전체 크기가 VIS_CACHE_MAX_MB 를 넘으면 가장 오래 사용하지 않은 파일부터 지웁니다. (파일 수정 시각 = 마지막 사용 시각)
+VIS_CACHE_DIR = "visualized"
+DEFAULT_MAX_MB = 500  # .env 의 VIS_CACHE_MAX_MB
+VIS_SUFFIX = "_vis.pdf"
+
+
+def get_max_bytes():
+    return int(os.getenv("VIS_CACHE_MAX_MB", DEFAULT_MAX_MB)) * 1024 * 1024
+
+
+def vis_path_for(pdf_hash, cache_dir=None):
+    return os.path.join(cache_dir or VIS_CACHE_DIR, f"{pdf_hash}.v{get_service_version()}{VIS_SUFFIX}")
+
+
+def get_cached_visualization(pdf_hash, cache_dir=None):
+    """저장된 시각화 PDF 경로를 반환하고 사용 시각을 갱신합니다. 없으면 None."""
+    vis_path = vis_path_for(pdf_hash, cache_dir)
+    if not os.path.exists(vis_path):
+        return None
+    try:
+        os.utime(vis_path)
+    except OSError:
+        pass
+    return vis_path
+
+
+def _list_visualizations(cache_dir=None):
+    cache_dir = cache_dir or VIS_CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return []
+    files = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(VIS_SUFFIX):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue  # 다른 프로세스가 방금 지운 파일
+        files.append((stat.st_mtime, stat.st_size, path))
+    return files
+
+
+def get_cache_usage(cache_dir=None):
+    """(파일 수, 전체 바이트)"""
+    files = _list_visualizations(cache_dir)
+    return len(files), sum(size for _, size, _ in files)
+
+
+def evict_visualizations(max_bytes=None, keep=None, cache_dir=None):
+    """전체 크기가 max_bytes 이하가 될 때까지 오래 사용하지 않은 파일부터 지우고 지운 파일 수를 반환합니다."""
+    max_bytes = get_max_bytes() if max_bytes is None else max_bytes
+    files = sorted(_list_visualizations(cache_dir))
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def get_visualization(pdf_path, service_url, timeout, pdf_hash=None, holder=None, cache_dir=None):
+    """
+    PDF 레이아웃 시각화 파일 경로를 반환합니다. 캐시에 없으면 레이아웃 서비스로 만들어 저장합니다.
+    서비스 호출은 layout_admission 슬롯을 얻은 뒤에 보냅니다.
+    실패하면 LayoutServiceError / AdmissionTimeout 이 그대로 올라갑니다.
+    """
+    pdf_hash = pdf_hash or file_sha256(pdf_path)
+    cached_path = get_cached_visualization(pdf_hash, cache_dir)
+    if cached_path:
+        return cached_path
+
+    vis_path = vis_path_for(pdf_hash, cache_dir)
+    os.makedirs(os.path.dirname(vis_path), exist_ok=True)
+    started = time.time()
+    with layout_slot(holder or f"vis:{pdf_hash}"):
+        visualize_pdf(pdf_path, vis_path, service_url, timeout)
+    removed = evict_visualizations(keep=vis_path, cache_dir=cache_dir)
+    print(f"[VIS CACHE] {pdf_hash} 생성 {time.time() - started:.1f}초, 오래된 파일 {removed}건 삭제")
+    return vis_path
+
+
+def remove_visualization(pdf_hash, cache_dir=None):
+    """논문 삭제 시 해당 PDF의 시각화 파일(모든 서비스 버전)을 지웁니다."""
+    for _, _, path in _list_visualizations(cache_dir):
+        if os.path.basename(path).startswith(f"{pdf_hash}.v"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,267 @@
+"""
+백그라운드 작업 워커. job_queue 의 작업을 가져와 PDF 레이아웃 분석과 서지정보 추출을 수행합니다.
+
+사용 예:
+    python worker.py               # 워커 1개
+    python worker.py --processes 4 # 워커 4개 (UI와 별도로 확장)
+"""
+import os
+import json
+import time
+import socket
+import argparse
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+import job_queue
+from db import close_all
+from layout_cache import file_sha256, get_cached_layout, put_cached_layout, init_layout_cache_table, get_page_window
+from layout_client import LayoutServiceError, analyze_pdf, truncate_pdf, remove_truncated_pdf
+from layout_admission import AdmissionTimeout, layout_slot, init_admission_table
+from local_layout import analyze_locally
+from layout_store import LAYOUT_EXT, layout_stem, save_layout
+from visual_cache import get_visualization
+from job_queue import KIND_LAYOUT, KIND_EXTRACT, KIND_ANALYZE, KIND_VISUALIZE
+
+# --- 설정 ---
+upload_folder = "uploaded"
+resolve_folder = "resolved"
+POLL_INTERVAL = 2  # 대기 작업이 없을 때 조회 간격 (초)
+RETRY_LATER_SEC = 60  # 레이아웃 서비스 혼잡 시 작업을 미루는 시간 (초)
+
+
+load_dotenv(override=True)
+PDF_SERVICE_URL = os.getenv("PDF_SERVICE_URL")
+if not PDF_SERVICE_URL:
+    raise ValueError("❌🔑❌ 'PDF_SERVICE_URL'가 .env 파일에 없습니다.")
+REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT"))
+
+
+class JobError(Exception):
+    """작업 처리 오류 (job_queue 에서 백오프 후 재시도됨)."""
+
+
+class RetryLater(Exception):
+    """레이아웃 서비스 혼잡 (대기 시간 초과, 과부하 응답, 같은 PDF 처리 대기). 재시도 횟수 차감 없이 작업을 미룸."""
+
+
+def _has_text(json_data):
+    return bool(json_data) and any(
+        isinstance(block.get("text"), str) and block["text"].strip() for block in json_data
+    )
+
+
+def _analyze_remote(pdf_path):
+    # 과부하로 거절된 요청은 실패가 아니라 RetryLater 로 올려 보냄
+    try:
+        return analyze_pdf(pdf_path, PDF_SERVICE_URL, REQUEST_TIMEOUT), ""
+    except LayoutServiceError as e:
+        if e.rejected:
+            raise RetryLater(str(e))
+        return None, str(e)
+
+
+def _run_remote_layout(pdf_path, pdf_hash, holder):
+    # 추출에 쓰는 앞쪽 페이지만 잘라서 전송 (pypdf 가 없거나 짧은 PDF면 전체 전송)
+    page_window = get_page_window()
+    truncated_path = truncate_pdf(pdf_path, page_window) if page_window else None
+    json_data, error = None, ""
+    try:
+        with layout_slot(holder):
+            if truncated_path:
+                json_data, error = _analyze_remote(truncated_path)
+                if not _has_text(json_data):
+                    # 잘린 PDF에서 텍스트를 얻지 못하면(분석 실패 포함) 전체 문서로 다시 분석
+                    reason = error or "텍스트 없음"
+                    print(f"[worker] 앞쪽 {page_window}페이지 분석 결과 사용 불가({reason}), 전체 문서로 다시 분석: {pdf_path}")
+                    remove_truncated_pdf(truncated_path)
+                    truncated_path, json_data = None, None
+            if json_data is None:
+                json_data, error = _analyze_remote(pdf_path)
+    except AdmissionTimeout as e:
+        raise RetryLater(str(e))
+    finally:
+        if truncated_path:
+            remove_truncated_pdf(truncated_path)
+    if not json_data:
+        raise JobError(f"PDF 분석 실패: {error}")
+
+    # 페이지별 압축 형식으로 저장 (기존 JSON 은 layout_store.export_layout_json 으로 내보낼 수 있음)
+    os.makedirs(upload_folder, exist_ok=True)
+    json_filename = f"{os.path.splitext(os.path.basename(pdf_path))[0]}{LAYOUT_EXT}"
+    json_path = os.path.join(upload_folder, json_filename)
+    save_layout(json_data, json_path)
+    put_cached_layout(pdf_hash, json_path, len(json_data), page_window=page_window if truncated_path else None)
+    return {"json_path": json_path, "cached": False}
+
+
+def run_layout(pdf_path, force=False, holder=None):
+    """
+    PDF 레이아웃 분석 결과 JSON 경로를 반환합니다.
+    같은 PDF(SHA-256)와 서비스 버전의 결과가 캐시에 있으면 서비스를 호출하지 않습니다.
+    텍스트 레이어가 있는 PDF는 로컬에서 바로 분석하고, 스캔본만 원격 서비스로 보냅니다.
+    force=True 이면 캐시와 로컬 분석을 건너뛰고 원격 서비스로 다시 분석합니다.
+    원격 서비스 호출은 layout_admission 의 선착순 슬롯을 얻은 뒤에만 보냅니다. (holder: 대기 상태 조회 키)
+    다른 워커가 같은 PDF를 분석 중이면 끝날 때까지 기다렸다가 그 결과를 사용합니다.
+    """
+    holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+    pdf_hash = file_sha256(pdf_path)
+    if not force:
+        cached_path = get_cached_layout(pdf_hash, legacy_dir=upload_folder)
+        if cached_path:
+            return {"json_path": cached_path, "cached": True}
+        local_path = analyze_locally(pdf_path, pdf_hash, upload_folder)
+        if local_path:
+            return {"json_path": local_path, "cached": False, "local": True}
+
+    try:
+        with job_queue.stage_lock(f"{KIND_LAYOUT}:{pdf_hash}", holder) as waited:
+            if waited and not force:
+                cached_path = get_cached_layout(pdf_hash, legacy_dir=upload_folder)
+                if cached_path:
+                    return {"json_path": cached_path, "cached": True}
+            return _run_remote_layout(pdf_path, pdf_hash, holder)
+    except job_queue.StageLockTimeout as e:
+        raise RetryLater(str(e))
+
+
+def run_visualize(pdf_path, holder=None):
+    """레이아웃 시각화 PDF 경로를 반환합니다. (visual_cache 에 있으면 재사용)"""
+    try:
+        return {"vis_path": get_visualization(pdf_path, PDF_SERVICE_URL, REQUEST_TIMEOUT, holder=holder)}
+    except AdmissionTimeout as e:
+        raise RetryLater(str(e))
+    except LayoutServiceError as e:
+        if e.rejected:
+            raise RetryLater(str(e))
+        raise JobError(f"시각화 PDF 생성 실패: {e}")
+
+
+def run_extract(json_path, holder=None):
+    """
+    레이아웃 결과에서 서지정보를 추출합니다.
+    다른 워커가 같은 PDF를 추출 중이면 끝날 때까지 기다렸다가 그 워커가 저장한 결과 파일을 사용합니다.
+    """
+    # 워커 프로세스 안에서는 get_extractor() 로 프롬프트/LLM 체인이 재사용됨
+    from get_paper_info import get_extractor, get_paper_df, paper_df_from_json, find_output_file, save_output_file
+
+    holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+    started = time.time()
+    try:
+        with job_queue.stage_lock(f"{KIND_EXTRACT}:{layout_stem(json_path)}", holder) as waited:
+            model_name = get_extractor().model_name
+            output_path = find_output_file(json_path, model_name, resolve_folder, since=started) if waited else None
+            if output_path:
+                with open(output_path, "r", encoding="utf-8") as f:
+                    json_data, a_info, c_info, fail_count, model_name = paper_df_from_json(json.load(f), model_name)
+            else:
+                json_data, a_info, c_info, fail_count, model_name = get_paper_df(json_path)
+                os.makedirs(resolve_folder, exist_ok=True)
+                output_path, _ = save_output_file(json_data, os.path.basename(json_path), model_name, resolve_folder)
+    except job_queue.StageLockTimeout as e:
+        raise RetryLater(str(e))
+
+    return {
+        "json_path": json_path,
+        "json_data": json_data,
+        "a_info": a_info.to_dict(orient="records") if a_info is not None else None,
+        "c_info": c_info.to_dict(orient="records") if c_info is not None else None,
+        "fail_count": fail_count,
+        "model_name": model_name,
+        "llm_json_path": output_path,
+    }
+
+
+def handle_job(job):
+    payload = job["payload"]
+    holder = job_queue.job_holder(job["id"])
+    if job["kind"] == KIND_LAYOUT:
+        return run_layout(payload["pdf_path"], force=payload.get("force", False), holder=holder)
+    if job["kind"] == KIND_EXTRACT:
+        return run_extract(payload["json_path"], holder=holder)
+    if job["kind"] == KIND_ANALYZE:
+        layout = run_layout(payload["pdf_path"], force=payload.get("force", False), holder=holder)
+        return run_extract(layout["json_path"], holder=holder)
+    if job["kind"] == KIND_VISUALIZE:
+        return run_visualize(payload["pdf_path"], holder=holder)
+    raise ValueError(f"알 수 없는 작업 종류: {job['kind']}")
+
+
+def _renew_lease(job_id, worker_id, stop):
+    # 작업이 끝날 때까지 점유 시간을 연장 (별도 스레드, 스레드 전용 연결 사용)
+    try:
+        while not stop.wait(job_queue.LEASE_RENEW_SEC):
+            try:
+                renewed = job_queue.renew_lease(job_id, worker_id)
+            except Exception as e:
+                print(f"[worker {worker_id}] job {job_id} 점유 시간 연장 실패: {e}")
+                continue
+            if not renewed:
+                print(f"[worker {worker_id}] job {job_id} 점유가 이미 회수됨")
+                return
+    finally:
+        close_all()
+
+
+@contextmanager
+def job_lease(job_id, worker_id):
+    """블록이 끝날 때까지 작업 점유 시간(job_queue.LEASE_SEC)을 주기적으로 연장합니다."""
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_renew_lease, args=(job_id, worker_id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        heartbeat.join()
+
+
+def worker_loop(worker_id=None):
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    job_queue.init_job_table()
+    init_layout_cache_table()
+    init_admission_table()
+    print(f"[worker {worker_id}] 시작")
+    while True:
+        job = job_queue.claim_job(worker_id)
+        if job is None:
+            time.sleep(POLL_INTERVAL)
+            continue
+
+        started = time.time()
+        try:
+            # 결과 기록(complete/fail/defer) 전에 연장을 멈춤
+            with job_lease(job["id"], worker_id):
+                result = handle_job(job)
+            if job_queue.complete_job(job["id"], result, worker_id):
+                print(f"[worker {worker_id}] job {job['id']} ({job['kind']}) 완료 {time.time() - started:.1f}초")
+            else:
+                print(f"[worker {worker_id}] job {job['id']} ({job['kind']}) 점유 시간 초과로 결과를 기록하지 않음")
+        except RetryLater as e:
+            status = job_queue.defer_job(job["id"], RETRY_LATER_SEC, e, worker_id)
+            print(f"[worker {worker_id}] job {job['id']} ({job['kind']}) 보류 -> {status}: {e}")
+        except Exception as e:
+            status = job_queue.fail_job(job["id"], e, worker_id)
+            print(f"[worker {worker_id}] job {job['id']} ({job['kind']}) 실패 -> {status}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 분석/서지정보 추출 백그라운드 워커")
+    parser.add_argument("--processes", type=int, default=1, help="워커 프로세스 수")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        worker_loop()
+        return
+
+    procs = [multiprocessing.Process(target=worker_loop) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()